@@ -1,7 +1,7 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Tenant, Permission, RolePermission, LoginHistory
+from .models import User, Tenant, Permission, RolePermission, RoleTemplate, LoginHistory
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -76,6 +76,12 @@ class RolePermissionAdmin(ModelAdmin):
     list_display = ['user', 'permission', 'is_enabled']
     list_filter = ['is_enabled']
 
+@admin.register(RoleTemplate)
+class RoleTemplateAdmin(ModelAdmin):
+    list_display = ['name', 'role', 'tenant', 'updated_at']
+    list_filter = ['role']
+    filter_horizontal = ['permissions']
+
 @admin.register(LoginHistory)
 class LoginHistoryAdmin(ModelAdmin):
     list_display = ['user', 'ip_address', 'login_successful', 'login_at']
@@ -4,3 +4,6 @@ class AuthServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_service'
     verbose_name = 'Authentication Service'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,79 @@
+"""
+Login audit pipeline
+Logins record a LoginEvent instead of writing LoginHistory and last_login
+on the request path. Events are written in batches by a background thread
+(shared/batching.py): one bulk_create for the LoginHistory rows and one
+UPDATE for last_login, keeping only each user's latest login in the batch.
+
+With LOGIN_AUDIT_ASYNC = False events are written before the response,
+as before.
+"""
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db.models import Case, When
+from django.utils import timezone
+
+from shared.batching import BatchingQueue
+from shared.transactions import immediate_atomic
+
+
+class LoginEvent(NamedTuple):
+    user_id: uuid.UUID
+    ip_address: str
+    user_agent: str
+    login_at: datetime
+
+
+@immediate_atomic()
+def write_login_events(events):
+    # One transaction, so a retried batch never writes its history rows twice
+    from .models import LoginHistory, User
+
+    LoginHistory.objects.bulk_create([
+        LoginHistory(
+            user_id=event.user_id,
+            ip_address=event.ip_address,
+            user_agent=event.user_agent,
+            login_successful=True,
+            login_at=event.login_at,
+        )
+        for event in events
+    ])
+
+    latest = {}
+    for event in events:
+        if event.user_id not in latest or event.login_at > latest[event.user_id]:
+            latest[event.user_id] = event.login_at
+    # A queryset update: no post_save, so the auth version is left alone
+    User.objects.filter(pk__in=latest).update(last_login=Case(
+        *[When(pk=user_id, then=login_at) for user_id, login_at in latest.items()]
+    ))
+
+
+login_audit = BatchingQueue(
+    write_login_events,
+    name='login-audit',
+    max_size=getattr(settings, 'LOGIN_AUDIT_QUEUE_SIZE', 10000),
+    batch_size=getattr(settings, 'LOGIN_AUDIT_BATCH_SIZE', 500),
+    interval=getattr(settings, 'LOGIN_AUDIT_INTERVAL', 1.0),
+)
+
+
+def record_login(user, request):
+    """Record a successful login (sets user.last_login for the response)"""
+    from .views import get_client_ip
+
+    user.last_login = timezone.now()
+    event = LoginEvent(
+        user_id=user.pk,
+        ip_address=get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        login_at=user.last_login,
+    )
+    if getattr(settings, 'LOGIN_AUDIT_ASYNC', True):
+        login_audit.put(event)
+    else:
+        write_login_events([event])
@@ -0,0 +1,135 @@
+"""
+JWT authentication without a user lookup per request
+Access tokens carry the fields API permission checks need (tenant, role, role
+template) plus an auth version. While the version in the token matches the
+user's current auth version in the cache, the request user is built from the
+claims and no query is made; otherwise (or for tokens issued without the
+claims) the user is loaded from the database as before.
+
+The auth version is bumped (see signals.py) whenever a user's role, tenant,
+role template or active flag changes, so such changes apply on the next
+request. Permission rows are versioned separately by the permission engine
+and do not invalidate tokens. Like the other versioned caches, this needs a
+cache shared by all workers to invalidate across processes.
+
+The request user built from claims is not a full row: use it for ids, role
+and tenant checks, and load the user (e.g. CurrentUserView) for anything else.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from shared.cache import bump_version, get_version
+
+
+# Fields whose changes bump the auth version
+AUTH_FIELDS = ('role', 'tenant_id', 'role_template_id', 'is_active')
+
+CLAIMS = ('role', 'tenant_id', 'role_template_id', 'auth_version')
+
+
+def _auth_version(user_id):
+    return f'auth:{user_id}'
+
+
+def get_auth_version(user_id):
+    return get_version(_auth_version(user_id))
+
+
+def invalidate_auth(user_id):
+    bump_version(_auth_version(user_id))
+
+
+def auth_state(user):
+    """Values of AUTH_FIELDS, without loading deferred fields"""
+    return tuple(user.__dict__.get(field) for field in AUTH_FIELDS)
+
+
+def add_user_claims(token, user):
+    """Put the request user's fields and auth version into a token"""
+    token['role'] = user.role
+    token['tenant_id'] = str(user.tenant_id) if user.tenant_id else None
+    token['role_template_id'] = str(user.role_template_id) if user.role_template_id else None
+    token['auth_version'] = get_auth_version(user.pk)
+    return token
+
+
+def _uuid_or_none(value):
+    return uuid.UUID(value) if value else None
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts current claims instead of loading the user"""
+
+    def get_user(self, validated_token):
+        if getattr(settings, 'JWT_CLAIMS_AUTH', True):
+            user = self.get_user_from_claims(validated_token)
+            if user is not None:
+                return user
+        return super().get_user(validated_token)
+
+    def get_user_from_claims(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return None
+        try:
+            user_id = uuid.UUID(str(validated_token[api_settings.USER_ID_CLAIM]))
+        except (KeyError, ValueError):
+            return None
+        if validated_token['auth_version'] != get_auth_version(user_id):
+            return None
+
+        User = get_user_model()
+        try:
+            user = User(
+                id=user_id,
+                role=validated_token['role'],
+                tenant_id=_uuid_or_none(validated_token['tenant_id']),
+                role_template_id=_uuid_or_none(validated_token['role_template_id']),
+                is_active=True
+            )
+        except ValueError:
+            return None
+        # Left marked as unsaved: a save() would fail on the primary key
+        # instead of overwriting the row with the missing fields
+        user.from_token_claims = True
+        return user
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that re-reads the claims from the user row
+    Without this, refreshed access tokens would copy the claims of the
+    original login and fall back to a user lookup on every request once the
+    auth version moves on.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = get_user_model().objects.filter(pk=refresh[api_settings.USER_ID_CLAIM]).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('User not found or inactive', code='user_inactive')
+        add_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # Blacklist app not installed
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
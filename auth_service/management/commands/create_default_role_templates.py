@@ -0,0 +1,64 @@
+"""
+Management command to create system role templates for the built-in roles
+Run after create_default_permissions: python manage.py create_default_role_templates
+Existing templates keep their permissions unless --reset is given
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from auth_service.models import Permission, RoleTemplate
+
+
+# role -> (template name, permission filters as (category, actions or None for all))
+DEFAULT_TEMPLATES = {
+    'general_manager': ('General Manager', [('master_sheets', None), ('ims', None), ('sourcing', None)]),
+    'manager': ('Manager', [('master_sheets', ['view', 'export']), ('ims', None), ('sourcing', ['view'])]),
+    'inventory_manager': ('Inventory Manager', [('ims', None), ('master_sheets', ['view'])]),
+    'supervisor': ('Supervisor', [('ims', ['view', 'create', 'edit'])]),
+    'attendant': ('Attendant', [('ims', ['view'])]),
+    'accountant': ('Accountant', [('master_sheets', ['view', 'export'])]),
+    'employee': ('Employee', [('ims', ['view'])]),
+}
+
+
+class Command(BaseCommand):
+    help = 'Create system role templates with default permissions for the built-in roles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Replace the permissions of existing system templates')
+
+    def handle(self, *args, **options):
+        created_count = 0
+        skipped_count = 0
+
+        for role, (name, rules) in DEFAULT_TEMPLATES.items():
+            template, created = RoleTemplate.objects.get_or_create(
+                tenant=None,
+                name=name,
+                defaults={'role': role, 'description': f'Default permissions for {name}'}
+            )
+            if not created and not options['reset']:
+                skipped_count += 1
+                self.stdout.write(self.style.WARNING(f'Skipped (already exists): {template}'))
+                continue
+
+            condition = Q(pk__in=[])
+            for category, actions in rules:
+                rule = Q(category=category)
+                if actions:
+                    rule &= Q(action__in=actions)
+                condition |= rule
+            template.permissions.set(Permission.objects.filter(condition))
+
+            created_count += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{"Created" if created else "Reset"} template: {template} '
+                f'({template.permissions.count()} permissions)'
+            ))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCompleted! Created or reset {created_count} templates, skipped {skipped_count} existing templates.'
+            )
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("auth_service", "0003_tenant_logo_tenant_plan_user_custom_role_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["tenant", "created_at"], name="users_tenant__3619b8_idx"
+            ),
+        ),
+    ]
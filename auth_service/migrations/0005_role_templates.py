@@ -0,0 +1,101 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:27
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0004_user_tenant_created_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoleTemplate",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "role",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("master_admin", "Master Admin"),
+                            ("tenant_owner", "Tenant Owner"),
+                            ("manager", "Manager"),
+                            ("general_manager", "General Manager"),
+                            ("inventory_manager", "Inventory Manager"),
+                            ("supervisor", "Supervisor"),
+                            ("attendant", "Attendant"),
+                            ("accountant", "Accountant"),
+                            ("vendor", "Vendor"),
+                            ("distributor", "Distributor"),
+                            ("employee", "Employee"),
+                            ("custom", "Custom Role"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("description", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="created_role_templates",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "permissions",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="role_templates",
+                        to="auth_service.permission",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="role_templates",
+                        to="auth_service.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Role Template",
+                "verbose_name_plural": "Role Templates",
+                "db_table": "role_templates",
+                "ordering": ["name"],
+                "unique_together": {("tenant", "name")},
+            },
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="role_template",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="members",
+                to="auth_service.roletemplate",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0005_role_templates"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loginhistory",
+            name="login_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -97,6 +97,16 @@ class User(AbstractBaseUser, PermissionsMixin):
         blank=True
     )
     
+    # Role template: permissions shared by every member of a role; the
+    # member's own RolePermission rows override it
+    role_template = models.ForeignKey(
+        'RoleTemplate',
+        on_delete=models.SET_NULL,
+        related_name='members',
+        null=True,
+        blank=True
+    )
+    
     # Status Flags
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -140,6 +150,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         indexes = [
             models.Index(fields=['email']),
             models.Index(fields=['tenant', 'role']),
+            models.Index(fields=['tenant', 'created_at']),
             models.Index(fields=['email_verification_token']),
         ]
     
@@ -330,6 +341,60 @@ class RolePermission(models.Model):
         return f"{self.user.email} - {self.permission}"
 
 
+class RoleTemplate(models.Model):
+    """
+    Named permission set for a role
+    Members that reference a template get its permissions without any
+    RolePermission rows of their own, so provisioning a member writes no
+    permission rows and editing a template applies to all its members at once.
+    Templates without a tenant are system defaults available to every tenant.
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='role_templates',
+        null=True,
+        blank=True
+    )
+    name = models.CharField(max_length=100)
+    # Role this template is assigned to by default when a member is created
+    role = models.CharField(max_length=30, choices=User.ROLE_CHOICES, blank=True)
+    description = models.TextField(blank=True)
+    permissions = models.ManyToManyField(Permission, blank=True, related_name='role_templates')
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='created_role_templates'
+    )
+    
+    class Meta:
+        db_table = 'role_templates'
+        verbose_name = 'Role Template'
+        verbose_name_plural = 'Role Templates'
+        unique_together = ['tenant', 'name']
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def default_for(cls, role, tenant_id=None):
+        """The tenant's template for a role, else the system default"""
+        templates = cls.objects.filter(role=role).filter(
+            models.Q(tenant_id=tenant_id) | models.Q(tenant__isnull=True)
+        ).order_by(models.F('tenant_id').asc(nulls_last=True), 'name')
+        return templates.first()
+
+
 class LoginHistory(models.Model):
     """
     Track user login history for security and analytics
@@ -345,7 +410,8 @@ class LoginHistory(models.Model):
     login_successful = models.BooleanField(default=True)
     
     # Timestamps
-    login_at = models.DateTimeField(auto_now_add=True)
+    # Set by the caller: audit rows are written in batches after the login
+    login_at = models.DateTimeField(default=timezone.now)
     logout_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
@@ -0,0 +1,330 @@
+"""
+Compiled, cached user permissions
+A user's effective permissions are their role template's permissions plus
+their own RolePermission rows, which act as overrides (an enabled row grants,
+a disabled row revokes). They are compiled into:
+- enabled:  frozenset of (category, action, resource) tuples, for O(1) checks
+- entries:  the rows as UserDetailSerializer renders them (enabled or not)
+
+Compiled objects are kept in the Django cache under keys made of version
+counters (see shared/cache.py): the Permission catalogue, the user's
+overrides and the role template. Writes bump them from signals.py, so
+toggle_permission, update_permissions and template edits invalidate without
+extra calls; bulk updates that skip signals call invalidate_user_permissions()
+themselves. A template is compiled once and shared by all of its members, so
+changing it touches one version counter however many members use it.
+
+sync_user_permissions() is the write side: it applies a whole permission
+matrix with a fixed number of queries.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from shared.cache import bump_version, get_versions
+from shared.db_routing import use_primary
+from shared.transactions import immediate_atomic
+
+
+CATALOGUE_VERSION = 'permissions'
+
+PERMISSION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Roles that pass every permission check
+UNRESTRICTED_ROLES = ('master_admin', 'tenant_owner')
+
+
+def _user_version(user_id):
+    return f'permissions:{user_id}'
+
+
+def _template_version(template_id):
+    return f'role_template:{template_id}'
+
+
+class CompiledPermissions:
+    """A user's permissions, as cached"""
+
+    __slots__ = ('enabled', 'entries')
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.enabled = frozenset(
+            (entry['category'], entry['action'], entry['resource'])
+            for entry in entries if entry['is_enabled']
+        )
+
+    def __contains__(self, permission):
+        return permission in self.enabled
+
+
+def compile_template(template_id):
+    """Entries for a role template's permissions (one query)"""
+    from .models import Permission
+
+    rows = Permission.objects.filter(role_templates=template_id).values_list(
+        'id', 'category', 'action', 'resource', 'description'
+    ).order_by('category', 'resource', 'action')
+    return [
+        {
+            'id': str(permission_id),
+            'permission_id': None,
+            'category': category,
+            'action': action,
+            'resource': resource,
+            'description': description,
+            'is_enabled': True,
+            'source': 'template'
+        }
+        for permission_id, category, action, resource, description in rows
+    ]
+
+
+def _member_entries(rows):
+    return [
+        {
+            'id': str(permission_id),
+            'permission_id': str(role_permission_id),
+            'category': category,
+            'action': action,
+            'resource': resource,
+            'description': description,
+            'is_enabled': is_enabled,
+            'source': 'member'
+        }
+        for role_permission_id, is_enabled, permission_id, category, action, resource, description in rows
+    ]
+
+
+def _merge(member_entries, template_entries):
+    """Member rows override the template's entry for the same permission"""
+    overridden = {entry['id'] for entry in member_entries}
+    return CompiledPermissions(
+        member_entries + [entry for entry in template_entries if entry['id'] not in overridden]
+    )
+
+
+_ROW_FIELDS = (
+    'id', 'is_enabled', 'permission_id', 'permission__category',
+    'permission__action', 'permission__resource', 'permission__description'
+)
+
+
+def compile_permissions(user_id, template_entries=()):
+    """Merge a user's RolePermission rows (one query) over their template"""
+    from .models import RolePermission
+
+    rows = RolePermission.objects.filter(user_id=user_id).values_list(*_ROW_FIELDS).order_by('created_at')
+    return _merge(_member_entries(rows), template_entries)
+
+
+def get_template_entries(template_id, catalogue_version=None, template_version=None):
+    """Compiled entries for a role template, from the cache if current"""
+    if catalogue_version is None:
+        catalogue_version, template_version = get_versions(CATALOGUE_VERSION, _template_version(template_id))
+    key = f'role_template:{template_id}:{catalogue_version}:{template_version}'
+    entries = cache.get(key)
+    if entries is None:
+        with use_primary():
+            entries = compile_template(template_id)
+        cache.set(key, entries, PERMISSION_CACHE_TIMEOUT)
+    return entries
+
+
+def _version_names(user):
+    names = [CATALOGUE_VERSION, _user_version(user.pk)]
+    if user.role_template_id:
+        names.append(_template_version(user.role_template_id))
+    return names
+
+
+def _permissions_key(user, versions):
+    """Cache key for a user's compiled permissions given {version name: version}"""
+    parts = ['permissions', str(user.pk), str(user.role_template_id)]
+    parts.extend(str(versions[name]) for name in _version_names(user))
+    return ':'.join(parts)
+
+
+def _template_entries_for(user, versions):
+    if not user.role_template_id:
+        return ()
+    return get_template_entries(
+        user.role_template_id,
+        versions[CATALOGUE_VERSION],
+        versions[_template_version(user.role_template_id)]
+    )
+
+
+def get_permissions(user):
+    """Return the CompiledPermissions for a user, from the cache if current"""
+    # Memoised on the user object, which lives for one request
+    compiled = getattr(user, '_compiled_permissions', None)
+    if compiled is not None:
+        return compiled
+
+    names = _version_names(user)
+    versions = dict(zip(names, get_versions(*names)))
+    key = _permissions_key(user, versions)
+    compiled = cache.get(key)
+    if compiled is None:
+        # Compiled from the primary, so a lagging replica cannot cache old rows
+        with use_primary():
+            compiled = compile_permissions(user.pk, _template_entries_for(user, versions))
+        cache.set(key, compiled, PERMISSION_CACHE_TIMEOUT)
+    user._compiled_permissions = compiled
+    return compiled
+
+
+def prefetch_permissions(users):
+    """
+    Load compiled permissions for a page of users at once
+    One cache round trip for the versions and one for the compiled sets;
+    users missing from the cache are compiled from a single RolePermission
+    query (plus one per uncached role template).
+    """
+    from .models import RolePermission
+
+    users = [user for user in users if getattr(user, '_compiled_permissions', None) is None]
+    if not users:
+        return
+
+    names = list(dict.fromkeys(name for user in users for name in _version_names(user)))
+    versions = dict(zip(names, get_versions(*names)))
+    keys = [_permissions_key(user, versions) for user in users]
+    found = cache.get_many(keys)
+
+    missing = [user for user, key in zip(users, keys) if key not in found]
+    if missing:
+        rows_by_user = {user.pk: [] for user in missing}
+        with use_primary():
+            rows = RolePermission.objects.filter(user_id__in=rows_by_user).values_list(
+                'user_id', *_ROW_FIELDS
+            ).order_by('created_at')
+            for row in rows:
+                rows_by_user[row[0]].append(row[1:])
+            compiled = {
+                _permissions_key(user, versions): _merge(
+                    _member_entries(rows_by_user[user.pk]), _template_entries_for(user, versions)
+                )
+                for user in missing
+            }
+        cache.set_many(compiled, PERMISSION_CACHE_TIMEOUT)
+        found.update(compiled)
+
+    for user, key in zip(users, keys):
+        user._compiled_permissions = found[key]
+
+
+def has_permission(user, category, action, resource):
+    """True if the user may perform action on resource"""
+    if not user or not user.is_authenticated or not user.is_active:
+        return False
+    if user.role in UNRESTRICTED_ROLES:
+        return True
+    return (category, action, resource) in get_permissions(user)
+
+
+def invalidate_user_permissions(user_id):
+    bump_version(_user_version(user_id))
+
+
+def invalidate_template_permissions(template_id):
+    bump_version(_template_version(template_id))
+
+
+def invalidate_all_permissions():
+    bump_version(CATALOGUE_VERSION)
+
+
+def _as_uuid(value):
+    if not value:
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+@immediate_atomic()
+def sync_user_permissions(user, entries, granted_by=None):
+    """
+    Apply requested permission states to a user atomically
+
+    entries are dicts with 'is_enabled' (default True) and either
+    'permission_id' (an existing RolePermission id of this user) or 'id'
+    (a Permission id). Unknown ids are skipped; when a permission appears
+    more than once the last entry wins. Existing rows are read in one query
+    and only rows whose state changes are written, with one bulk_update and
+    one bulk_create; members with a role template get no new rows for
+    permissions that already match the template. Returns (created, updated).
+    """
+    from .models import Permission, RolePermission
+
+    existing = {rp.permission_id: rp for rp in RolePermission.objects.filter(user=user)}
+    by_row_id = {rp.id: rp for rp in existing.values()}
+
+    requested = {}
+    unresolved = {}
+    is_enabled_field = RolePermission._meta.get_field('is_enabled')
+    for entry in entries:
+        try:
+            is_enabled = is_enabled_field.to_python(entry.get('is_enabled', True))
+        except ValidationError:
+            continue
+        row = by_row_id.get(_as_uuid(entry.get('permission_id')))
+        if row is not None:
+            requested[row.permission_id] = is_enabled
+            continue
+        permission_id = _as_uuid(entry.get('id'))
+        if permission_id is None:
+            continue
+        if permission_id in existing:
+            requested[permission_id] = is_enabled
+        else:
+            unresolved[permission_id] = is_enabled
+
+    if unresolved:
+        known = set(Permission.objects.filter(id__in=unresolved).values_list('id', flat=True))
+        requested.update((permission_id, unresolved[permission_id]) for permission_id in known)
+
+    # With a role template, rows are only needed where the member differs from it
+    template_ids = None
+    if user.role_template_id:
+        template_ids = {uuid.UUID(entry['id']) for entry in get_template_entries(user.role_template_id)}
+
+    granted_by_id = granted_by.pk if granted_by else None
+    now = timezone.now()
+    to_update = []
+    to_create = []
+    for permission_id, is_enabled in requested.items():
+        row = existing.get(permission_id)
+        if row is None:
+            if template_ids is not None and is_enabled == (permission_id in template_ids):
+                continue
+            to_create.append(RolePermission(
+                user=user,
+                permission_id=permission_id,
+                is_enabled=is_enabled,
+                granted_by_id=granted_by_id
+            ))
+        elif row.is_enabled != is_enabled or row.granted_by_id != granted_by_id:
+            row.is_enabled = is_enabled
+            row.granted_by_id = granted_by_id
+            row.updated_at = now
+            to_update.append(row)
+
+    if not to_update and not to_create:
+        return 0, 0
+
+    if to_update:
+        RolePermission.objects.bulk_update(to_update, ['is_enabled', 'granted_by', 'updated_at'])
+    if to_create:
+        # A concurrent request may have created the same (user, permission)
+        RolePermission.objects.bulk_create(to_create, ignore_conflicts=True)
+    # bulk_update/bulk_create do not send post_save
+    invalidate_user_permissions(user.pk)
+    transaction.on_commit(lambda: invalidate_user_permissions(user.pk))
+    return len(to_create), len(to_update)
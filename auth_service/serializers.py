@@ -4,7 +4,8 @@ Auth Service Serializers
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
-from .models import User, Tenant, Permission, RolePermission
+from .models import User, Tenant, Permission, RolePermission, RoleTemplate
+from .permission_engine import get_permissions, sync_user_permissions
 
 
 class TenantSerializer(serializers.ModelSerializer):
@@ -115,15 +116,11 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if email and password:
-            print("Authenticating user...")
-            print(f"Email: {email}")
-            print(f"Password: {password}")
             user = authenticate(
                 request=self.context.get('request'),
                 username=email,
                 password=password
             )
-            print(f"Authenticated user: {user}")
             
             if not user:
                 raise serializers.ValidationError(
@@ -190,6 +187,15 @@ class PasswordResetSerializer(serializers.Serializer):
         return attrs
 
 
+def validate_member_role_template(request, template):
+    """Members may only use their tenant's templates or the system defaults"""
+    if template is None or template.tenant_id is None:
+        return template
+    if request.user.is_master_admin or template.tenant_id == request.user.tenant_id:
+        return template
+    raise serializers.ValidationError('Role template not found')
+
+
 class CreateMemberSerializer(serializers.ModelSerializer):
     """Serializer for tenant to create members with permissions"""
     
@@ -206,14 +212,23 @@ class CreateMemberSerializer(serializers.ModelSerializer):
         allow_empty=True,
         help_text="List of permission IDs to assign to the user"
     )
+    role_template = serializers.PrimaryKeyRelatedField(
+        queryset=RoleTemplate.objects.all(),
+        required=False,
+        allow_null=True,
+        help_text="Defaults to the template for the member's role, if any"
+    )
     
     class Meta:
         model = User
         fields = [
             'email', 'password', 'first_name', 'last_name',
-            'phone', 'role', 'designation', 'custom_role_name', 'permissions'
+            'phone', 'role', 'designation', 'custom_role_name', 'role_template', 'permissions'
         ]
     
+    def validate_role_template(self, value):
+        return validate_member_role_template(self.context['request'], value)
+    
     def validate(self, attrs):
         """Validate member creation"""
         # Get the request user (tenant owner)
@@ -251,6 +266,12 @@ class CreateMemberSerializer(serializers.ModelSerializer):
         permission_ids = validated_data.pop('permissions', [])
         custom_role_name = validated_data.pop('custom_role_name', None)
         
+        # Use the role's template unless one was chosen (or null was sent)
+        if 'role_template' not in validated_data and validated_data.get('role'):
+            validated_data['role_template'] = RoleTemplate.default_for(
+                validated_data['role'], request.user.tenant_id
+            )
+        
         # Create user
         user = User.objects.create_user(**validated_data)
         
@@ -275,14 +296,11 @@ class CreateMemberSerializer(serializers.ModelSerializer):
         
         # Assign permissions if provided
         if permission_ids:
-            permissions = Permission.objects.filter(id__in=permission_ids)
-            for permission in permissions:
-                RolePermission.objects.create(
-                    user=user,
-                    permission=permission,
-                    is_enabled=True,
-                    granted_by=request.user
-                )
+            sync_user_permissions(
+                user,
+                [{'id': permission_id, 'is_enabled': True} for permission_id in permission_ids],
+                granted_by=request.user
+            )
         
         return user
 
@@ -291,14 +309,22 @@ class UpdateMemberSerializer(serializers.ModelSerializer):
     """Serializer for updating member details"""
     
     custom_role_name = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    role_template = serializers.PrimaryKeyRelatedField(
+        queryset=RoleTemplate.objects.all(),
+        required=False,
+        allow_null=True
+    )
     
     class Meta:
         model = User
         fields = [
             'first_name', 'last_name', 'phone',
-            'role', 'custom_role_name', 'designation', 'is_active'
+            'role', 'custom_role_name', 'designation', 'role_template', 'is_active'
         ]
     
+    def validate_role_template(self, value):
+        return validate_member_role_template(self.context['request'], value)
+    
     def validate(self, attrs):
         """Validate custom role name"""
         if attrs.get('role') == 'custom':
@@ -348,8 +374,8 @@ class UserDetailSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 'full_name',
-            'phone', 'role', 'custom_role_name', 'designation', 'tenant', 'tenant_details',
-            'is_active', 'email_verified', 'permissions',
+            'phone', 'role', 'custom_role_name', 'designation', 'role_template',
+            'tenant', 'tenant_details', 'is_active', 'email_verified', 'permissions',
             'date_joined', 'last_login', 'created_at', 'updated_at', 'created_by'
         ]
         read_only_fields = ['id', 'date_joined', 'last_login', 'created_at', 'updated_at']
@@ -369,19 +395,59 @@ class UserDetailSerializer(serializers.ModelSerializer):
     
     def get_permissions(self, obj):
         """Get user permissions with enabled status"""
-        role_permissions = obj.role_permissions.select_related('permission').all()
-        return [
-            {
-                'id': str(rp.permission.id),
-                'permission_id': str(rp.id),
-                'category': rp.permission.category,
-                'action': rp.permission.action,
-                'resource': rp.permission.resource,
-                'description': rp.permission.description,
-                'is_enabled': rp.is_enabled
-            }
-            for rp in role_permissions
+        return get_permissions(obj).entries
+
+
+class RoleTemplateSerializer(serializers.ModelSerializer):
+    """Serializer for role templates"""
+    
+    permissions = serializers.PrimaryKeyRelatedField(
+        queryset=Permission.objects.all(),
+        many=True,
+        required=False
+    )
+    permission_details = PermissionSerializer(source='permissions', many=True, read_only=True)
+    
+    class Meta:
+        model = RoleTemplate
+        fields = [
+            'id', 'name', 'role', 'description', 'tenant',
+            'permissions', 'permission_details',
+            'created_at', 'updated_at', 'created_by'
         ]
+        read_only_fields = ['id', 'tenant', 'created_at', 'updated_at', 'created_by']
+        # tenant is read-only, so (tenant, name) uniqueness is checked in validate()
+        validators = []
+    
+    def validate(self, attrs):
+        """
+        Template names are unique within a tenant, and among system templates
+        (tenant None, which the database constraint does not cover)
+        """
+        name = attrs.get('name', self.instance.name if self.instance else None)
+        if self.instance:
+            tenant = self.instance.tenant
+        else:
+            # Set by RoleTemplateViewSet.create(), which assigns it on save
+            tenant = self.context.get('tenant')
+        if tenant is None:
+            duplicates = RoleTemplate.objects.filter(tenant__isnull=True, name=name)
+        else:
+            duplicates = RoleTemplate.objects.filter(tenant=tenant, name=name)
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError({'name': 'A role template with this name already exists'})
+        return attrs
+
+
+class MemberListSerializer(UserDetailSerializer):
+    """Member list rows without permissions (request them with ?include=permissions)"""
+    
+    permissions = None
+    
+    class Meta(UserDetailSerializer.Meta):
+        fields = [field for field in UserDetailSerializer.Meta.fields if field != 'permissions']
 
 
 class UserPermissionUpdateSerializer(serializers.Serializer):
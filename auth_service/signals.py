@@ -0,0 +1,67 @@
+"""
+Signal handlers for auth_service
+Invalidate cached permissions when RolePermission, Permission or
+RoleTemplate permission rows change, and token claims when a user's role,
+tenant, template or active flag changes
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .authentication import auth_state, invalidate_auth
+from .permission_engine import (
+    invalidate_all_permissions, invalidate_template_permissions, invalidate_user_permissions
+)
+
+
+@receiver(post_save, sender='auth_service.RolePermission')
+@receiver(post_delete, sender='auth_service.RolePermission')
+def invalidate_role_permissions(sender, instance, **kwargs):
+    # Bumped again after commit so permissions compiled from the old rows
+    # while the transaction was open are not kept
+    user_id = instance.user_id
+    invalidate_user_permissions(user_id)
+    transaction.on_commit(lambda: invalidate_user_permissions(user_id))
+
+
+@receiver(post_save, sender='auth_service.Permission')
+@receiver(post_delete, sender='auth_service.Permission')
+def invalidate_permission_catalogue(sender, **kwargs):
+    invalidate_all_permissions()
+    transaction.on_commit(invalidate_all_permissions)
+
+
+@receiver(m2m_changed, sender='auth_service.RoleTemplate_permissions')
+def invalidate_role_template(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Changed from the Permission side (permission.role_templates.add(...))
+        invalidate_all_permissions()
+        transaction.on_commit(invalidate_all_permissions)
+        return
+    template_id = instance.pk
+    invalidate_template_permissions(template_id)
+    transaction.on_commit(lambda: invalidate_template_permissions(template_id))
+
+
+@receiver(post_init, sender='auth_service.User')
+def remember_auth_state(sender, instance, **kwargs):
+    instance._auth_state = auth_state(instance)
+
+
+@receiver(post_save, sender='auth_service.User')
+def invalidate_auth_on_change(sender, instance, created, **kwargs):
+    # Tokens carry role, tenant and template; changing them (or deactivating
+    # the user) sends the next request back to the database
+    state = auth_state(instance)
+    if not created and state != instance._auth_state:
+        user_id = instance.pk
+        invalidate_auth(user_id)
+        transaction.on_commit(lambda: invalidate_auth(user_id))
+    instance._auth_state = state
+
+
+@receiver(post_delete, sender='auth_service.User')
+def invalidate_auth_on_delete(sender, instance, **kwargs):
+    invalidate_auth(instance.pk)
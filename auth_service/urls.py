@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, VerifyEmailView, LoginView, LogoutView,
-    CurrentUserView, MemberViewSet, TenantViewSet,
+    CurrentUserView, MemberViewSet, TenantViewSet, RoleTemplateViewSet,
     toggle_permission, resend_verification_email, get_all_permissions
 )
 # Add OTP views
@@ -12,6 +12,7 @@ from .views_otp import login_request_otp, login_verify_otp, set_password
 router = DefaultRouter()
 router.register(r'members', MemberViewSet, basename='member')
 router.register(r'tenants', TenantViewSet, basename='tenant')
+router.register(r'role-templates', RoleTemplateViewSet, basename='role-template')
 
 urlpatterns = [
     # Authentication
@@ -11,17 +11,22 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Q
 import secrets
 
-from .models import Tenant, Permission, RolePermission, LoginHistory
+from .models import Tenant, Permission, RolePermission, RoleTemplate, LoginHistory
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer,
     EmailVerificationSerializer, CreateMemberSerializer,
-    UpdateMemberSerializer, TenantSerializer, UserDetailSerializer,
+    UpdateMemberSerializer, TenantSerializer, UserDetailSerializer, MemberListSerializer,
     RolePermissionSerializer, UserPermissionUpdateSerializer,
-    TenantLogoSerializer, PermissionSerializer
+    TenantLogoSerializer, PermissionSerializer, RoleTemplateSerializer
 )
 from .utils.email_verification import send_verification_email
+from .authentication import add_user_claims
+from .audit import login_audit, record_login
+from .permission_engine import get_permissions, prefetch_permissions, sync_user_permissions
+from shared.pagination import OptionalCursorPagination
 
 User = get_user_model()
 
@@ -38,7 +43,7 @@ def get_client_ip(request):
 
 def get_tokens_for_user(user):
     """Generate JWT tokens for user"""
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -129,24 +134,12 @@ class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     
     def post(self, request):
-        print( "LoginView POST called" )
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        print("serializer.validated_data")
         
         user = serializer.validated_data['user']
-        print(user)
-        # Update last login
-        user.last_login = timezone.now()
-        user.save()
-        
-        # Create login history
-        LoginHistory.objects.create(
-            user=user,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            login_successful=True
-        )
+        # last_login and login history are written in batches (see audit.py)
+        record_login(user, request)
         
         # Generate tokens
         tokens = get_tokens_for_user(user)
@@ -173,6 +166,9 @@ class LogoutView(generics.GenericAPIView):
     
     def post(self, request):
         try:
+            # Write queued logins first so this one can be closed
+            login_audit.flush()
+            
             # Update login history
             last_login = LoginHistory.objects.filter(
                 user=request.user,
@@ -210,7 +206,8 @@ class CurrentUserView(generics.RetrieveAPIView):
     serializer_class = UserDetailSerializer
     
     def get_object(self):
-        return self.request.user
+        # request.user may be built from token claims; render the full row
+        return User.objects.select_related('tenant').get(pk=self.request.user.pk)
 
 
 class MemberViewSet(viewsets.ModelViewSet):
@@ -221,14 +218,23 @@ class MemberViewSet(viewsets.ModelViewSet):
     GET    /api/auth/members/{id}/      - Get member details
     PATCH  /api/auth/members/{id}/      - Update member
     DELETE /api/auth/members/{id}/      - Deactivate member
+    
+    The list omits permissions unless ?include=permissions is given
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    
+    @property
+    def include_permissions(self):
+        return 'permissions' in self.request.query_params.get('include', '').split(',')
     
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateMemberSerializer
         elif self.action in ['update', 'partial_update']:
             return UpdateMemberSerializer
+        elif self.action == 'list' and not self.include_permissions:
+            return MemberListSerializer
         return UserDetailSerializer
     
     def get_queryset(self):
@@ -237,13 +243,30 @@ class MemberViewSet(viewsets.ModelViewSet):
         
         if user.is_master_admin:
             # Master admin can see all users
-            return User.objects.all()
-        elif user.is_tenant_owner and user.tenant:
+            queryset = User.objects.all()
+        elif user.is_tenant_owner and user.tenant_id:
             # Tenant owner can see their members
-            return User.objects.filter(tenant=user.tenant)
+            queryset = User.objects.filter(tenant_id=user.tenant_id)
         else:
             # Regular users can only see themselves
-            return User.objects.filter(id=user.id)
+            queryset = User.objects.filter(id=user.id)
+        
+        # tenant_details is rendered for every member
+        return queryset.select_related('tenant')
+    
+    def list(self, request, *args, **kwargs):
+        """List members; permissions for the whole page are loaded at once"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        members = page if page is not None else list(queryset)
+        
+        if self.include_permissions:
+            prefetch_permissions(members)
+        
+        serializer = self.get_serializer(members, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
     
     def create(self, request, *args, **kwargs):
         """Create new member"""
@@ -317,47 +340,9 @@ class MemberViewSet(viewsets.ModelViewSet):
         
         permissions_data = serializer.validated_data['permissions']
         
-        # Update permissions
-        for perm_data in permissions_data:
-            # permission_id is the RolePermission ID (for existing permissions)
-            # id is the Permission UUID (for new permissions)
-            permission_id = perm_data.get('permission_id')  # RolePermission ID
-            permission_uuid = perm_data.get('id')  # Permission UUID
-            is_enabled = perm_data.get('is_enabled', True)
-            
-            # If permission_id is provided, it's an existing RolePermission
-            if permission_id:
-                try:
-                    role_permission = RolePermission.objects.get(
-                        id=permission_id,
-                        user=user
-                    )
-                    role_permission.is_enabled = is_enabled
-                    role_permission.granted_by = request.user
-                    role_permission.save()
-                    continue
-                except RolePermission.DoesNotExist:
-                    pass
-            
-            # If permission_uuid is provided, it's a Permission UUID (for new permissions)
-            if permission_uuid:
-                try:
-                    permission = Permission.objects.get(id=permission_uuid)
-                    # Check if RolePermission already exists
-                    role_permission, created = RolePermission.objects.get_or_create(
-                        user=user,
-                        permission=permission,
-                        defaults={
-                            'is_enabled': is_enabled,
-                            'granted_by': request.user
-                        }
-                    )
-                    if not created:
-                        role_permission.is_enabled = is_enabled
-                        role_permission.granted_by = request.user
-                        role_permission.save()
-                except Permission.DoesNotExist:
-                    continue
+        # Apply the whole matrix at once: permission_id is a RolePermission ID
+        # (existing permissions), id is a Permission UUID (new permissions)
+        sync_user_permissions(user, permissions_data, granted_by=request.user)
         
         return Response({
             'status': 'success',
@@ -373,14 +358,8 @@ class MemberViewSet(viewsets.ModelViewSet):
         # Get all permissions
         all_permissions = Permission.objects.all().order_by('category', 'resource', 'action')
         
-        # Get user's existing permissions
-        user_permissions = {
-            str(rp.permission.id): {
-                'permission_id': str(rp.id),
-                'is_enabled': rp.is_enabled
-            }
-            for rp in user.role_permissions.select_related('permission').all()
-        }
+        # Get user's existing permissions (own rows and role template)
+        user_permissions = {entry['id']: entry for entry in get_permissions(user).entries}
         
         # Group by category
         grouped = {}
@@ -433,6 +412,85 @@ def get_all_permissions(request):
     })
 
 
+class RoleTemplateViewSet(viewsets.ModelViewSet):
+    """
+    Role Templates (permission sets shared by every member of a role)
+    GET    /api/auth/role-templates/       - List tenant and system templates
+    POST   /api/auth/role-templates/       - Create template
+    GET    /api/auth/role-templates/{id}/  - Get template
+    PATCH  /api/auth/role-templates/{id}/  - Update template
+    DELETE /api/auth/role-templates/{id}/  - Delete template (members keep their own permissions)
+    """
+    serializer_class = RoleTemplateSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Tenant templates plus system templates"""
+        user = self.request.user
+        queryset = RoleTemplate.objects.all()
+        if not user.is_master_admin:
+            queryset = queryset.filter(Q(tenant_id=user.tenant_id) | Q(tenant__isnull=True))
+        return queryset.prefetch_related('permissions')
+    
+    def check_can_manage(self, template=None):
+        """Only member managers may edit templates; system templates are master admin only"""
+        user = self.request.user
+        if not user.can_create_members:
+            return False
+        if template is not None and not user.is_master_admin:
+            return template.tenant_id is not None and template.tenant_id == user.tenant_id
+        return True
+    
+    def forbidden(self):
+        return Response({
+            'status': 'error',
+            'message': 'You do not have permission to manage role templates'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    def create(self, request, *args, **kwargs):
+        """Create template for the requester's tenant (master admins create system templates)"""
+        if not self.check_can_manage():
+            return self.forbidden()
+        # Only master admins create system templates (tenant None)
+        tenant = None if request.user.is_master_admin else request.user.tenant
+        if tenant is None and not request.user.is_master_admin:
+            return self.forbidden()
+        serializer = self.get_serializer(data=request.data)
+        serializer.context['tenant'] = tenant
+        serializer.is_valid(raise_exception=True)
+        template = serializer.save(tenant=tenant, created_by=request.user)
+        return Response({
+            'status': 'success',
+            'message': 'Role template created successfully',
+            'data': RoleTemplateSerializer(template).data
+        }, status=status.HTTP_201_CREATED)
+    
+    def update(self, request, *args, **kwargs):
+        """Update template; members pick up permission changes on their next request"""
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        if not self.check_can_manage(instance):
+            return self.forbidden()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        template = serializer.save()
+        return Response({
+            'status': 'success',
+            'message': 'Role template updated successfully',
+            'data': RoleTemplateSerializer(template).data
+        })
+    
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not self.check_can_manage(instance):
+            return self.forbidden()
+        instance.delete()
+        return Response({
+            'status': 'success',
+            'message': 'Role template deleted successfully'
+        }, status=status.HTTP_200_OK)
+
+
 class TenantViewSet(viewsets.ModelViewSet):
     """
     Tenant Management
@@ -454,8 +512,8 @@ class TenantViewSet(viewsets.ModelViewSet):
         
         if user.is_master_admin:
             return Tenant.objects.all()
-        elif user.is_tenant_owner and user.tenant:
-            return Tenant.objects.filter(id=user.tenant.id)
+        elif user.is_tenant_owner and user.tenant_id:
+            return Tenant.objects.filter(id=user.tenant_id)
         return Tenant.objects.none()
     
     def update(self, request, *args, **kwargs):
@@ -546,7 +604,7 @@ class TenantViewSet(viewsets.ModelViewSet):
         tenant = self.get_object()
         
         # Check if user can update tenant
-        if not request.user.is_master_admin and not (request.user.is_tenant_owner and request.user.tenant == tenant):
+        if not request.user.is_master_admin and not (request.user.is_tenant_owner and request.user.tenant_id == tenant.id):
             return Response({
                 'status': 'error',
                 'message': 'You do not have permission to update this tenant'
@@ -593,11 +651,13 @@ def toggle_permission(request, user_id, permission_id):
         user = User.objects.get(id=user_id)
         permission = Permission.objects.get(id=permission_id)
         
-        # Check if permission mapping exists
+        # Without a row of their own, the member's state comes from their
+        # role template; a new override flips that state
+        current = (permission.category, permission.action, permission.resource) in get_permissions(user)
         role_perm, created = RolePermission.objects.get_or_create(
             user=user,
             permission=permission,
-            defaults={'granted_by': request.user}
+            defaults={'granted_by': request.user, 'is_enabled': not current}
         )
         
         if not created:
@@ -14,7 +14,8 @@ import secrets
 
 from .models import User
 from .serializers import LoginSerializer
-from .views import get_tokens_for_user, get_client_ip, LoginHistory
+from .views import get_tokens_for_user
+from .audit import record_login
 
 
 def generate_otp():
@@ -151,16 +152,10 @@ def login_verify_otp(request):
     user.email_otp = None
     user.email_otp_created_at = None
     user.email_otp_verified = True
-    user.last_login = timezone.now()
-    user.save()
+    user.save(update_fields=['email_otp', 'email_otp_created_at', 'email_otp_verified', 'updated_at'])
     
-    # Create login history
-    LoginHistory.objects.create(
-        user=user,
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        login_successful=True
-    )
+    # last_login and login history are written in batches (see audit.py)
+    record_login(user, request)
     
     # Generate tokens
     tokens = get_tokens_for_user(user)
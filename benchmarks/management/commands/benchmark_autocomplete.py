@@ -0,0 +1,92 @@
+"""
+Management command to benchmark vendor autocomplete against ?search=
+Fills a throwaway database with one tenant's vendors and times typeahead
+queries through GET /api/ims/autocomplete/ and GET /api/ims/vendor-codes/?search=
+Run: BENCHMARK_COMMANDS=True python manage.py benchmark_autocomplete --rows 100000 --queries 200
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from shared.benchmarking import isolated_database, LatencyRecorder, format_summary
+
+WORDS = ['Shree', 'Textiles', 'Fabrics', 'Mills', 'Dyeing', 'Knits', 'Exports', 'Processors',
+         'Ganesh', 'Laxmi', 'Sai', 'Balaji', 'Krishna', 'Apparel', 'Weaving', 'Prints']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark vendor autocomplete against the ?search= list endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Vendors in the tenant')
+        parser.add_argument('--queries', type=int, default=200, help='Typeahead requests per endpoint')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        from auth_service.models import Tenant, User
+        from inventory_management.models import VendorCode
+
+        tenant = Tenant.objects.create(company_name='Benchmark Textiles', company_email='bench@example.com')
+        owner = User.objects.create_user(
+            email='owner@bench.example.com',
+            password='bench-password-123',
+            role='tenant_owner',
+            tenant=tenant
+        )
+
+        rng = random.Random(42)
+        self.stdout.write(f'Inserting {options["rows"]} vendors...')
+        names = []
+        batch = []
+        for number in range(options['rows']):
+            name = f'{" ".join(rng.sample(WORDS, 2))} {number}'
+            names.append(name)
+            batch.append(VendorCode(
+                tenant=tenant,
+                vendor_name=name,
+                address='1 Benchmark Road',
+                gst=f'{number:015d}',
+                bank_name='State Bank of India',
+                account_number=str(10 ** 10 + number),
+                ifsc_code='SBIN0001234',
+                job_work_category='Fabric',
+                contact_person=f'Contact {number}',
+                whatsapp_number='9876543210',
+                email=f'vendor{number}@example.com',
+                payment_terms='30 days'
+            ))
+            if len(batch) == 10000:
+                VendorCode.objects.bulk_create_with_codes(batch, batch_size=1000)
+                batch = []
+        if batch:
+            VendorCode.objects.bulk_create_with_codes(batch, batch_size=1000)
+
+        client = APIClient()
+        client.force_authenticate(user=owner)
+
+        # Typeahead sends every prefix of what the user types
+        typed = []
+        while len(typed) < options['queries']:
+            name = rng.choice(names)
+            typed.extend(name[:length] for length in range(2, min(len(name), 12) + 1))
+        typed = typed[:options['queries']]
+
+        started = time.perf_counter()
+        client.get('/api/ims/autocomplete/', {'kind': 'vendor', 'q': 'warm'})
+        self.stdout.write(f'Index build (first request): {(time.perf_counter() - started) * 1000:.0f}ms')
+
+        for label, path, param in [
+            ('autocomplete', '/api/ims/autocomplete/', 'q'),
+            ('?search=', '/api/ims/vendor-codes/', 'search'),
+        ]:
+            recorder = LatencyRecorder()
+            for query in typed:
+                params = {param: query, 'kind': 'vendor'} if param == 'q' else {param: query}
+                with recorder.measure():
+                    client.get(path, params)
+            self.stdout.write(format_summary(label, recorder.samples))
@@ -0,0 +1,110 @@
+"""
+Management command to benchmark concurrent buyer code creation
+Hammers POST /api/ims/buyer-codes/ from many threads against a throwaway
+database and checks that no duplicate codes are handed out and that latency
+stays flat as the table grows.
+Run: BENCHMARK_COMMANDS=True python manage.py benchmark_code_allocation --threads 16 --requests 25 --rounds 4
+"""
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from shared.benchmarking import isolated_database, LatencyRecorder, format_summary, summarize
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent buyer code allocation through the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent client threads')
+        parser.add_argument('--requests', type=int, default=25, help='Requests per thread per round')
+        parser.add_argument('--rounds', type=int, default=4, help='Rounds to run as the table grows')
+        parser.add_argument('--prefill', type=int, default=5000,
+                            help='Rows bulk-inserted before each round to grow the table')
+        parser.add_argument('--max-slowdown', type=float, default=3.0,
+                            help='Fail if last-round p50 exceeds first-round p50 by this factor')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        from auth_service.models import Tenant, User
+        from inventory_management.models import BuyerCode
+
+        tenant = Tenant.objects.create(company_name='Benchmark Textiles', company_email='bench@example.com')
+        owner = User.objects.create_user(
+            email='owner@bench.example.com',
+            password='bench-password-123',
+            role='tenant_owner',
+            tenant=tenant
+        )
+
+        payload = {
+            'buyer_name': 'Benchmark Buyer',
+            'buyer_address': '1 Benchmark Road',
+            'contact_person': 'Bench Person',
+            'retailer': 'Bench Retail'
+        }
+
+        round_samples = []
+        returned_codes = []
+        failures = []
+        lock = threading.Lock()
+
+        def worker(recorder):
+            client = APIClient()
+            client.force_authenticate(user=owner)
+            try:
+                for _ in range(options['requests']):
+                    with recorder.measure():
+                        response = client.post('/api/ims/buyer-codes/', payload, format='json')
+                    with lock:
+                        if response.status_code == 201:
+                            returned_codes.append(response.data['data']['code'])
+                        else:
+                            failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        for round_number in range(1, options['rounds'] + 1):
+            if options['prefill']:
+                BuyerCode.objects.bulk_create_with_codes(
+                    [BuyerCode(tenant=tenant, **payload) for _ in range(options['prefill'])],
+                    batch_size=1000
+                )
+
+            recorder = LatencyRecorder()
+            threads = [threading.Thread(target=worker, args=(recorder,)) for _ in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            round_samples.append(recorder.samples)
+            rows = BuyerCode.objects.filter(tenant=tenant).count()
+            self.stdout.write(format_summary(f'Round {round_number} ({rows} rows)', recorder.samples))
+
+        duplicates = [code for code, seen in Counter(returned_codes).items() if seen > 1]
+        stored = BuyerCode.objects.filter(tenant=tenant).values_list('code', flat=True)
+        stored_duplicates = [code for code, seen in Counter(stored).items() if seen > 1]
+
+        self.stdout.write(f'Created {len(returned_codes)} codes, {len(failures)} failed requests')
+
+        if failures:
+            raise CommandError(f'{len(failures)} requests failed (status codes: {sorted(set(failures))})')
+        if duplicates or stored_duplicates:
+            raise CommandError(f'Duplicate codes handed out: {sorted(set(duplicates + stored_duplicates))[:10]}')
+
+        first_p50 = summarize(round_samples[0])['p50_ms']
+        last_p50 = summarize(round_samples[-1])['p50_ms']
+        if first_p50 and last_p50 > first_p50 * options['max_slowdown']:
+            raise CommandError(
+                f'Latency grew with table size: p50 {first_p50:.2f}ms -> {last_p50:.2f}ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS('No duplicate codes; latency stayed flat as the table grew.'))
+
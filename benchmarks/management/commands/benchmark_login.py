@@ -0,0 +1,150 @@
+"""
+Management command to benchmark login throughput on the configured database
+Logs many users in through POST /api/auth/login/ from several threads, while
+reader threads list buyer codes, against a throwaway copy of the database
+profile in use (see binder_config/database.py). Every login writes
+last_login and a LoginHistory row, so this measures how well the profile
+handles concurrent writers next to readers.
+
+Compare profiles by running it under each one, for example:
+    DB_PROFILE=sqlite BENCHMARK_COMMANDS=True python manage.py benchmark_login --journal-mode DELETE
+    DB_PROFILE=sqlite BENCHMARK_COMMANDS=True python manage.py benchmark_login
+    DB_PROFILE=postgres DATABASE_URL=postgres://... BENCHMARK_COMMANDS=True python manage.py benchmark_login
+
+Password hashing dominates a real login; --fast-hasher swaps in a cheap
+hasher so the database is what gets measured. --sync-audit writes login
+history during the request (LOGIN_AUDIT_ASYNC = False) for comparison.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from shared.benchmarking import isolated_database, LatencyRecorder, format_summary
+
+
+BENCH_PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent logins (with concurrent readers) on the configured database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent login threads')
+        parser.add_argument('--logins', type=int, default=50, help='Logins per thread')
+        parser.add_argument('--readers', type=int, default=4, help='Threads listing buyer codes meanwhile')
+        parser.add_argument('--journal-mode', help='SQLite journal mode to use (e.g. WAL, DELETE)')
+        parser.add_argument('--fast-hasher', action='store_true',
+                            help='Use a cheap password hasher so database time dominates')
+        parser.add_argument('--sync-audit', action='store_true',
+                            help='Write login history during the request instead of in batches')
+
+    def handle(self, *args, **options):
+        database = connections['default']
+        if options['journal_mode']:
+            if database.vendor != 'sqlite':
+                raise CommandError('--journal-mode only applies to the SQLite profile')
+            database.close()
+            database.settings_dict['OPTIONS']['journal_mode'] = options['journal_mode']
+
+        overrides = {'LOGIN_AUDIT_ASYNC': not options['sync_audit']}
+        if options['fast_hasher']:
+            overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        with isolated_database(), override_settings(**overrides):
+            self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        from auth_service.audit import login_audit
+        from auth_service.models import LoginHistory, Tenant, User
+        from inventory_management.models import BuyerCode
+
+        self.stdout.write(f'Database: {connection.vendor} {self.describe(connection)}')
+
+        tenant = Tenant.objects.create(
+            company_name='Benchmark Textiles', company_email='bench@example.com', user_limit=10000
+        )
+        owner = User.objects.create_user(
+            email='owner@bench.example.com', password=BENCH_PASSWORD, role='tenant_owner', tenant=tenant
+        )
+        users = [
+            User.objects.create_user(
+                email=f'user{number}@bench.example.com', password=BENCH_PASSWORD,
+                role='supervisor', tenant=tenant
+            )
+            for number in range(options['threads'])
+        ]
+        BuyerCode.objects.bulk_create_with_codes([
+            BuyerCode(tenant=tenant, buyer_name=f'Buyer {number}', buyer_address='1 Road',
+                      contact_person='Person', retailer='Retail')
+            for number in range(500)
+        ], batch_size=500)
+
+        logins = LatencyRecorder()
+        reads = LatencyRecorder()
+        statuses = Counter()
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def login_worker(user):
+            client = APIClient()
+            payload = {'email': user.email, 'password': BENCH_PASSWORD}
+            try:
+                for _ in range(options['logins']):
+                    with logins.measure():
+                        response = client.post('/api/auth/login/', payload, format='json')
+                    with lock:
+                        statuses[response.status_code] += 1
+            finally:
+                connection.close()
+
+        def read_worker():
+            client = APIClient()
+            client.force_authenticate(user=owner)
+            try:
+                while not done.is_set():
+                    with reads.measure():
+                        response = client.get('/api/ims/buyer-codes/')
+                    if response.status_code != 200:
+                        with lock:
+                            statuses[f'read {response.status_code}'] += 1
+            finally:
+                connection.close()
+
+        readers = [threading.Thread(target=read_worker) for _ in range(options['readers'])]
+        writers = [threading.Thread(target=login_worker, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        succeeded = statuses.get(200, 0)
+        login_audit.flush()
+        recorded = LoginHistory.objects.count()
+        self.stdout.write(f'Login history rows: {recorded}')
+        if recorded != succeeded:
+            statuses['missing login history'] = succeeded - recorded
+        self.stdout.write(format_summary('Logins', logins.samples))
+        self.stdout.write(format_summary('Reads ', reads.samples))
+        self.stdout.write(f'Throughput: {succeeded / elapsed:.1f} logins/s over {elapsed:.2f}s')
+
+        failures = {status: count for status, count in statuses.items() if status != 200}
+        if failures:
+            raise CommandError(f'Failed requests: {failures}')
+        self.stdout.write(self.style.SUCCESS('All logins and reads succeeded.'))
+
+    @staticmethod
+    def describe(database):
+        if database.vendor == 'sqlite':
+            with database.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                return f"(journal_mode={cursor.fetchone()[0]})"
+        return f"(CONN_MAX_AGE={database.settings_dict['CONN_MAX_AGE']})"
@@ -0,0 +1,81 @@
+"""
+Management command to benchmark vendor search latency
+Fills a throwaway database with one tenant's vendors and times
+GET /api/ims/vendor-codes/?search=... for selective and broad queries.
+Run: BENCHMARK_COMMANDS=True python manage.py benchmark_search --rows 1000000 --queries 50
+"""
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from shared.benchmarking import isolated_database, LatencyRecorder, format_summary
+
+WORDS = ['Shree', 'Textiles', 'Fabrics', 'Mills', 'Dyeing', 'Knits', 'Exports', 'Processors',
+         'Ganesh', 'Laxmi', 'Sai', 'Balaji', 'Krishna', 'Apparel', 'Weaving', 'Prints']
+CATEGORIES = ['Fabric', 'Dyeing', 'Printing', 'Embroidery', 'Stitching', 'Washing']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark vendor full-text search latency through the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Vendors in the tenant')
+        parser.add_argument('--queries', type=int, default=50, help='Requests per query type')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        from auth_service.models import Tenant, User
+        from inventory_management.models import VendorCode
+
+        tenant = Tenant.objects.create(company_name='Benchmark Textiles', company_email='bench@example.com')
+        owner = User.objects.create_user(
+            email='owner@bench.example.com',
+            password='bench-password-123',
+            role='tenant_owner',
+            tenant=tenant
+        )
+
+        rng = random.Random(42)
+        self.stdout.write(f'Inserting {options["rows"]} vendors...')
+        batch = []
+        for number in range(options['rows']):
+            name = ' '.join(rng.sample(WORDS, 3))
+            batch.append(VendorCode(
+                tenant=tenant,
+                vendor_name=f'{name} {number}',
+                address='1 Benchmark Road',
+                gst=f'{number:015d}',
+                bank_name='State Bank of India',
+                account_number=str(10 ** 10 + number),
+                ifsc_code='SBIN0001234',
+                job_work_category=rng.choice(CATEGORIES),
+                contact_person=f'Contact {number}',
+                whatsapp_number='9876543210',
+                email=f'vendor{number}@example.com',
+                payment_terms='30 days'
+            ))
+            if len(batch) == 10000:
+                VendorCode.objects.bulk_create_with_codes(batch, batch_size=1000)
+                batch = []
+        if batch:
+            VendorCode.objects.bulk_create_with_codes(batch, batch_size=1000)
+
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        queries = {
+            'exact name': lambda: f'{" ".join(rng.sample(WORDS, 3))} {rng.randrange(options["rows"])}',
+            'email prefix': lambda: f'vendor{rng.randrange(options["rows"])}',
+            'two prefixes': lambda: f'{rng.choice(WORDS)[:4]} {rng.choice(WORDS)[:3]}',
+            'broad word': lambda: rng.choice(WORDS),
+        }
+        for label, make_query in queries.items():
+            recorder = LatencyRecorder()
+            for _ in range(options['queries']):
+                search = make_query()
+                with recorder.measure():
+                    client.get('/api/ims/vendor-codes/', {'search': search})
+            self.stdout.write(format_summary(label, recorder.samples))
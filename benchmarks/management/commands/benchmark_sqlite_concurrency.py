@@ -0,0 +1,141 @@
+"""
+Management command to benchmark SQLite reader/writer concurrency
+Runs reader threads (buyer code pages) next to writer threads (transactions
+that read a row and then update it, like permission syncs and code
+allocation) on a throwaway SQLite database, once per configuration:
+    rollback journal, DEFERRED transactions (SQLite's defaults)
+    WAL with the tuned PRAGMAs, DEFERRED transactions
+    WAL with the tuned PRAGMAs, writes through immediate_atomic()
+and reports reads/s, writes/s and "database is locked" failures for each.
+Run: BENCHMARK_COMMANDS=True python manage.py benchmark_sqlite_concurrency --seconds 5
+"""
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from shared.benchmarking import isolated_database, LatencyRecorder, format_summary
+from shared.transactions import immediate_atomic
+
+
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+CONFIGURATIONS = [
+    ('rollback journal, deferred', DEFAULT_PRAGMAS, False),
+    ('WAL + pragmas, deferred', None, False),
+    ('WAL + pragmas, immediate', None, True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent SQLite readers and writers under different PRAGMAs and transaction modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader threads')
+        parser.add_argument('--writers', type=int, default=4, help='Writer threads')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each configuration')
+        parser.add_argument('--rows', type=int, default=20000, help='Buyer codes to read from')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark needs the SQLite database profile')
+        configured = dict(connection.settings_dict['OPTIONS'])
+        with isolated_database():
+            self.populate(options)
+            results = []
+            for label, pragmas, immediate in CONFIGURATIONS:
+                options_for_run = dict(configured)
+                if pragmas:
+                    options_for_run.update(pragmas)
+                self.reconnect(options_for_run)
+                results.append((label, self.run_configuration(label, immediate, options)))
+            self.reconnect(configured)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary'))
+        for label, (reads, writes, locked) in results:
+            self.stdout.write(f'{label:<28} {reads:>8.1f} reads/s {writes:>8.1f} writes/s {locked:>5} locked')
+
+    def reconnect(self, sqlite_options):
+        # PRAGMAs are applied when a connection opens. The journal mode can
+        # only change while no other connection is open, so switch it here
+        # before the threads start (each thread closes its own connection)
+        connection.close()
+        connection.settings_dict['OPTIONS'] = sqlite_options
+        connection.ensure_connection()
+
+    def populate(self, options):
+        from auth_service.models import Tenant
+        from inventory_management.models import BuyerCode, CodeSequence
+
+        self.tenant = Tenant.objects.create(company_name='Benchmark Textiles', company_email='bench@example.com')
+        BuyerCode.objects.bulk_create_with_codes([
+            BuyerCode(tenant=self.tenant, buyer_name=f'Buyer {number}', buyer_address='1 Road',
+                      contact_person='Person', retailer='Retail')
+            for number in range(options['rows'])
+        ], batch_size=1000)
+        self.counters = CodeSequence.objects.bulk_create([
+            CodeSequence(kind=f'bench-{number}', tenant=self.tenant, next_value=0)
+            for number in range(options['writers'])
+        ])
+
+    def run_configuration(self, label, immediate, options):
+        from inventory_management.models import BuyerCode, CodeSequence
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+        reads = LatencyRecorder()
+        writes = LatencyRecorder()
+        errors = Counter()
+        lock = threading.Lock()
+        stop = threading.Event()
+        atomic = immediate_atomic if immediate else transaction.atomic
+
+        def reader():
+            try:
+                offset = 0
+                while not stop.is_set():
+                    with reads.measure():
+                        list(BuyerCode.objects.filter(tenant=self.tenant).order_by('code')[offset:offset + 50])
+                    offset = (offset + 50) % options['rows']
+            finally:
+                connection.close()
+
+        def writer(counter_id):
+            try:
+                while not stop.is_set():
+                    try:
+                        with writes.measure():
+                            with atomic():
+                                # Read first, then write: the pattern that needs a lock upgrade
+                                CodeSequence.objects.get(pk=counter_id)
+                                CodeSequence.objects.filter(pk=counter_id).update(next_value=F('next_value') + 1)
+                                CodeSequence.objects.filter(pk=self.counters[0].pk).update(
+                                    next_value=F('next_value') + 1
+                                )
+                    except OperationalError as error:
+                        with lock:
+                            errors[str(error)] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(counter.pk,)) for counter in self.counters]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.stdout.write(f'journal_mode={cursor.fetchone()[0]}')
+        self.stdout.write(format_summary('Reads ', reads.samples))
+        self.stdout.write(format_summary('Writes (incl. failed)', writes.samples))
+        locked = sum(errors.values())
+        for message, count in errors.items():
+            self.stdout.write(self.style.WARNING(f'{count} x {message}'))
+        seconds = options['seconds']
+        return len(reads.samples) / seconds, (len(writes.samples) - locked) / seconds, locked
@@ -0,0 +1,152 @@
+"""
+Management command to check read-replica routing with two SQLite files
+Builds a throwaway primary, copies it to a second file acting as the replica
+and then writes only to the primary, so every check can tell from the data
+and the captured queries which database answered:
+- safe requests read from the replica, streamed exports included
+- a write pins the client (cookie) and the user (shared cache) to the primary
+- reads go back to the replica once the pin is gone
+- a lagging or unreachable replica falls back to the primary
+- on_replica() tags a queryset, and reads inside a transaction stay on the primary
+Run: DB_REPLICA_NAME=replica.sqlite3 BENCHMARK_COMMANDS=True python manage.py check_replica_routing
+"""
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from shared import db_routing
+from shared.benchmarking import isolated_database
+
+
+class Command(BaseCommand):
+    help = 'Check that reads are routed to the replica and writes pin clients to the primary'
+
+    def handle(self, *args, **options):
+        if not db_routing.replica_configured():
+            raise CommandError('No replica configured; set DB_REPLICA_NAME (SQLite) or DATABASE_REPLICA_URL')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This check copies SQLite files; run it with the SQLite profile')
+        with isolated_database():
+            failures = self.run_checks()
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('\nCompleted! Replica routing behaves as expected'))
+
+    def replicate(self):
+        """Copy the primary into a separate file and point the replica alias at it"""
+        primary = connections['default']
+        path = os.path.join(tempfile.mkdtemp(prefix='binder-replica-'), 'replica.sqlite3')
+        primary.ensure_connection()
+        with sqlite3.connect(path) as target:
+            primary.connection.backup(target)
+        self.point_replica(path)
+
+    def point_replica(self, path):
+        replica = connections[db_routing.REPLICA_ALIAS]
+        replica.close()
+        # The test setup mirrors the replica onto the primary's settings dict
+        replica.settings_dict = {**replica.settings_dict, 'NAME': path}
+        db_routing.replica_health.reset()
+
+    def request(self, client, method, path, data=None):
+        """Run a request; return (response, primary queries, replica queries)"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[db_routing.REPLICA_ALIAS]) as replica:
+            response = getattr(client, method)(path, data, format='json')
+        return response, len(primary), len(replica)
+
+    def run_checks(self):
+        from auth_service.models import Tenant, User
+        from inventory_management.models import Department
+
+        cache.clear()
+        tenant = Tenant.objects.create(company_name='Replica Check Textiles', company_email='replica@example.com')
+        owner = User.objects.create_user(
+            email='owner@replica.example.com', password='replica-password-123',
+            role='tenant_owner', tenant=tenant
+        )
+        Department.objects.create(code='replicated', name='Replicated', tenant=tenant)
+        self.replicate()
+
+        failures = []
+
+        def check(label, condition, detail=''):
+            self.stdout.write(f"{'ok  ' if condition else 'FAIL'} {label} {detail}")
+            if not condition:
+                failures.append(f'{label} {detail}')
+
+        def codes(response):
+            data = response.data.get('data', response.data)
+            results = data.get('results', data) if isinstance(data, dict) else data
+            return {row['code'] for row in results}
+
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        listing = '/api/ims/departments/'
+
+        response, primary, replica = self.request(client, 'get', listing)
+        check('GET reads from the replica', response.status_code == 200 and replica and not primary,
+              f'(primary={primary}, replica={replica})')
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[db_routing.REPLICA_ALIAS]) as replica:
+            response = client.get('/api/ims/buyer-codes/master-sheet/', {'format': 'ndjson'})
+            b''.join(response.streaming_content)
+        check('streamed exports read from the replica', response.status_code == 200 and replica and not primary,
+              f'(primary={len(primary)}, replica={len(replica)})')
+
+        response, primary, replica = self.request(
+            client, 'post', listing, {'code': 'written', 'name': 'Written'}
+        )
+        check('POST writes to the primary', response.status_code == 201 and primary and not replica,
+              f'(status={response.status_code}, primary={primary}, replica={replica})')
+        check('POST sets the pin cookie', db_routing.PIN_COOKIE in response.cookies)
+
+        response, primary, replica = self.request(client, 'get', listing)
+        check('pinned client reads its write from the primary',
+              'written' in codes(response) and primary and not replica,
+              f'(primary={primary}, replica={replica})')
+
+        other_client = APIClient()
+        other_client.force_authenticate(user=owner)
+        response, primary, replica = self.request(other_client, 'get', listing)
+        check('pinned user reads from the primary without the cookie', primary and not replica,
+              f'(primary={primary}, replica={replica})')
+
+        cache.clear()
+        response, primary, replica = self.request(other_client, 'get', listing)
+        check('reads return to the replica after the pin',
+              'written' not in codes(response) and replica and not primary,
+              f'(primary={primary}, replica={replica})')
+
+        with mock.patch.object(db_routing, 'measure_lag', return_value=600):
+            db_routing.replica_health.reset()
+            response, primary, replica = self.request(other_client, 'get', listing)
+        check('lagging replica falls back to the primary', primary and not replica,
+              f'(primary={primary}, replica={replica})')
+
+        replica_path = connections[db_routing.REPLICA_ALIAS].settings_dict['NAME']
+        self.point_replica(os.path.join(tempfile.gettempdir(), 'missing-dir', 'replica.sqlite3'))
+        # Capturing would open the replica connection, so only count the primary
+        with CaptureQueriesContext(connections['default']) as captured:
+            response = other_client.get(listing)
+        primary = len(captured)
+        check('unreachable replica falls back to the primary', response.status_code == 200 and primary,
+              f'(status={response.status_code}, primary={primary})')
+        self.point_replica(replica_path)
+
+        check('on_replica() reads from the replica',
+              not db_routing.on_replica(Department.objects.filter(code='written')).exists())
+        check('untagged reads outside requests use the primary',
+              Department.objects.filter(code='written').exists())
+        with transaction.atomic(), db_routing.use_replica():
+            check('reads inside a transaction stay on the primary',
+                  Department.objects.filter(code='written').exists())
+        return failures
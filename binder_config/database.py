@@ -0,0 +1,105 @@
+"""
+Database profiles
+DB_PROFILE selects how DATABASES is built:
+- postgres:  DATABASE_URL, or DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT.
+             Connections persist for DB_CONN_MAX_AGE seconds and are checked
+             before reuse. With DB_POOLER=pgbouncer (transaction pooling)
+             server-side cursors are disabled, since a cursor cannot outlive
+             the transaction on a pooled server connection. SSL is
+             required (sslmode=require) unless DB_SSL_REQUIRE=False.
+- sqlite:    the bundled file (DB_NAME, default db.sqlite3) in WAL mode with
+             tuned PRAGMAs, for single-node deployments and local development.
+Without DB_PROFILE, postgres is used when DATABASE_URL or DB_HOST is set
+(Render provides DATABASE_URL) and sqlite otherwise.
+
+A read replica is added as the 'replica' alias from DATABASE_REPLICA_URL
+(postgres) or DB_REPLICA_NAME (sqlite, a second file standing in for one);
+shared/db_routing.py decides which reads go to it.
+
+Pooling inside the process (psycopg_pool) needs Django 5.1 and psycopg 3;
+on this stack persistent connections plus PgBouncer fill that role.
+"""
+import os
+
+import dj_database_url
+
+
+PROFILES = ('postgres', 'sqlite')
+
+
+def selected_profile():
+    profile = os.getenv('DB_PROFILE', '').lower()
+    if profile in ('postgresql', 'postgres'):
+        return 'postgres'
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"DB_PROFILE must be one of {', '.join(PROFILES)}, not '{profile}'")
+        return profile
+    if os.getenv('DATABASE_URL') or os.getenv('DB_HOST', '').strip():
+        return 'postgres'
+    return 'sqlite'
+
+
+def postgres_database(database_url=None):
+    conn_max_age = int(os.getenv('DB_CONN_MAX_AGE', 600))
+    # Only an explicit DB_SSL_REQUIRE=False (e.g. a local server) turns SSL off
+    ssl_require = os.getenv('DB_SSL_REQUIRE', 'True') != 'False'
+    if database_url:
+        database = dj_database_url.parse(
+            database_url,
+            conn_max_age=conn_max_age,
+            conn_health_checks=True,
+            ssl_require=ssl_require
+        )
+    else:
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'binder_db'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', 'password'),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    options = database.setdefault('OPTIONS', {})
+    if ssl_require:
+        options.setdefault('sslmode', 'require')
+    options.setdefault('connect_timeout', int(os.getenv('DB_CONNECT_TIMEOUT', 5)))
+    if os.getenv('DB_POOLER', '').lower() == 'pgbouncer':
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return database
+
+
+def sqlite_database(base_dir, name):
+    return {
+        'ENGINE': 'shared.db_backends.sqlite3',
+        'NAME': base_dir / name,
+        # PRAGMAs applied on every connection (see shared/db_backends/sqlite3)
+        'OPTIONS': {
+            'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+            'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -65536)),
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 268435456)),
+            'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'DEFERRED'),
+        },
+    }
+
+
+def database_config(base_dir):
+    """DATABASES for the selected profile"""
+    profile = selected_profile()
+    if profile == 'postgres':
+        databases = {'default': postgres_database(os.getenv('DATABASE_URL'))}
+        replica_url = os.getenv('DATABASE_REPLICA_URL')
+        if replica_url:
+            databases['replica'] = postgres_database(replica_url)
+            databases['replica']['TEST'] = {'MIRROR': 'default'}
+    else:
+        databases = {'default': sqlite_database(base_dir, os.getenv('DB_NAME', 'db.sqlite3'))}
+        replica_name = os.getenv('DB_REPLICA_NAME')
+        if replica_name:
+            databases['replica'] = sqlite_database(base_dir, replica_name)
+            databases['replica']['TEST'] = {'MIRROR': 'default'}
+    return databases
@@ -59,6 +59,12 @@ INSTALLED_APPS = [
     'load_balancer',             # Pillar 4: Health & Monitoring
 ]
 
+# Benchmark and check commands (benchmark_*, check_replica_routing) are
+# development tools, kept out of production's command namespace
+BENCHMARK_COMMANDS = os.getenv('BENCHMARK_COMMANDS', 'False') == 'True'
+if BENCHMARK_COMMANDS:
+    INSTALLED_APPS.append('benchmarks')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files
@@ -69,6 +75,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'shared.db_routing.ReplicaRoutingMiddleware',
+    'shared.google_sheets.SheetsApiCallsMiddleware',
 ]
 
 ROOT_URLCONF = 'binder_config.urls'
@@ -95,57 +103,17 @@ WSGI_APPLICATION = 'binder_config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-import dj_database_url
-
-# Database selection strategy:
-# 1) If DATABASE_URL is set (Render/production), use it.
-# 2) Else if DB_ENGINE=postgres or DB_HOST is set, use Postgres with provided env vars.
-# 3) Else default to SQLite for local development (zero-setup).
-database_url = os.getenv('DATABASE_URL',default=None)
-db_engine_env = os.getenv('DB_ENGINE', '').lower()
-db_host_env = os.getenv('DB_HOST', '').strip()
-
-# if database_url:
-#     DATABASES = {
-#         'default': dj_database_url.config(
-#             default=database_url,
-#             conn_max_age=600,
-#             conn_health_checks=True,
-#         )
-#     }
-# elif db_engine_env == 'postgresql':
-#     DATABASES = {
-#     'default': dj_database_url.config(
-#         default=os.getenv('DATABASE_URL'),
-#         conn_max_age=600,
-#         ssl_require=True
-#     )
-# }
-# elif db_engine_env == 'postgres' or db_host_env:
-#     DATABASES = {
-#         'default': {
-#             'ENGINE': 'django.db.backends.postgresql',
-#             'NAME': os.getenv('DB_NAME', 'binder_db'),
-#             'USER': os.getenv('DB_USER', 'postgres'),
-#             'PASSWORD': os.getenv('DB_PASSWORD', 'password'),
-#             'HOST': os.getenv('DB_HOST', 'localhost'),
-#             'PORT': os.getenv('DB_PORT', '5432'),
-#         }
-#     }
-# else:
-#     DATABASES = {
-#         'default': {
-#             'ENGINE': 'django.db.backends.sqlite3',
-#             'NAME': BASE_DIR / os.getenv('DB_NAME', 'db.sqlite3'),
-#         }
-#     }
-
-DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / os.getenv('DB_NAME', 'db.sqlite3'),
-        }
-    }
+# Profiles (Postgres with persistent connections, SQLite in WAL mode) are
+# built in binder_config/database.py; DB_PROFILE selects one
+from .database import database_config
+
+DATABASES = database_config(BASE_DIR)
+
+# Safe requests read from the 'replica' alias when one is configured
+DATABASE_ROUTERS = ['shared.db_routing.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', 5))
 
 
 # Password validation
@@ -208,7 +176,7 @@ USERNAME_FIELD = 'email'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_service.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -237,7 +205,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('JWT_REFRESH_TOKEN_LIFETIME', 1440))),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written by the login audit pipeline (auth_service/audit.py)
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -247,6 +216,8 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    # Refreshed access tokens carry current role/tenant claims
+    'TOKEN_REFRESH_SERIALIZER': 'auth_service.authentication.ClaimsTokenRefreshSerializer',
 }
 
 
@@ -298,6 +269,27 @@ GOOGLE_SHEETS_CREDENTIALS_FILE = os.getenv(
     BASE_DIR / 'credentials.json'
 )
 GOOGLE_SHEETS_SPREADSHEET_ID = os.getenv('GOOGLE_SHEETS_SPREADSHEET_ID', '')
+# Sheet records are cached per worker for TTL seconds, then served stale for
+# up to STALE more seconds while they are refetched in the background
+GOOGLE_SHEETS_CACHE_TTL = int(os.getenv('GOOGLE_SHEETS_CACHE_TTL', 60))
+GOOGLE_SHEETS_CACHE_STALE = int(os.getenv('GOOGLE_SHEETS_CACHE_STALE', 300))
+GOOGLE_SHEETS_CACHE_MAX_ENTRIES = int(os.getenv('GOOGLE_SHEETS_CACHE_MAX_ENTRIES', 32))
+# Added rows are queued and appended per worksheet in batches (False: write
+# during the request); quota errors are retried with exponential backoff
+GOOGLE_SHEETS_WRITE_BEHIND = os.getenv('GOOGLE_SHEETS_WRITE_BEHIND', 'True') == 'True'
+GOOGLE_SHEETS_WRITE_BATCH_SIZE = int(os.getenv('GOOGLE_SHEETS_WRITE_BATCH_SIZE', 200))
+GOOGLE_SHEETS_WRITE_INTERVAL = float(os.getenv('GOOGLE_SHEETS_WRITE_INTERVAL', 2.0))
+GOOGLE_SHEETS_WRITE_QUEUE_SIZE = int(os.getenv('GOOGLE_SHEETS_WRITE_QUEUE_SIZE', 5000))
+GOOGLE_SHEETS_WRITE_ATTEMPTS = int(os.getenv('GOOGLE_SHEETS_WRITE_ATTEMPTS', 5))
+# Seconds opened spreadsheet/worksheet handles are reused (0 reopens them
+# for every call), and keep-alive connections kept to the Sheets API
+GOOGLE_SHEETS_HANDLE_TTL = int(os.getenv('GOOGLE_SHEETS_HANDLE_TTL', 600))
+GOOGLE_SHEETS_HTTP_POOL_SIZE = int(os.getenv('GOOGLE_SHEETS_HTTP_POOL_SIZE', 10))
+# The MasterSheet is served from a local columnar snapshot; one older than
+# MAX_AGE seconds is refreshed in the background (snapshot_sheets refreshes
+# it on a schedule)
+GOOGLE_SHEETS_SNAPSHOT_DIR = os.getenv('GOOGLE_SHEETS_SNAPSHOT_DIR', BASE_DIR / 'snapshots')
+GOOGLE_SHEETS_SNAPSHOT_MAX_AGE = int(os.getenv('GOOGLE_SHEETS_SNAPSHOT_MAX_AGE', 900))
 
 
 # Celery Configuration (for future async tasks)
@@ -310,11 +302,44 @@ GOOGLE_SHEETS_SPREADSHEET_ID = os.getenv('GOOGLE_SHEETS_SPREADSHEET_ID', '')
 
 
 # Cache Configuration
-CACHES = {
-    'default': {
+# 'default' is two-tier: a small per-process LRU (L1) in front of the 'shared'
+# cache (L2) that every worker reads and writes. CACHE_BACKEND picks L2:
+# sqlite (default, a file on this host), file, redis (needs REDIS_URL and the
+# redis package) or locmem (per process, for single-worker development).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite').lower()
+SHARED_CACHE_BACKENDS = {
+    'sqlite': {
+        'BACKEND': 'shared.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3')),
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/1'),
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'shared.cache_backends.TieredCache',
+        'OPTIONS': {
+            'L2_CACHE': 'shared',
+            'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+            # Longest a worker may serve an entry another worker has replaced;
+            # versioned keys (shared/cache.py) are never held in L1
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 5)),
+        },
+    },
+    'shared': {
+        **SHARED_CACHE_BACKENDS[CACHE_BACKEND],
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000))},
+    },
 }
 
 
@@ -364,6 +389,27 @@ os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 # Application-specific Settings
 TENANT_USER_LIMIT_DEFAULT = int(os.getenv('TENANT_USER_LIMIT_DEFAULT', 40))
 SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 3600))
+# Authenticate API requests from JWT claims while the user's auth version is current
+JWT_CLAIMS_AUTH = os.getenv('JWT_CLAIMS_AUTH', 'True') == 'True'
+
+# Login history and last_login are queued and written in batches by a
+# background thread; False writes them during the login request
+LOGIN_AUDIT_ASYNC = os.getenv('LOGIN_AUDIT_ASYNC', 'True') == 'True'
+LOGIN_AUDIT_BATCH_SIZE = int(os.getenv('LOGIN_AUDIT_BATCH_SIZE', 500))
+LOGIN_AUDIT_INTERVAL = float(os.getenv('LOGIN_AUDIT_INTERVAL', 1.0))
+LOGIN_AUDIT_QUEUE_SIZE = int(os.getenv('LOGIN_AUDIT_QUEUE_SIZE', 10000))
+
+# Buyer/vendor codes reserved per database round trip by each worker.
+# 1 keeps codes strictly gap-free; larger blocks trade gaps for throughput.
+CODE_SEQUENCE_BLOCK_SIZE = int(os.getenv('CODE_SEQUENCE_BLOCK_SIZE', 1))
+
+# Maximum rows accepted by the buyer/vendor code bulk create endpoints
+CODE_BULK_CREATE_MAX_ROWS = int(os.getenv('CODE_BULK_CREATE_MAX_ROWS', 5000))
+
+# Buyer/vendor autocomplete: in-memory index terms kept per worker before the
+# least recently used tenants are evicted, and seconds before an index is rebuilt
+AUTOCOMPLETE_MAX_ENTRIES = int(os.getenv('AUTOCOMPLETE_MAX_ENTRIES', 500000))
+AUTOCOMPLETE_TTL = int(os.getenv('AUTOCOMPLETE_TTL', 300))
 
 
 # Security Settings for Production
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import Department, Segment, BuyerCode, VendorCode
+from .models import Department, Segment, BuyerCode, VendorCode, CodeSequence, VendorImportJob, SheetSyncState
 
 
 @admin.register(Department)
@@ -159,3 +159,65 @@ class VendorCodeAdmin(ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Allow deletion"""
         return True
+
+
+@admin.register(CodeSequence)
+class CodeSequenceAdmin(ModelAdmin):
+    """Admin interface for CodeSequence model (read-only counters)"""
+    
+    list_display = ['kind', 'tenant', 'next_value', 'updated_at']
+    list_filter = ['kind', 'tenant']
+    ordering = ['tenant', 'kind']
+    readonly_fields = ['id', 'kind', 'tenant', 'next_value', 'created_at', 'updated_at']
+    
+    def get_queryset(self, request):
+        """Optimize queryset"""
+        qs = super().get_queryset(request)
+        return qs.select_related('tenant')
+    
+    def has_add_permission(self, request):
+        """Sequences are created on first code allocation"""
+        return False
+
+
+@admin.register(VendorImportJob)
+class VendorImportJobAdmin(ModelAdmin):
+    """Admin interface for VendorImportJob model (read-only history)"""
+    
+    list_display = ['file_name', 'tenant', 'status', 'processed_rows', 'created_count',
+                    'duplicate_count', 'error_count', 'created_at']
+    list_filter = ['status', 'tenant']
+    ordering = ['-created_at']
+    readonly_fields = ['id', 'file_name', 'tenant', 'status', 'message', 'total_rows',
+                       'processed_rows', 'created_count', 'duplicate_count', 'error_count',
+                       'errors', 'created_by', 'created_at', 'started_at', 'finished_at']
+    
+    def get_queryset(self, request):
+        """Optimize queryset"""
+        qs = super().get_queryset(request)
+        return qs.select_related('tenant', 'created_by')
+    
+    def has_add_permission(self, request):
+        """Jobs are created by uploads and the import_vendors command"""
+        return False
+
+
+@admin.register(SheetSyncState)
+class SheetSyncStateAdmin(ModelAdmin):
+    """Admin interface for SheetSyncState model (read-only sync progress)"""
+    
+    list_display = ['sheet_name', 'tenant', 'spreadsheet_id', 'row_count', 'db_cursor', 'last_synced_at']
+    list_filter = ['sheet_name', 'tenant']
+    ordering = ['tenant', 'sheet_name']
+    readonly_fields = ['id', 'spreadsheet_id', 'sheet_name', 'tenant', 'db_cursor', 'sheet_modified_at',
+                       'header', 'row_count', 'last_synced_at']
+    exclude = ['rows']
+    
+    def get_queryset(self, request):
+        """Optimize queryset"""
+        qs = super().get_queryset(request)
+        return qs.select_related('tenant')
+    
+    def has_add_permission(self, request):
+        """States are created by the sync_sheets command"""
+        return False
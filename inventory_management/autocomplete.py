@@ -0,0 +1,277 @@
+"""
+In-process prefix index for buyer/vendor typeahead
+Serves GET /api/ims/autocomplete/ from memory instead of querying the database
+
+Each (kind, tenant scope) gets a sorted list of (term, id) pairs covering names,
+each word of the name, codes and GST numbers; a lookup is a bisect to the
+first term >= the query followed by a short forward scan. Indexes are built
+on first use, kept current from post_save/post_delete (see signals.py), and
+evicted least-recently-used once AUTOCOMPLETE_MAX_ENTRIES terms are held.
+
+Signals only reach the worker that made the change, so every index is also
+rebuilt after AUTOCOMPLETE_TTL seconds to pick up writes from other workers.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+
+# kind -> model, label field, extra indexed fields
+KINDS = {
+    'buyer': {
+        'model': 'inventory_management.BuyerCode',
+        'name': 'buyer_name',
+        'fields': ('code',),
+    },
+    'vendor': {
+        'model': 'inventory_management.VendorCode',
+        'name': 'vendor_name',
+        'fields': ('code', 'gst'),
+    },
+}
+
+# Key used for master admins, who see every tenant's codes; users without a
+# tenant use the key None, which holds shared rows (tenant NULL) only
+ALL_TENANTS = '*'
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Bulk inserts larger than this invalidate the index instead of updating it
+BULK_INSERT_LIMIT = 100
+
+
+def model_kind(model):
+    """Return the kind for a model class, or None"""
+    label = model._meta.label
+    for kind, config in KINDS.items():
+        if config['model'] == label:
+            return kind
+    return None
+
+
+class PrefixIndex:
+    """Sorted (term, id) pairs plus the display record for each id"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.config = KINDS[kind]
+        self.terms = []
+        self.records = {}
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def record_terms(self, record):
+        """Lowercase terms a record can be found by"""
+        terms = set()
+        name = (record['name'] or '').lower().strip()
+        if name:
+            terms.add(name)
+            terms.update(word for word in name.split()[1:] if word)
+        for field in self.config['fields']:
+            value = (record.get(field) or '').lower().strip()
+            if value:
+                terms.add(value)
+        return terms
+
+    def load(self, rows):
+        """Bulk-load records (dicts with id, name and the indexed fields)"""
+        pairs = []
+        for record in rows:
+            self.records[record['id']] = record
+            pairs.extend((term, record['id']) for term in self.record_terms(record))
+        pairs.sort()
+        self.terms = pairs
+
+    def add(self, record):
+        with self.lock:
+            self._remove(record['id'])
+            self.records[record['id']] = record
+            for term in self.record_terms(record):
+                insort(self.terms, (term, record['id']))
+
+    def remove(self, record_id):
+        with self.lock:
+            self._remove(record_id)
+
+    def _remove(self, record_id):
+        record = self.records.pop(record_id, None)
+        if record is None:
+            return
+        for term in self.record_terms(record):
+            position = bisect_left(self.terms, (term, record_id))
+            if position < len(self.terms) and self.terms[position] == (term, record_id):
+                del self.terms[position]
+
+    def lookup(self, query, limit=DEFAULT_LIMIT):
+        """Records with a term starting with query, in term order"""
+        query = query.lower().strip()
+        if not query:
+            return []
+        results = []
+        seen = set()
+        with self.lock:
+            position = bisect_left(self.terms, (query,))
+            while position < len(self.terms) and len(results) < limit:
+                term, record_id = self.terms[position]
+                if not term.startswith(query):
+                    break
+                if record_id not in seen:
+                    seen.add(record_id)
+                    results.append(self.records[record_id])
+                position += 1
+        return results
+
+
+class AutocompleteRegistry:
+    """LRU of PrefixIndex objects keyed by (kind, tenant id or ALL_TENANTS)"""
+
+    def __init__(self):
+        self.indexes = OrderedDict()
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AUTOCOMPLETE_MAX_ENTRIES', 500000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTOCOMPLETE_TTL', 300)
+
+    @staticmethod
+    def scope_key(scope):
+        return ALL_TENANTS if scope.unrestricted else scope.tenant_id
+
+    def get(self, kind, scope):
+        """Return the index for (kind, TenantScope), building it if needed"""
+        key = (kind, self.scope_key(scope))
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is not None:
+                self.indexes.move_to_end(key)
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+
+        if index is not None:
+            if time.monotonic() - index.built_at >= self.ttl and build_lock.acquire(blocking=False):
+                # Serve the stale index while a fresh one is built
+                threading.Thread(
+                    target=self.rebuild, args=(key, kind, scope, build_lock), daemon=True
+                ).start()
+            return index
+
+        # One thread builds while others for the same key wait
+        with build_lock:
+            with self.lock:
+                index = self.indexes.get(key)
+            if index is None:
+                index = self.build(kind, scope)
+                self.store(key, index)
+            return index
+
+    def rebuild(self, key, kind, scope, build_lock):
+        try:
+            self.store(key, self.build(kind, scope))
+        finally:
+            build_lock.release()
+            connection.close()
+
+    def store(self, key, index):
+        with self.lock:
+            self.indexes[key] = index
+            self.indexes.move_to_end(key)
+            self.evict()
+
+    def build(self, kind, scope):
+        config = KINDS[kind]
+        model = apps.get_model(config['model'])
+        if scope.unrestricted:
+            queryset = model.objects.all()
+        else:
+            # Same rows as the scoped list endpoints (a tenant of None: shared rows)
+            queryset = model.objects.for_tenant(scope.tenant_id)
+        columns = ('id', config['name']) + config['fields']
+        index = PrefixIndex(kind)
+        index.load(
+            self.to_record(kind, dict(zip(columns, row)))
+            for row in queryset.order_by().values_list(*columns).iterator(chunk_size=5000)
+        )
+        return index
+
+    def evict(self):
+        """Drop least recently used indexes until under the entry budget"""
+        total = sum(len(index) for index in self.indexes.values())
+        while total > self.max_entries and len(self.indexes) > 1:
+            _, index = self.indexes.popitem(last=False)
+            total -= len(index)
+
+    @staticmethod
+    def to_record(kind, values):
+        config = KINDS[kind]
+        record = {
+            'id': str(values['id']),
+            'name': values[config['name']],
+        }
+        for field in config['fields']:
+            record[field] = values[field]
+        return record
+
+    def loaded(self, kind, tenant_id):
+        """Indexes currently holding rows of this tenant"""
+        with self.lock:
+            return [
+                index for key, index in self.indexes.items()
+                if key[0] == kind and key[1] in (tenant_id, ALL_TENANTS)
+            ]
+
+    def record_for(self, instance):
+        """Display record for a saved BuyerCode/VendorCode"""
+        kind = model_kind(type(instance))
+        config = KINDS[kind]
+        values = {field: getattr(instance, field) for field in (config['name'],) + config['fields']}
+        values['id'] = instance.pk
+        return self.to_record(kind, values)
+
+    def add(self, kind, tenant_id, record):
+        for index in self.loaded(kind, tenant_id):
+            index.add(record)
+
+    def add_many(self, kind, records):
+        """
+        Add (tenant_id, record) pairs; large batches drop the affected
+        indexes instead, since one rebuild beats thousands of list inserts
+        """
+        if len(records) <= BULK_INSERT_LIMIT:
+            for tenant_id, record in records:
+                self.add(kind, tenant_id, record)
+            return
+        tenant_ids = {tenant_id for tenant_id, _ in records}
+        with self.lock:
+            for key in list(self.indexes):
+                if key[0] == kind and (key[1] == ALL_TENANTS or key[1] in tenant_ids):
+                    del self.indexes[key]
+
+    def remove(self, kind, tenant_id, record_id):
+        for index in self.loaded(kind, tenant_id):
+            index.remove(record_id)
+
+    def clear(self):
+        with self.lock:
+            self.indexes.clear()
+
+
+registry = AutocompleteRegistry()
+
+
+def autocomplete(kind, query, scope, limit=DEFAULT_LIMIT):
+    """Return up to `limit` records of `kind` visible in scope (a TenantScope) matching the query prefix"""
+    limit = max(1, min(limit, MAX_LIMIT))
+    return registry.get(kind, scope).lookup(query, limit)
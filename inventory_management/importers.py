@@ -0,0 +1,279 @@
+"""
+Vendor master data import pipeline
+Streams CSV/XLSX spreadsheets into VendorCode rows in constant memory
+
+Rows are read lazily from the file, validated in chunks with the same field
+validators as the vendor create API, de-duplicated on GST and email against
+an in-memory index of the tenant's existing vendors, and inserted chunk by
+chunk with bulk_create. Progress is written to a VendorImportJob after every
+chunk.
+"""
+import codecs
+import csv
+import logging
+import os
+import re
+import threading
+from itertools import islice
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import VendorCode, VendorImportJob
+from .serializers import VendorCodeCreateSerializer, BULK_CREATE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+# Rows validated and inserted per transaction
+DEFAULT_CHUNK_SIZE = 1000
+
+# Rejected rows kept on the job for display (all rejections are counted)
+MAX_RECORDED_ERRORS = 200
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+# Spreadsheet header (normalised: lowercase, letters/digits only) -> model field
+COLUMN_ALIASES = {
+    'vendorname': 'vendor_name',
+    'name': 'vendor_name',
+    'address': 'address',
+    'gst': 'gst',
+    'gstno': 'gst',
+    'gstnumber': 'gst',
+    'gstin': 'gst',
+    'bankname': 'bank_name',
+    'bank': 'bank_name',
+    'accountnumber': 'account_number',
+    'accountno': 'account_number',
+    'accno': 'account_number',
+    'ifsccode': 'ifsc_code',
+    'ifsc': 'ifsc_code',
+    'jobworkcategory': 'job_work_category',
+    'jobworksubcategory': 'job_work_sub_category',
+    'contactperson': 'contact_person',
+    'whatsappnumber': 'whatsapp_number',
+    'whatsappno': 'whatsapp_number',
+    'altwhatsappnumber': 'alt_whatsapp_number',
+    'altwhatsappno': 'alt_whatsapp_number',
+    'email': 'email',
+    'emailid': 'email',
+    'paymentterms': 'payment_terms',
+}
+
+_header_pattern = re.compile(r'[^a-z0-9]')
+
+
+def normalise_header(header):
+    """'Job Work Sub-Category' -> 'jobworksubcategory'"""
+    return _header_pattern.sub('', str(header or '').lower())
+
+
+def map_headers(headers):
+    """Return the model field for each spreadsheet column (None if unknown)"""
+    return [COLUMN_ALIASES.get(normalise_header(header)) for header in headers]
+
+
+def _row_to_dict(fields, values):
+    """Build a {field: value} dict from one spreadsheet row"""
+    row = {}
+    for field, value in zip(fields, values):
+        if field is None or value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            # Spreadsheet apps store phone/account numbers as floats
+            value = int(value)
+        row[field] = value.strip() if isinstance(value, str) else str(value)
+    return row
+
+
+def iter_csv_rows(path):
+    """Yield vendor dicts from a CSV file, one row at a time"""
+    with open(path, 'rb') as raw:
+        reader = csv.reader(codecs.iterdecode(raw, 'utf-8-sig'))
+        fields = map_headers(next(reader, []))
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield _row_to_dict(fields, values)
+
+
+def iter_xlsx_rows(path):
+    """Yield vendor dicts from the first sheet of an XLSX file, one row at a time"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('XLSX import requires openpyxl (pip install openpyxl)')
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        fields = map_headers(next(rows, ()))
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield _row_to_dict(fields, values)
+    finally:
+        workbook.close()
+
+
+def iter_vendor_rows(path):
+    """Yield vendor dicts from a CSV or XLSX file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return iter_csv_rows(path)
+    if extension == '.xlsx':
+        return iter_xlsx_rows(path)
+    raise ValueError(f'Unsupported file type "{extension}". Upload a .csv or .xlsx file.')
+
+
+def count_rows(path):
+    """Cheaply count data rows so progress can be reported (None if unknown)"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.csv':
+            with open(path, 'rb') as raw:
+                reader = csv.reader(codecs.iterdecode(raw, 'utf-8-sig'))
+                return max(0, sum(1 for _ in reader) - 1)
+        if extension == '.xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            try:
+                return max(0, (workbook.worksheets[0].max_row or 1) - 1)
+            finally:
+                workbook.close()
+    except Exception:
+        return None
+    return None
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materialising the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class VendorImporter:
+    """Imports vendor rows into a tenant and records progress on a VendorImportJob"""
+
+    def __init__(self, job, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+        self.job = job
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        # One serializer instance is reused for every row, so fields and their
+        # validators are built once instead of once per row
+        self.validator = VendorCodeCreateSerializer()
+        self.seen_gst = set()
+        self.seen_email = set()
+
+    def load_existing_index(self):
+        """Load GST numbers and emails of the tenant's vendors in one query"""
+        existing = VendorCode.objects.filter(tenant_id=self.job.tenant_id).values_list('gst', 'email')
+        for gst, email in existing.iterator():
+            if gst:
+                self.seen_gst.add(gst.upper())
+            if email:
+                self.seen_email.add(email.lower())
+
+    def validate_chunk(self, rows, first_row_number):
+        """Validate a chunk of rows; returns (vendors, duplicates, errors)"""
+        vendors = []
+        duplicates = 0
+        errors = []
+
+        for offset, row in enumerate(rows):
+            row_number = first_row_number + offset
+            try:
+                attrs = self.validator.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors.append({'row': row_number, 'errors': exc.detail})
+                continue
+
+            gst = attrs['gst'].upper()
+            email = attrs['email'].lower()
+            if gst in self.seen_gst or email in self.seen_email:
+                duplicates += 1
+                continue
+            self.seen_gst.add(gst)
+            self.seen_email.add(email)
+
+            attrs.pop('tenant', None)
+            vendors.append(VendorCode(
+                tenant_id=self.job.tenant_id,
+                created_by_id=self.job.created_by_id,
+                **attrs
+            ))
+
+        return vendors, duplicates, errors
+
+    def run(self, path):
+        """Import every row of the file at `path`"""
+        job = self.job
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.total_rows = count_rows(path)
+        job.save(update_fields=['status', 'started_at', 'total_rows'])
+
+        try:
+            self.load_existing_index()
+            # Row numbers match the spreadsheet (row 1 is the header)
+            row_number = 2
+            for rows in chunked(iter_vendor_rows(path), self.chunk_size):
+                vendors, duplicates, errors = self.validate_chunk(rows, row_number)
+                row_number += len(rows)
+
+                if vendors:
+                    VendorCode.objects.bulk_create_with_codes(vendors, batch_size=BULK_CREATE_BATCH_SIZE)
+
+                job.processed_rows += len(rows)
+                job.created_count += len(vendors)
+                job.duplicate_count += duplicates
+                job.error_count += len(errors)
+                room = MAX_RECORDED_ERRORS - len(job.errors)
+                if room > 0:
+                    job.errors.extend(errors[:room])
+                job.save(update_fields=[
+                    'processed_rows', 'created_count', 'duplicate_count', 'error_count', 'errors'
+                ])
+                if self.on_progress:
+                    self.on_progress(job)
+
+            job.status = 'completed'
+            job.message = (
+                f'Imported {job.created_count} vendors, skipped {job.duplicate_count} duplicates, '
+                f'rejected {job.error_count} invalid rows'
+            )
+        except Exception as exc:
+            logger.exception('Vendor import %s failed', job.pk)
+            job.status = 'failed'
+            job.message = str(exc)
+
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at'])
+        return job
+
+
+def run_import(job_id, path, chunk_size=DEFAULT_CHUNK_SIZE, delete_file=False):
+    """Run an import job to completion (used by the upload thread and the command)"""
+    try:
+        job = VendorImportJob.objects.get(pk=job_id)
+        return VendorImporter(job, chunk_size=chunk_size).run(path)
+    finally:
+        if delete_file and os.path.exists(path):
+            os.remove(path)
+
+
+def start_import_in_background(job, path):
+    """Run an import job on a background thread so the upload request returns at once"""
+    def target():
+        try:
+            run_import(job.pk, path, delete_file=True)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=target, name=f'vendor-import-{job.pk}', daemon=True)
+    thread.start()
+    return thread
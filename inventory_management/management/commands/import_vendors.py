@@ -0,0 +1,59 @@
+"""
+Management command to import vendor master data from a CSV/XLSX spreadsheet
+Run: python manage.py import_vendors vendors.xlsx --tenant "Company Name" [--user owner@example.com]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_service.models import User
+from inventory_management.importers import DEFAULT_CHUNK_SIZE, VendorImporter, iter_vendor_rows
+from inventory_management.models import VendorImportJob
+from shared.commands import get_tenant
+
+
+class Command(BaseCommand):
+    help = 'Import vendors from a CSV or XLSX file in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--tenant', help='Tenant id or company name the vendors belong to')
+        parser.add_argument('--user', help='Email of the user recorded as creator')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Rows validated and inserted per transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            iter_vendor_rows(path)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        tenant = get_tenant(options['tenant'])
+        user = None
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if not user:
+                raise CommandError(f'User "{options["user"]}" not found')
+
+        job = VendorImportJob.objects.create(
+            file_name=path,
+            tenant=tenant,
+            created_by=user
+        )
+        self.stdout.write(f'Import job {job.pk} started')
+
+        def report(job):
+            total = job.total_rows if job.total_rows is not None else '?'
+            self.stdout.write(
+                f'  {job.processed_rows}/{total} rows: {job.created_count} created, '
+                f'{job.duplicate_count} duplicates, {job.error_count} invalid'
+            )
+
+        job = VendorImporter(job, chunk_size=options['chunk_size'], on_progress=report).run(path)
+
+        for error in job.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'  Row {error["row"]}: {error["errors"]}'))
+
+        if job.status == 'failed':
+            raise CommandError(f'Import failed: {job.message}')
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! {job.message}.'))
+
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild the buyer/vendor full-text search index
+Only needed on SQLite (e.g. after restoring a database copied without the
+FTS tables); PostgreSQL maintains its GIN index itself.
+Run: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from inventory_management.search import (
+    SEARCH_INDEXES, install_search_indexes, sqlite_fts5_available
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for buyer and vendor codes'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('PostgreSQL keeps the search index up to date; nothing to rebuild.')
+            return
+
+        with connection.cursor() as cursor:
+            if not sqlite_fts5_available(cursor):
+                raise CommandError('This SQLite build does not include FTS5')
+
+        with transaction.atomic(), connection.schema_editor() as schema_editor:
+            # Creates any missing tables/triggers and refills every index
+            install_search_indexes(schema_editor)
+
+        with connection.cursor() as cursor:
+            for table in SEARCH_INDEXES:
+                cursor.execute(f'SELECT COUNT(*) FROM {table}_fts')
+                self.stdout.write(f'{table}: {cursor.fetchone()[0]} rows indexed')
+
+        self.stdout.write(self.style.SUCCESS('\nCompleted!'))
@@ -0,0 +1,54 @@
+"""
+Management command to pull Google Sheets worksheets into local snapshots
+The master sheet endpoint reads these snapshots (see shared/sheet_snapshots.py);
+run this once, or every --interval seconds as a periodic task, so requests
+never wait for a pull:
+Run: python manage.py snapshot_sheets [--sheet MasterSheet] [--interval 300]
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.google_sheets import sheets_service
+from shared.sheet_snapshots import sheet_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Pull Google Sheets worksheets into local columnar snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sheet', action='append', dest='sheets',
+                            help='Worksheet to snapshot (repeatable; default MasterSheet)')
+        parser.add_argument('--spreadsheet', default=None,
+                            help='Spreadsheet id (default: GOOGLE_SHEETS_SPREADSHEET_ID)')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between pulls; 0 pulls once and exits')
+
+    def handle(self, *args, **options):
+        spreadsheet_id = options['spreadsheet'] or settings.GOOGLE_SHEETS_SPREADSHEET_ID
+        if not spreadsheet_id:
+            raise CommandError('No spreadsheet: pass --spreadsheet or set GOOGLE_SHEETS_SPREADSHEET_ID')
+        sheets = options['sheets'] or ['MasterSheet']
+
+        while True:
+            for sheet_name in sheets:
+                started = time.monotonic()
+                try:
+                    snapshot = sheet_snapshots.pull(
+                        spreadsheet_id, sheet_name,
+                        lambda: sheets_service.get_all_values(spreadsheet_id, sheet_name),
+                        force=True
+                    )
+                except Exception as exc:
+                    if not options['interval']:
+                        raise CommandError(f'{sheet_name}: {exc}')
+                    self.stderr.write(self.style.ERROR(f'{sheet_name}: {exc}'))
+                    continue
+                self.stdout.write(
+                    f'{sheet_name}: {snapshot.rows} rows, {len(snapshot.columns)} columns '
+                    f'in {time.monotonic() - started:.1f}s'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,56 @@
+"""
+Management command to sync a tenant's buyer and vendor codes with Google Sheets
+Pushes codes changed in the database to the Buyers/Vendors sheets and saves
+rows edited in the sheets (see inventory_management/sheets_sync.py).
+Each tenant needs its own spreadsheet: a sheet already synced with another
+tenant is refused. Run once, or every --interval seconds as a periodic task:
+Run: python manage.py sync_sheets --tenant "Company Name" [--sheet buyers] [--interval 300]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_management.sheets_sync import SHEET_MAPPINGS, SheetSync
+from shared.commands import get_tenant
+
+
+class Command(BaseCommand):
+    help = 'Sync buyer and vendor codes with their Google Sheets incrementally'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', required=True, help='Tenant id or company name whose codes are synced')
+        parser.add_argument('--sheet', choices=[*SHEET_MAPPINGS, 'all'], default='all', help='Sheet to sync')
+        parser.add_argument('--spreadsheet', default=None,
+                            help="Spreadsheet id (default: the one the tenant's sheet was last synced with, "
+                                 "else GOOGLE_SHEETS_SPREADSHEET_ID)")
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between runs; 0 syncs once and exits')
+
+    def handle(self, *args, **options):
+        tenant = get_tenant(options['tenant'])
+        mappings = list(SHEET_MAPPINGS.values()) if options['sheet'] == 'all' else [SHEET_MAPPINGS[options['sheet']]]
+
+        while True:
+            for mapping in mappings:
+                try:
+                    report = SheetSync(tenant, mapping, spreadsheet_id=options['spreadsheet']).run()
+                except Exception as exc:
+                    if not options['interval']:
+                        raise CommandError(f'{mapping.sheet_name}: {exc}')
+                    self.stderr.write(self.style.ERROR(f'{mapping.sheet_name}: {exc}'))
+                    continue
+                self.write_report(report)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def write_report(self, report):
+        self.stdout.write(
+            f'{report.sheet_name}: pushed {report.pushed_updates} updated and {report.pushed_new} new, '
+            f'pulled {report.pulled_updates} updated and {report.pulled_new} new, '
+            f'{report.conflicts_kept_db + report.conflicts_kept_sheet} conflicts, {report.error_count} rejected'
+            f"{'' if report.downloaded else ' (sheet unchanged)'}"
+        )
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'  Row {error["row"]}: {error["errors"]}'))
+
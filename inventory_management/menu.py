@@ -0,0 +1,94 @@
+"""
+Department menu tree for GET /api/ims/menu-structure/
+The menu is requested on every page load but changes rarely, so the tree of
+each tenant scope (see shared/tenancy.py) is built once (two queries) and
+cached under the current menu version. It lists the same departments as the
+department endpoints: master admins see every tenant's, users without a
+tenant see shared ones only.
+Any Department or Segment write bumps the version (see signals.py), which
+retires every cached tree at once; shared departments (tenant = NULL) appear
+in every tenant's menu, so there is one version for all tenants.
+
+Each cached tree carries a strong ETag (a hash of its JSON), so clients that
+already hold the current menu get 304 Not Modified without a body.
+"""
+import hashlib
+import json
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from shared.cache import get_version
+from shared.db_routing import use_primary
+
+
+MENU_VERSION = 'department_menu'
+
+# Cached trees are replaced on every write anyway; this only bounds how long
+# an unused tenant's tree stays in the cache
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Keys used for master admins, who see every tenant's departments, and for
+# users without a tenant, who see shared ones only
+ALL_TENANTS = '*'
+SHARED_ONLY = 'shared'
+
+
+def build_menu(scope):
+    """Active departments visible in scope (a TenantScope) with their active segments"""
+    Department = apps.get_model('inventory_management', 'Department')
+    Segment = apps.get_model('inventory_management', 'Segment')
+    if scope.unrestricted:
+        departments = Department.objects.all()
+    else:
+        departments = Department.objects.for_tenant(scope.tenant_id)
+    departments = departments.filter(is_active=True).prefetch_related(
+        Prefetch(
+            'segments',
+            queryset=Segment.objects.filter(is_active=True).order_by('display_order', 'name'),
+            to_attr='active_segments'
+        )
+    ).order_by('display_order', 'name')
+
+    return [
+        {
+            'id': str(dept.id),
+            'code': dept.code,
+            'label': dept.name,
+            'hasSubMenu': bool(dept.active_segments),
+            'segments': [
+                {
+                    'id': str(seg.id),
+                    'code': seg.code,
+                    'label': seg.name
+                }
+                for seg in dept.active_segments
+            ]
+        }
+        for dept in departments
+    ]
+
+
+def menu_etag(menu_data):
+    body = json.dumps(menu_data, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+
+
+def menu_key(scope):
+    if scope.unrestricted:
+        return ALL_TENANTS
+    return scope.tenant_id or SHARED_ONLY
+
+
+def get_menu(scope):
+    """Return (menu_data, etag) for a TenantScope, from the cache when the menu is unchanged"""
+    key = f'menu:{menu_key(scope)}:{get_version(MENU_VERSION)}'
+    cached = cache.get(key)
+    if cached is None:
+        # From the primary: a lagging replica would cache a stale menu
+        with use_primary():
+            menu_data = build_menu(scope)
+        cached = (menu_data, menu_etag(menu_data))
+        cache.set(key, cached, MENU_CACHE_TIMEOUT)
+    return cached
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0003_tenant_logo_tenant_plan_user_custom_role_name_and_more"),
+        ("inventory_management", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="buyercode",
+            name="code",
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name="vendorcode",
+            name="code",
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+        migrations.AlterUniqueTogether(
+            name="buyercode",
+            unique_together={("tenant", "code")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="vendorcode",
+            unique_together={("tenant", "code")},
+        ),
+        migrations.CreateModel(
+            name="CodeSequence",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("buyer", "Buyer Code"), ("vendor", "Vendor Code")],
+                        max_length=20,
+                    ),
+                ),
+                ("next_value", models.PositiveBigIntegerField(default=101)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="code_sequences",
+                        to="auth_service.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Code Sequence",
+                "verbose_name_plural": "Code Sequences",
+                "db_table": "code_sequences",
+                "unique_together": {("tenant", "kind")},
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0003_tenant_logo_tenant_plan_user_custom_role_name_and_more"),
+        ("inventory_management", "0002_code_sequences"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorImportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("message", models.TextField(blank=True)),
+                ("total_rows", models.IntegerField(blank=True, null=True)),
+                ("processed_rows", models.IntegerField(default=0)),
+                ("created_count", models.IntegerField(default=0)),
+                ("duplicate_count", models.IntegerField(default=0)),
+                ("error_count", models.IntegerField(default=0)),
+                (
+                    "errors",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="First rejected rows with their errors",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="vendor_import_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vendor_import_jobs",
+                        to="auth_service.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vendor Import Job",
+                "verbose_name_plural": "Vendor Import Jobs",
+                "db_table": "vendor_import_jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "created_at"],
+                        name="vendor_impo_tenant__4dd6bc_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:05
+
+from django.db import migrations
+
+from inventory_management.search import install_search_indexes, uninstall_search_indexes
+
+
+def install(apps, schema_editor):
+    install_search_indexes(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory_management", "0003_vendor_import_jobs"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
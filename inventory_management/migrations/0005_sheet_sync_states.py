@@ -0,0 +1,78 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0006_login_history_login_at_default"),
+        ("inventory_management", "0004_code_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetSyncState",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("spreadsheet_id", models.CharField(max_length=255)),
+                ("sheet_name", models.CharField(max_length=100)),
+                (
+                    "db_cursor",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Rows updated after this are pushed",
+                        null=True,
+                    ),
+                ),
+                (
+                    "sheet_modified_at",
+                    models.CharField(
+                        blank=True,
+                        help_text="Drive modifiedTime last read",
+                        max_length=40,
+                    ),
+                ),
+                ("header", models.JSONField(blank=True, default=list)),
+                (
+                    "row_count",
+                    models.IntegerField(
+                        default=0, help_text="Rows in the sheet, header included"
+                    ),
+                ),
+                (
+                    "rows",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="code -> [sheet row number, row hash]",
+                    ),
+                ),
+                ("last_synced_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sheet_sync_states",
+                        to="auth_service.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sheet Sync State",
+                "verbose_name_plural": "Sheet Sync States",
+                "db_table": "sheet_sync_states",
+                "unique_together": {("tenant", "spreadsheet_id", "sheet_name")},
+            },
+        ),
+    ]
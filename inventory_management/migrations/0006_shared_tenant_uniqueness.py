@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_service", "0006_login_history_login_at_default"),
+        ("inventory_management", "0005_sheet_sync_states"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="buyercode",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("code",),
+                name="buyer_codes_shared_code_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="codesequence",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("kind",),
+                name="code_sequences_shared_kind_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="vendorcode",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("tenant__isnull", True)),
+                fields=("code",),
+                name="vendor_codes_shared_code_uniq",
+            ),
+        ),
+    ]
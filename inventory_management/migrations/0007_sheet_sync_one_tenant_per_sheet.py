@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory_management", "0006_shared_tenant_uniqueness"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="sheetsyncstate",
+            unique_together={("spreadsheet_id", "sheet_name")},
+        ),
+        migrations.AddField(
+            model_name="sheetsyncstate",
+            name="pending_codes",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Codes created from sheet rows but not yet written back: row hash -> [code, ...]",
+            ),
+        ),
+    ]
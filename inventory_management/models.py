@@ -1,8 +1,11 @@
 from django.db import models
+from django.dispatch import Signal
 from django.utils import timezone
-from django.db.models import Max
 import uuid
 
+from shared.tenancy import TenantScopedManager
+from shared.transactions import immediate_atomic
+
 
 class Department(models.Model):
     """
@@ -43,6 +46,9 @@ class Department(models.Model):
         related_name='created_departments'
     )
     
+    # Own tenant's departments plus shared ones (tenant NULL)
+    objects = TenantScopedManager(include_shared=True)
+    
     class Meta:
         db_table = 'departments'
         verbose_name = 'Department'
@@ -94,6 +100,9 @@ class Segment(models.Model):
         related_name='created_segments'
     )
     
+    # Scoped through the department's tenant
+    objects = TenantScopedManager(tenant_field='department__tenant', include_shared=True)
+    
     class Meta:
         db_table = 'segments'
         verbose_name = 'Segment'
@@ -109,6 +118,86 @@ class Segment(models.Model):
         return f"{self.department.name} - {self.name} ({self.code})"
 
 
+class CodeSequence(models.Model):
+    """
+    Code Sequence Model
+    Per-tenant counter used to allocate BuyerCode and VendorCode numbers
+    (see inventory_management.sequences)
+    """
+    
+    KIND_CHOICES = [
+        ('buyer', 'Buyer Code'),
+        ('vendor', 'Vendor Code'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    
+    # Next number to hand out (e.g. 101 -> "101A" for buyers, "101" for vendors)
+    next_value = models.PositiveBigIntegerField(default=101)
+    
+    # Tenant Relationship
+    tenant = models.ForeignKey(
+        'auth_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='code_sequences',
+        null=True,
+        blank=True
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'code_sequences'
+        verbose_name = 'Code Sequence'
+        verbose_name_plural = 'Code Sequences'
+        unique_together = [['tenant', 'kind']]
+        constraints = [
+            # NULLs are distinct in unique_together: one shared (tenant=None) counter per kind
+            models.UniqueConstraint(
+                fields=['kind'], condition=models.Q(tenant__isnull=True), name='code_sequences_shared_kind_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} -> {self.next_value}"
+
+
+# Sent by SequentialCodeManager.bulk_create_with_codes, which bypasses post_save
+# (sender=model class, instances=list of created objects); handled in signals.py
+codes_bulk_created = Signal()
+
+
+class SequentialCodeManager(TenantScopedManager):
+    """Manager for models whose codes are allocated from a CodeSequence"""
+    
+    def bulk_create_with_codes(self, objs, batch_size=None):
+        """
+        Insert many rows with bulk_create, assigning codes to rows without one
+        Codes are reserved as one block per tenant, in the same transaction
+        as the insert, so a failed insert also releases the codes
+        """
+        from .sequences import reserve_numbers
+        
+        objs = list(objs)
+        pending = {}
+        for obj in objs:
+            if not obj.code:
+                pending.setdefault(obj.tenant_id, []).append(obj)
+        
+        with immediate_atomic():
+            for group in pending.values():
+                numbers = reserve_numbers(self.model, group[0].tenant, len(group))
+                for obj, number in zip(group, numbers):
+                    obj.code = self.model.format_code(number)
+            created = self.bulk_create(objs, batch_size=batch_size)
+            codes_bulk_created.send(sender=self.model, instances=created)
+            return created
+
+
 class BuyerCode(models.Model):
     """
     Buyer Code Model
@@ -117,8 +206,8 @@ class BuyerCode(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
-    # Auto-generated code (101A, 102A, 103A, etc.)
-    code = models.CharField(max_length=20, unique=True, db_index=True)
+    # Auto-generated code (101A, 102A, 103A, etc.) - unique per tenant
+    code = models.CharField(max_length=20, db_index=True)
     
     # Buyer Information
     buyer_name = models.CharField(max_length=255)
@@ -146,11 +235,20 @@ class BuyerCode(models.Model):
         related_name='created_buyer_codes'
     )
     
+    objects = SequentialCodeManager()
+    
     class Meta:
         db_table = 'buyer_codes'
         verbose_name = 'Buyer Code'
         verbose_name_plural = 'Buyer Codes'
         ordering = ['-created_at']
+        unique_together = [['tenant', 'code']]  # Codes are sequenced per tenant
+        constraints = [
+            # Codes of rows without a tenant are unique too (NULLs are distinct above)
+            models.UniqueConstraint(
+                fields=['code'], condition=models.Q(tenant__isnull=True), name='buyer_codes_shared_code_uniq'
+            ),
+        ]
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['tenant', 'created_at']),
@@ -160,40 +258,33 @@ class BuyerCode(models.Model):
     def __str__(self):
         return f"{self.code} - {self.buyer_name}"
     
+    # Sequence used to allocate codes (see CodeSequence)
+    CODE_SEQUENCE_KIND = 'buyer'
+    
+    @classmethod
+    def format_code(cls, number):
+        """Format a sequence number as a buyer code (101 -> "101A")"""
+        return f"{number}A"
+    
     @classmethod
     def generate_next_code(cls, tenant=None):
         """
-        Generate the next buyer code in sequence (101A, 102A, etc.)
-        Starts from 101A if no codes exist
+        Preview the next buyer code in sequence (101A, 102A, etc.)
+        Does not consume the code - use allocate_code() when saving
         """
-        # Filter by tenant if provided, otherwise get all
-        queryset = cls.objects.all()
-        if tenant:
-            queryset = queryset.filter(tenant=tenant)
-        
-        # Get the highest existing code number
-        last_code = queryset.aggregate(Max('code'))['code__max']
-        
-        if last_code:
-            # Extract number from code (e.g., "101A" -> 101)
-            try:
-                # Remove 'A' suffix and convert to int
-                last_number = int(last_code.replace('A', ''))
-                next_number = last_number + 1
-            except (ValueError, AttributeError):
-                # If parsing fails, start from 101
-                next_number = 101
-        else:
-            # No codes exist, start from 101
-            next_number = 101
-        
-        # Format as "XXXA"
-        return f"{next_number}A"
+        from .sequences import peek_next_number
+        return cls.format_code(peek_next_number(cls, tenant))
+    
+    @classmethod
+    def allocate_code(cls, tenant=None):
+        """Reserve and return the next buyer code for the tenant"""
+        from .sequences import reserve_numbers
+        return cls.format_code(reserve_numbers(cls, tenant)[0])
     
     def save(self, *args, **kwargs):
         """Auto-generate code if not provided"""
         if not self.code:
-            self.code = self.generate_next_code(tenant=self.tenant)
+            self.code = self.allocate_code(tenant=self.tenant)
         super().save(*args, **kwargs)
 
 
@@ -205,8 +296,8 @@ class VendorCode(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
-    # Auto-generated code (101, 102, 103, etc.)
-    code = models.CharField(max_length=20, unique=True, db_index=True)
+    # Auto-generated code (101, 102, 103, etc.) - unique per tenant
+    code = models.CharField(max_length=20, db_index=True)
     
     # Vendor Information
     vendor_name = models.CharField(max_length=255)
@@ -249,11 +340,20 @@ class VendorCode(models.Model):
         related_name='created_vendor_codes'
     )
     
+    objects = SequentialCodeManager()
+    
     class Meta:
         db_table = 'vendor_codes'
         verbose_name = 'Vendor Code'
         verbose_name_plural = 'Vendor Codes'
         ordering = ['-created_at']
+        unique_together = [['tenant', 'code']]  # Codes are sequenced per tenant
+        constraints = [
+            # Codes of rows without a tenant are unique too (NULLs are distinct above)
+            models.UniqueConstraint(
+                fields=['code'], condition=models.Q(tenant__isnull=True), name='vendor_codes_shared_code_uniq'
+            ),
+        ]
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['tenant', 'created_at']),
@@ -265,37 +365,148 @@ class VendorCode(models.Model):
     def __str__(self):
         return f"{self.code} - {self.vendor_name}"
     
+    # Sequence used to allocate codes (see CodeSequence)
+    CODE_SEQUENCE_KIND = 'vendor'
+    
+    @classmethod
+    def format_code(cls, number):
+        """Format a sequence number as a vendor code (101 -> "101")"""
+        return str(number)
+    
     @classmethod
     def generate_next_code(cls, tenant=None):
         """
-        Generate the next vendor code in sequence (101, 102, etc.)
-        Starts from 101 if no codes exist
+        Preview the next vendor code in sequence (101, 102, etc.)
+        Does not consume the code - use allocate_code() when saving
         """
-        # Filter by tenant if provided, otherwise get all
-        queryset = cls.objects.all()
-        if tenant:
-            queryset = queryset.filter(tenant=tenant)
-        
-        # Get the highest existing code number
-        last_code = queryset.aggregate(Max('code'))['code__max']
-        
-        if last_code:
-            # Extract number from code (e.g., "101" -> 101)
-            try:
-                last_number = int(last_code)
-                next_number = last_number + 1
-            except (ValueError, AttributeError):
-                # If parsing fails, start from 101
-                next_number = 101
-        else:
-            # No codes exist, start from 101
-            next_number = 101
-        
-        # Return as string
-        return str(next_number)
+        from .sequences import peek_next_number
+        return cls.format_code(peek_next_number(cls, tenant))
+    
+    @classmethod
+    def allocate_code(cls, tenant=None):
+        """Reserve and return the next vendor code for the tenant"""
+        from .sequences import reserve_numbers
+        return cls.format_code(reserve_numbers(cls, tenant)[0])
     
     def save(self, *args, **kwargs):
         """Auto-generate code if not provided"""
         if not self.code:
-            self.code = self.generate_next_code(tenant=self.tenant)
+            self.code = self.allocate_code(tenant=self.tenant)
         super().save(*args, **kwargs)
+
+
+class VendorImportJob(models.Model):
+    """
+    Vendor Import Job Model
+    Tracks a spreadsheet import of vendor master data so progress can be polled
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Import Details
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    message = models.TextField(blank=True)
+    
+    # Progress
+    total_rows = models.IntegerField(null=True, blank=True)
+    processed_rows = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    duplicate_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="First rejected rows with their errors")
+    
+    # Tenant Relationship
+    tenant = models.ForeignKey(
+        'auth_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='vendor_import_jobs',
+        null=True,
+        blank=True
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        'auth_service.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='vendor_import_jobs'
+    )
+    
+    class Meta:
+        db_table = 'vendor_import_jobs'
+        verbose_name = 'Vendor Import Job'
+        verbose_name_plural = 'Vendor Import Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+    
+    @property
+    def progress(self):
+        """Percentage of rows processed, if the row count is known"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, round(self.processed_rows * 100 / self.total_rows))
+
+
+class SheetSyncState(models.Model):
+    """
+    Sheet Sync State Model
+    Where the last Google Sheets sync of a tenant's codes left off (see sheets_sync.py)
+    A sheet is synced with one tenant only: codes repeat across tenants
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Synced Sheet
+    spreadsheet_id = models.CharField(max_length=255)
+    sheet_name = models.CharField(max_length=100)
+    
+    # Change Cursors
+    db_cursor = models.DateTimeField(null=True, blank=True, help_text="Rows updated after this are pushed")
+    sheet_modified_at = models.CharField(max_length=40, blank=True, help_text="Drive modifiedTime last read")
+    
+    # Last Synced Sheet Layout
+    header = models.JSONField(default=list, blank=True)
+    row_count = models.IntegerField(default=0, help_text="Rows in the sheet, header included")
+    rows = models.JSONField(default=dict, blank=True, help_text="code -> [sheet row number, row hash]")
+    pending_codes = models.JSONField(
+        default=dict, blank=True,
+        help_text="Codes created from sheet rows but not yet written back: row hash -> [code, ...]"
+    )
+    
+    # Tenant Relationship
+    tenant = models.ForeignKey(
+        'auth_service.Tenant',
+        on_delete=models.CASCADE,
+        related_name='sheet_sync_states'
+    )
+    
+    # Timestamps
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'sheet_sync_states'
+        verbose_name = 'Sheet Sync State'
+        verbose_name_plural = 'Sheet Sync States'
+        unique_together = [['spreadsheet_id', 'sheet_name']]
+    
+    def __str__(self):
+        return f"{self.sheet_name} ({self.last_synced_at})"
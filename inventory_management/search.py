@@ -0,0 +1,278 @@
+"""
+Full-text search for buyer and vendor codes
+Replaces chained __icontains filters (full table scans) with an index
+
+- SQLite: an FTS5 virtual table per code table, kept in sync by triggers on
+  insert, update and delete (so bulk_create and queryset.update are covered)
+- PostgreSQL: a GIN index on a to_tsvector() expression over the same columns,
+  maintained by the database itself
+
+Queries match every search term as a prefix ("abc tex" finds "ABC Textiles")
+and selective queries are ordered by relevance (bm25 / ts_rank). Every match
+is returned, so counts and later pages are complete. If the index is
+unavailable the caller falls back to the old icontains filters.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+# Searchable columns per table (the order is the bm25 column order)
+SEARCH_INDEXES = {
+    'buyer_codes': ('code', 'buyer_name', 'retailer', 'contact_person'),
+    'vendor_codes': ('code', 'vendor_name', 'gst', 'contact_person', 'email', 'job_work_category'),
+}
+
+# Terms beyond this are ignored
+SEARCH_MAX_TERMS = 8
+
+# Queries whose terms are all shorter than this, or that match more rows than
+# SEARCH_RANK_CANDIDATES, return the first matches unranked instead of
+# scoring every match
+SEARCH_MIN_RANKED_LENGTH = 3
+SEARCH_RANK_CANDIDATES = 2000
+
+_term_pattern = re.compile(r'[^\W_]+')
+_fts5_tables = {}
+
+
+def search_terms(text):
+    """Split user input into lowercase alphanumeric terms"""
+    return _term_pattern.findall((text or '').lower())[:SEARCH_MAX_TERMS]
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+# ---------------------------------------------------------------------------
+# Index installation (called from migrations)
+# ---------------------------------------------------------------------------
+
+def sqlite_fts5_available(cursor):
+    try:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Some builds load FTS5 without reporting the compile option
+        cursor.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+        cursor.execute('DROP TABLE temp._fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+def _sqlite_install_sql(table, columns):
+    fts = _fts_table(table)
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    delete_old = (
+        f"DELETE FROM {fts} WHERE rowid IN ("
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH 'record_id:\"' || old.id || '\"');"
+    )
+    insert_new = (
+        f"INSERT INTO {fts} (record_id, tenant_id, {column_list}) "
+        f"VALUES (new.id, new.tenant_id, {new_values});"
+    )
+    return [
+        # record_id is indexed so triggers can find a row without a full scan;
+        # searches restrict MATCH to the text columns
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"record_id, tenant_id UNINDEXED, {column_list}, tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF tenant_id, {column_list} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _postgres_document(columns):
+    return "to_tsvector('simple', " + " || ' ' || ".join(f"coalesce({column}, '')" for column in columns) + ")"
+
+
+def install_search_indexes(schema_editor):
+    """Create the search index for every table in SEARCH_INDEXES and fill it"""
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in SEARCH_INDEXES.items():
+            if vendor == 'sqlite':
+                if not sqlite_fts5_available(cursor):
+                    return
+                for statement in _sqlite_install_sql(table, columns):
+                    cursor.execute(statement)
+                rebuild_sqlite_index(cursor, table, columns)
+            elif vendor == 'postgresql':
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} "
+                    f"USING GIN ({_postgres_document(columns)})"
+                )
+    _fts5_tables.clear()
+
+
+def uninstall_search_indexes(schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for table in SEARCH_INDEXES:
+            if vendor == 'sqlite':
+                fts = _fts_table(table)
+                for trigger in ('insert', 'delete', 'update'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            elif vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+    _fts5_tables.clear()
+
+
+def rebuild_sqlite_index(cursor, table, columns=None):
+    """Refill an FTS5 table from its code table"""
+    columns = columns or SEARCH_INDEXES[table]
+    fts = _fts_table(table)
+    column_list = ', '.join(columns)
+    cursor.execute(f'DELETE FROM {fts}')
+    cursor.execute(
+        f'INSERT INTO {fts} (record_id, tenant_id, {column_list}) '
+        f'SELECT id, tenant_id, {column_list} FROM {table}'
+    )
+    cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _connection(model, using=None):
+    """Connection the model is read from (respects the replica router)"""
+    return connections[using or router.db_for_read(model)]
+
+
+def search_available(model, using=None):
+    """True if the search index for this model can be queried"""
+    table = model._meta.db_table
+    if table not in SEARCH_INDEXES:
+        return False
+    connection = _connection(model, using)
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.settings_dict['NAME'], table)
+    if key not in _fts5_tables:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [_fts_table(table)]
+            )
+            _fts5_tables[key] = cursor.fetchone() is not None
+    return _fts5_tables[key]
+
+
+def _db_uuid(connection, value):
+    """UUIDs are stored as 32-character hex strings on SQLite"""
+    if value is None or connection.vendor != 'sqlite':
+        return value
+    return getattr(value, 'hex', str(value).replace('-', ''))
+
+
+def _match_sql(connection, model, terms, tenant_id=None):
+    """
+    SQL selecting the ids of every matching row, and the ORDER BY that ranks
+    them: (sql, params, order_by, order_params)
+    """
+    table = model._meta.db_table
+    columns = SEARCH_INDEXES[table]
+    params = []
+
+    if connection.vendor == 'sqlite':
+        fts = _fts_table(table)
+        match = '{%s} : (%s)' % (' '.join(columns), ' AND '.join(f'"{term}"*' for term in terms))
+        sql = f'SELECT record_id FROM {fts} WHERE {fts} MATCH %s'
+        params.append(match)
+        if tenant_id is not None:
+            sql += ' AND tenant_id = %s'
+            params.append(_db_uuid(connection, tenant_id))
+        return sql, params, ' ORDER BY rank', []
+
+    document = _postgres_document(columns)
+    query = "to_tsquery('simple', %s)"
+    sql = f'SELECT id FROM {table} WHERE {document} @@ {query}'
+    params.append(' & '.join(f'{term}:*' for term in terms))
+    if tenant_id is not None:
+        sql += ' AND tenant_id = %s'
+        params.append(tenant_id)
+    return sql, params, f' ORDER BY ts_rank({document}, {query}) DESC', [params[0]]
+
+
+def search_ids(model, text, tenant_id=None, limit=None, using=None):
+    """Return ids of matching rows, best match first (all of them unless limit)"""
+    terms = search_terms(text)
+    if not terms:
+        return []
+    connection = _connection(model, using)
+    sql, params, order_by, order_params = _match_sql(connection, model, terms, tenant_id)
+    sql, params = sql + order_by, params + order_params
+    if limit is not None:
+        sql, params = sql + ' LIMIT %s', params + [limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def apply_search(queryset, text, tenant_id=None, fallback_fields=()):
+    """
+    Filter a code queryset to every search match
+
+    Selective queries (at most SEARCH_RANK_CANDIDATES matches) are ordered by
+    relevance; broad ones keep the queryset's ordering, with the matches
+    selected by a subquery so paging and counts cover all of them.
+
+    Matches are limited to tenant_id here, so pass a queryset that is not
+    already filtered by tenant: with both "tenant_id = ?" and "id IN (...)"
+    the database may walk the whole tenant through the tenant index instead
+    of looking up the matched ids. Falls back to OR-ed __icontains filters
+    on fallback_fields if the search index is not installed.
+    """
+    model = queryset.model
+    using = queryset.db
+    if not search_available(model, using):
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': text})
+        if tenant_id is not None:
+            queryset = queryset.filter(tenant_id=tenant_id)
+        return queryset.filter(condition)
+
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[using]
+    sql, params, order_by, order_params = _match_sql(connection, model, terms, tenant_id)
+    matches = queryset.filter(pk__in=RawSQL(sql, params))
+
+    # Scoring costs one pass over every match, so only rank queries that are
+    # selective; probe for more than SEARCH_RANK_CANDIDATES matches first
+    if max(len(term) for term in terms) < SEARCH_MIN_RANKED_LENGTH:
+        return matches
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' LIMIT %s', params + [SEARCH_RANK_CANDIDATES + 1])
+        found = len(cursor.fetchall())
+    if found > SEARCH_RANK_CANDIDATES:
+        return matches
+    if not found:
+        return queryset.none()
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql + order_by, params + order_params)
+        ids = [row[0] for row in cursor.fetchall()]
+
+    # Keep the ranked order with one SQL expression (a Case/When per id is
+    # slow to build for hundreds of matches)
+    column = f'{connection.ops.quote_name(model._meta.db_table)}.{connection.ops.quote_name(model._meta.pk.column)}'
+    if connection.vendor == 'sqlite':
+        relevance = RawSQL(f'instr(%s, {column})', [','.join(ids)])
+        ids = [model._meta.pk.to_python(value) for value in ids]
+    else:
+        relevance = RawSQL(f'array_position(%s::uuid[], {column})', [ids])
+    return queryset.filter(pk__in=ids).order_by(relevance)
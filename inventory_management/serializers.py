@@ -1,6 +1,10 @@
 from rest_framework import serializers
 import re
-from .models import Department, Segment, BuyerCode, VendorCode
+from .models import Department, Segment, BuyerCode, VendorCode, VendorImportJob
+
+
+# Rows per INSERT statement when bulk creating buyer/vendor codes
+BULK_CREATE_BATCH_SIZE = 500
 
 
 class SegmentSerializer(serializers.ModelSerializer):
@@ -37,11 +41,34 @@ class SegmentDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'department_name', 'department_code']
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class SegmentCountsMixin:
+    """
+    Segment counts for department serializers
+
+    Uses the counts annotated by DepartmentViewSet.get_queryset (or the
+    prefetched segments) when present, so listing departments does not run
+    one count query per department.
+    """
+    
+    def get_segments_count(self, obj):
+        if hasattr(obj, 'annotated_segments_count'):
+            return obj.annotated_segments_count
+        return obj.segments.count()
+    
+    def get_active_segments_count(self, obj):
+        """Get count of active segments"""
+        if hasattr(obj, 'annotated_active_segments_count'):
+            return obj.annotated_active_segments_count
+        if 'segments' in getattr(obj, '_prefetched_objects_cache', {}):
+            return sum(1 for segment in obj.segments.all() if segment.is_active)
+        return obj.segments.filter(is_active=True).count()
+
+
+class DepartmentSerializer(SegmentCountsMixin, serializers.ModelSerializer):
     """Serializer for Department model"""
     
     segments = SegmentSerializer(many=True, read_only=True)
-    segments_count = serializers.IntegerField(source='segments.count', read_only=True)
+    segments_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Department
@@ -59,10 +86,10 @@ class DepartmentSerializer(serializers.ModelSerializer):
         return value.lower().strip()
 
 
-class DepartmentListSerializer(serializers.ModelSerializer):
+class DepartmentListSerializer(SegmentCountsMixin, serializers.ModelSerializer):
     """Lightweight serializer for department list"""
     
-    segments_count = serializers.IntegerField(source='segments.count', read_only=True)
+    segments_count = serializers.SerializerMethodField()
     active_segments_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -73,10 +100,6 @@ class DepartmentListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_active_segments_count(self, obj):
-        """Get count of active segments"""
-        return obj.segments.filter(is_active=True).count()
 
 
 class DepartmentCreateSerializer(serializers.ModelSerializer):
@@ -103,6 +126,28 @@ class DepartmentCreateSerializer(serializers.ModelSerializer):
         return department
 
 
+class CodeBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    List serializer used when buyer/vendor codes are created with many=True
+    Reserves one block of codes per tenant and inserts all rows with bulk_create
+    """
+    
+    def create(self, validated_data):
+        """Create all rows in a single transaction"""
+        request = self.context.get('request')
+        user = request.user if request else None
+        model = self.child.Meta.model
+        
+        instances = []
+        for attrs in validated_data:
+            # Get tenant from user if not provided
+            if 'tenant' not in attrs and user and user.tenant:
+                attrs['tenant'] = user.tenant
+            instances.append(model(created_by=user, **attrs))
+        
+        return model.objects.bulk_create_with_codes(instances, batch_size=BULK_CREATE_BATCH_SIZE)
+
+
 class BuyerCodeSerializer(serializers.ModelSerializer):
     """Serializer for BuyerCode model"""
     
@@ -113,6 +158,10 @@ class BuyerCodeSerializer(serializers.ModelSerializer):
             'retailer', 'tenant', 'created_at', 'updated_at', 'created_by'
         ]
         read_only_fields = ['id', 'code', 'created_at', 'updated_at']
+        # Codes come from the tenant's sequence, so (tenant, code) needs no
+        # unique-together check and tenant stays optional (defaults to the user's)
+        extra_kwargs = {'tenant': {'required': False}}
+        validators = []
     
     def validate_buyer_name(self, value):
         """Validate buyer name"""
@@ -149,6 +198,11 @@ class BuyerCodeCreateSerializer(serializers.ModelSerializer):
             'retailer', 'tenant'
         ]
         read_only_fields = ['id', 'code']
+        # Codes come from the tenant's sequence, so (tenant, code) needs no
+        # unique-together check and tenant stays optional (defaults to the user's)
+        extra_kwargs = {'tenant': {'required': False}}
+        validators = []
+        list_serializer_class = CodeBulkCreateListSerializer
     
     def validate_buyer_name(self, value):
         """Validate buyer name"""
@@ -216,6 +270,10 @@ class VendorCodeSerializer(serializers.ModelSerializer):
             'payment_terms', 'tenant', 'created_at', 'updated_at', 'created_by'
         ]
         read_only_fields = ['id', 'code', 'created_at', 'updated_at']
+        # Codes come from the tenant's sequence, so (tenant, code) needs no
+        # unique-together check and tenant stays optional (defaults to the user's)
+        extra_kwargs = {'tenant': {'required': False}}
+        validators = []
     
     def validate_gst(self, value):
         """Validate GST number format"""
@@ -326,6 +384,11 @@ class VendorCodeCreateSerializer(serializers.ModelSerializer):
             'payment_terms', 'tenant'
         ]
         read_only_fields = ['id', 'code']
+        # Codes come from the tenant's sequence, so (tenant, code) needs no
+        # unique-together check and tenant stays optional (defaults to the user's)
+        extra_kwargs = {'tenant': {'required': False}}
+        validators = []
+        list_serializer_class = CodeBulkCreateListSerializer
     
     def validate_gst(self, value):
         """Validate GST number format"""
@@ -448,3 +511,18 @@ class VendorCodeListSerializer(serializers.ModelSerializer):
             'contact_person', 'email', 'created_at'
         ]
         read_only_fields = ['id', 'code', 'created_at']
+
+
+class VendorImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for vendor import job progress"""
+    
+    progress = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = VendorImportJob
+        fields = [
+            'id', 'file_name', 'status', 'message', 'progress',
+            'total_rows', 'processed_rows', 'created_count', 'duplicate_count',
+            'error_count', 'errors', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
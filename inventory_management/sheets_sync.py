@@ -0,0 +1,381 @@
+"""
+Google Sheets <-> BuyerCode/VendorCode sync
+Mirrors a tenant's buyer and vendor codes into the Buyers and Vendors sheets
+and ingests edits made in the sheets, transferring only what changed:
+
+- DB -> sheet: rows with updated_at after the state's db_cursor are compared
+  with the hash stored for their code at the last sync; changed rows are
+  rewritten in place with one batch_update and new codes are added with one
+  append_rows.
+- sheet -> DB: the sheet is only downloaded when the spreadsheet's Drive
+  modifiedTime moved since the last sync. Rows whose hash differs from the
+  stored one were edited and are saved to the DB; rows without a code are
+  created (codes are allocated by the DB and written back to the sheet).
+  Codes the DB does not know are reported, not created.
+- Conflicts (a row changed on both sides since the last sync): the newer
+  change wins, comparing the row's updated_at with the spreadsheet's
+  modifiedTime (the Sheets API does not time individual rows).
+
+Deletions are not propagated in either direction. The state of each sheet is
+kept in SheetSyncState, and a sheet belongs to one tenant: codes repeat
+across tenants, so a run for another tenant is refused rather than allowed
+to overwrite its rows. Runs of the same tenant and sheet must not overlap;
+the sync_sheets command runs them one after another.
+
+Codes created for sheet rows are kept in the state, in the same transaction
+as the rows, until they are written back; a run that fails before then gives
+those rows the same codes next time instead of creating them again. Quota
+and server errors are retried with backoff like the service's write buffer
+(an append is only repeated once the sheet shows it was not applied).
+"""
+import hashlib
+from datetime import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from shared.google_sheets import sheets_service
+from .models import BuyerCode, SheetSyncState, VendorCode
+
+# Sheet columns after the mapped ones; written by the sync, never read back
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+
+# Rejected rows kept on the report for display (all rejections are counted)
+MAX_REPORTED_ERRORS = 50
+
+
+class SheetMapping(NamedTuple):
+    model: type
+    sheet_name: str
+    # (sheet column, model field), 'code' first
+    columns: tuple
+
+    @property
+    def fields(self):
+        return [field for _, field in self.columns]
+
+    @property
+    def default_header(self):
+        return [column for column, _ in self.columns] + list(TIMESTAMP_COLUMNS)
+
+
+BUYER_SHEET = SheetMapping(BuyerCode, 'Buyers', (
+    ('code', 'code'),
+    ('buyer_name', 'buyer_name'),
+    ('buyer_address', 'buyer_address'),
+    ('contact_person', 'contact_person'),
+    ('retailer', 'retailer'),
+))
+
+# Column names follow GoogleSheetsService.add_vendor
+VENDOR_SHEET = SheetMapping(VendorCode, 'Vendors', (
+    ('code', 'code'),
+    ('vendor_name', 'vendor_name'),
+    ('address', 'address'),
+    ('gst', 'gst'),
+    ('bank_name', 'bank_name'),
+    ('account_no', 'account_number'),
+    ('ifsc_code', 'ifsc_code'),
+    ('job_work_category', 'job_work_category'),
+    ('job_work_sub_category', 'job_work_sub_category'),
+    ('contact_person', 'contact_person'),
+    ('whatsapp_no', 'whatsapp_number'),
+    ('email', 'email'),
+    ('payment_terms', 'payment_terms'),
+))
+
+SHEET_MAPPINGS = {'buyers': BUYER_SHEET, 'vendors': VENDOR_SHEET}
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _row_hash(values):
+    return hashlib.sha1('\x1f'.join(values).encode()).hexdigest()
+
+
+def _content_hash(record):
+    """Hash of a sheet row without its code, to find it again before its code is written"""
+    return _row_hash(value for field, value in record.items() if field != 'code')
+
+
+def tenant_spreadsheet_id(tenant, sheet_name):
+    """The spreadsheet tenant's sheet is synced with (default: GOOGLE_SHEETS_SPREADSHEET_ID)"""
+    spreadsheet_id = (
+        SheetSyncState.objects.filter(tenant=tenant, sheet_name=sheet_name)
+        .order_by('-last_synced_at').values_list('spreadsheet_id', flat=True).first()
+    )
+    return spreadsheet_id or settings.GOOGLE_SHEETS_SPREADSHEET_ID
+
+
+def _parse_modified_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+class SyncReport:
+    """Counts of what one sync run moved"""
+
+    def __init__(self, sheet_name):
+        self.sheet_name = sheet_name
+        self.downloaded = False
+        self.pushed_updates = 0
+        self.pushed_new = 0
+        self.pulled_updates = 0
+        self.pulled_new = 0
+        self.conflicts_kept_db = 0
+        self.conflicts_kept_sheet = 0
+        self.unknown_codes = 0
+        self.error_count = 0
+        self.errors = []
+
+    def reject(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': message})
+
+    def as_dict(self):
+        return {key: value for key, value in vars(self).items()}
+
+
+class SheetSync:
+    """One sync run of a tenant's rows with one sheet"""
+
+    def __init__(self, tenant, mapping, service=None, spreadsheet_id=None):
+        self.tenant = tenant
+        self.mapping = mapping
+        self.service = service or sheets_service
+        self.spreadsheet_id = spreadsheet_id or tenant_spreadsheet_id(tenant, mapping.sheet_name)
+        self.report = SyncReport(mapping.sheet_name)
+
+    def run(self):
+        if not self.spreadsheet_id:
+            raise ValueError('No spreadsheet: pass one or set GOOGLE_SHEETS_SPREADSHEET_ID')
+        started = timezone.now()
+        state = self.get_state()
+        changed = {obj.code: obj for obj in self.changed_rows(state)}
+
+        modified_at = self.call('modifiedTime read', lambda: self.service.spreadsheet_modified_at(self.spreadsheet_id))
+        updates = {}
+        # Codes left pending by a failed run are written back whether or not the sheet moved
+        if modified_at != state.sheet_modified_at or not state.row_count or state.pending_codes:
+            self.report.downloaded = True
+            values = self.call('download', lambda: self.service.get_all_values(self.spreadsheet_id, self.mapping.sheet_name))
+            updates = self.pull(state, values, changed, _parse_modified_time(modified_at))
+
+        self.push(state, changed, updates)
+
+        # Our own writes move modifiedTime too, so the next run downloads the
+        # sheet once more and finds nothing to do; keeping the value read
+        # before writing means an edit made meanwhile is never skipped
+        state.db_cursor = started
+        state.sheet_modified_at = modified_at
+        state.pending_codes = {}
+        state.last_synced_at = timezone.now()
+        state.save()
+        return self.report
+
+    def get_state(self):
+        state, _ = SheetSyncState.objects.get_or_create(
+            spreadsheet_id=self.spreadsheet_id, sheet_name=self.mapping.sheet_name,
+            defaults={'tenant': self.tenant}
+        )
+        if state.tenant_id != self.tenant.pk:
+            raise ValueError(
+                f'Sheet {self.mapping.sheet_name} of spreadsheet {self.spreadsheet_id} is synced with '
+                f'another tenant; give each tenant its own spreadsheet'
+            )
+        return state
+
+    def call(self, description, operation):
+        """operation() (an idempotent API call), retried on quota and server errors"""
+        return self.service.writes.call_with_retry(operation, f'{description} of {self.mapping.sheet_name}')
+
+    def changed_rows(self, state):
+        queryset = self.mapping.model.objects.filter(tenant=self.tenant)
+        if state.db_cursor:
+            queryset = queryset.filter(updated_at__gt=state.db_cursor)
+        return queryset.order_by('created_at')
+
+    # Sheet side
+
+    def pull(self, state, values, changed, sheet_time):
+        """Apply rows edited in the sheet; returns rows to rewrite (number -> obj)"""
+        header = [_text(column) for column in values[0]] if values else []
+        if not header:
+            state.header, state.row_count, state.rows = self.mapping.default_header, 0, {}
+            return {}
+        state.header = header
+        state.row_count = len(values)
+        index = {column: position for position, column in enumerate(header)}
+        missing = [column for column, _ in self.mapping.columns if column not in index]
+        if missing:
+            raise ValueError(f"Sheet {self.mapping.sheet_name} is missing columns: {', '.join(missing)}")
+
+        known = {}
+        edited = {}
+        new_rows = []
+        for row_number, row in enumerate(values[1:], start=2):
+            record = {
+                field: _text(row[index[column]]) if index[column] < len(row) else ''
+                for column, field in self.mapping.columns
+            }
+            if not any(record.values()):
+                continue
+            code = record['code']
+            if not code:
+                new_rows.append((row_number, record))
+                continue
+            row_hash = _row_hash(record[field] for field in self.mapping.fields)
+            known[code] = [row_number, (state.rows.get(code) or [None, None])[1]]
+            if known[code][1] != row_hash:
+                edited[code] = (row_number, record, row_hash)
+        # Codes no longer in the sheet are forgotten: deletions are not synced,
+        # and a later DB change appends the row again
+        state.rows = known
+
+        rewrite = self.apply_edits(state, edited, changed, sheet_time)
+        rewrite.update(self.create_rows(state, new_rows))
+        return rewrite
+
+    def apply_edits(self, state, edited, changed, sheet_time):
+        if not edited:
+            return {}
+        model = self.mapping.model
+        existing = {obj.code: obj for obj in model.objects.filter(tenant=self.tenant, code__in=list(edited))}
+        fields = [field for field in self.mapping.fields if field != 'code']
+        saved = []
+        for code, (row_number, record, row_hash) in edited.items():
+            obj = existing.get(code)
+            if obj is None:
+                self.report.unknown_codes += 1
+                self.report.reject(row_number, f'Unknown code {code}; codes are allocated by the application')
+                continue
+            stored_hash = state.rows[code][1]
+            db_hash = self.db_hash(obj)
+            if db_hash == row_hash:
+                state.rows[code][1] = row_hash
+                continue
+            if code in changed and db_hash != stored_hash:
+                # Changed on both sides since the last sync (or never synced)
+                if sheet_time is None or obj.updated_at >= sheet_time:
+                    self.report.conflicts_kept_db += 1
+                    continue
+                self.report.conflicts_kept_sheet += 1
+            for field in fields:
+                setattr(obj, field, record[field])
+            try:
+                obj.full_clean(exclude=['tenant', 'created_by'], validate_unique=False)
+            except ValidationError as error:
+                self.report.reject(row_number, error.message_dict)
+                continue
+            saved.append((obj, row_number, row_hash))
+
+        with transaction.atomic():
+            for obj, _, _ in saved:
+                # save() rather than bulk_update: autocomplete follows post_save
+                obj.save(update_fields=fields + ['updated_at'])
+        for obj, row_number, row_hash in saved:
+            state.rows[obj.code] = [row_number, row_hash]
+            # Applied from the sheet; nothing to push back
+            changed.pop(obj.code, None)
+        self.report.pulled_updates += len(saved)
+        return {}
+
+    def create_rows(self, state, new_rows):
+        """Create rows added in the sheet without a code; returns their rows to rewrite"""
+        model = self.mapping.model
+        waiting = self.pending_objects(state)
+        rewrite = {}
+        pending = []
+        for row_number, record in new_rows:
+            content_hash = _content_hash(record)
+            if waiting.get(content_hash):
+                # Created by a run that failed before writing its code back
+                rewrite[row_number] = waiting[content_hash].pop(0)
+                continue
+            obj = model(tenant=self.tenant, **{field: value for field, value in record.items() if field != 'code'})
+            try:
+                obj.full_clean(exclude=['tenant', 'created_by', 'code'], validate_unique=False)
+            except ValidationError as error:
+                self.report.reject(row_number, error.message_dict)
+                continue
+            pending.append((row_number, content_hash, obj))
+        if not pending:
+            return rewrite
+        with transaction.atomic():
+            model.objects.bulk_create_with_codes([obj for _, _, obj in pending])
+            for _, content_hash, obj in pending:
+                state.pending_codes.setdefault(content_hash, []).append(obj.code)
+            state.save(update_fields=['pending_codes'])
+        self.report.pulled_new += len(pending)
+        # Written back with their codes; recorded in state by push()
+        rewrite.update((row_number, obj) for row_number, _, obj in pending)
+        return rewrite
+
+    def pending_objects(self, state):
+        """Rows created for codes still in state.pending_codes, by content hash"""
+        codes = [code for pending in state.pending_codes.values() for code in pending]
+        if not codes:
+            return {}
+        objects = {obj.code: obj for obj in self.mapping.model.objects.filter(tenant=self.tenant, code__in=codes)}
+        return {
+            content_hash: [objects[code] for code in pending if code in objects]
+            for content_hash, pending in state.pending_codes.items()
+        }
+
+    # DB side
+
+    def db_values(self, obj):
+        return [_text(getattr(obj, field)) for field in self.mapping.fields]
+
+    def db_hash(self, obj):
+        return _row_hash(self.db_values(obj))
+
+    def sheet_row(self, state, obj):
+        values = dict(zip([column for column, _ in self.mapping.columns], self.db_values(obj)))
+        values['created_at'] = obj.created_at.isoformat() if obj.created_at else ''
+        values['updated_at'] = obj.updated_at.isoformat() if obj.updated_at else ''
+        return [values.get(column, '') for column in state.header]
+
+    def push(self, state, changed, rewrite):
+        if not state.header:
+            state.header = self.mapping.default_header
+        updates = {}
+        appends = []
+        for row_number, obj in rewrite.items():
+            updates[row_number] = self.sheet_row(state, obj)
+            state.rows[obj.code] = [row_number, self.db_hash(obj)]
+            changed.pop(obj.code, None)
+        for code, obj in changed.items():
+            row_hash = self.db_hash(obj)
+            stored = state.rows.get(code)
+            if stored and stored[1] == row_hash:
+                continue
+            if stored:
+                updates[stored[0]] = self.sheet_row(state, obj)
+                state.rows[code] = [stored[0], row_hash]
+                self.report.pushed_updates += 1
+            else:
+                appends.append(self.sheet_row(state, obj))
+                state.rows[code] = [state.row_count + len(appends) + (0 if state.row_count else 1), row_hash]
+                self.report.pushed_new += 1
+
+        # Overwriting rows is idempotent; the append is checked before it is repeated
+        self.call('update', lambda: self.service.update_rows(self.spreadsheet_id, updates, self.mapping.sheet_name))
+        if appends:
+            if not state.row_count:
+                appends.insert(0, list(state.header))
+            self.service.writes.append_with_retry(self.spreadsheet_id, self.mapping.sheet_name, appends)
+            state.row_count += len(appends)
+
+
+def sync_tenant(tenant, mappings=None, service=None, spreadsheet_id=None):
+    """Sync each mapped sheet of tenant in turn; returns their SyncReports"""
+    return [
+        SheetSync(tenant, mapping, service=service, spreadsheet_id=spreadsheet_id).run()
+        for mapping in (mappings or SHEET_MAPPINGS.values())
+    ]
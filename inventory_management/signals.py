@@ -0,0 +1,48 @@
+"""
+Signal handlers for inventory_management
+Keeps the autocomplete indexes and the menu cache in step with writes
+Connected by InventoryManagementConfig.ready()
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from shared.cache import bump_version
+
+from .autocomplete import model_kind, registry as autocomplete_registry
+from .menu import MENU_VERSION
+from .models import codes_bulk_created
+
+
+@receiver(post_save, sender='inventory_management.BuyerCode')
+@receiver(post_save, sender='inventory_management.VendorCode')
+def update_autocomplete_on_save(sender, instance, **kwargs):
+    # Capture values now; the index is only updated once the write commits
+    kind, tenant_id = model_kind(sender), instance.tenant_id
+    record = autocomplete_registry.record_for(instance)
+    transaction.on_commit(lambda: autocomplete_registry.add(kind, tenant_id, record))
+
+
+@receiver(post_delete, sender='inventory_management.BuyerCode')
+@receiver(post_delete, sender='inventory_management.VendorCode')
+def update_autocomplete_on_delete(sender, instance, **kwargs):
+    kind, tenant_id, record_id = model_kind(sender), instance.tenant_id, str(instance.pk)
+    transaction.on_commit(lambda: autocomplete_registry.remove(kind, tenant_id, record_id))
+
+
+@receiver(codes_bulk_created)
+def update_autocomplete_on_bulk_create(sender, instances, **kwargs):
+    kind = model_kind(sender)
+    records = [(instance.tenant_id, autocomplete_registry.record_for(instance)) for instance in instances]
+    transaction.on_commit(lambda: autocomplete_registry.add_many(kind, records))
+
+
+@receiver(post_save, sender='inventory_management.Department')
+@receiver(post_save, sender='inventory_management.Segment')
+@receiver(post_delete, sender='inventory_management.Department')
+@receiver(post_delete, sender='inventory_management.Segment')
+def invalidate_menu(sender, **kwargs):
+    # Bumped again after commit so a menu rebuilt from the old rows while the
+    # transaction was open is not kept
+    bump_version(MENU_VERSION)
+    transaction.on_commit(lambda: bump_version(MENU_VERSION))
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DepartmentViewSet, SegmentViewSet, department_menu_structure,
-    BuyerCodeViewSet, VendorCodeViewSet
+    BuyerCodeViewSet, VendorCodeViewSet, code_autocomplete
 )
 
 # Create router and register viewsets
@@ -18,4 +18,5 @@ urlpatterns = [
     
     # Additional endpoints
     path('menu-structure/', department_menu_structure, name='department-menu-structure'),
+    path('autocomplete/', code_autocomplete, name='code-autocomplete'),
 ]
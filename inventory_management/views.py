@@ -5,22 +5,97 @@ from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.conf import settings
+import os
+import tempfile
+from django.db.models import Count, Q
+from django.utils.http import parse_etags
 
-from .models import Department, Segment, BuyerCode, VendorCode
+from .models import Department, Segment, BuyerCode, VendorCode, VendorImportJob
 from .serializers import (
     DepartmentSerializer, DepartmentListSerializer, DepartmentCreateSerializer,
     SegmentSerializer, SegmentDetailSerializer,
     BuyerCodeSerializer, BuyerCodeCreateSerializer, BuyerCodeListSerializer,
-    VendorCodeSerializer, VendorCodeCreateSerializer, VendorCodeListSerializer
+    VendorCodeSerializer, VendorCodeCreateSerializer, VendorCodeListSerializer,
+    VendorImportJobSerializer
 )
+from .importers import SUPPORTED_EXTENSIONS, start_import_in_background
+from .search import apply_search
+from .menu import get_menu
+from .autocomplete import KINDS as AUTOCOMPLETE_KINDS, DEFAULT_LIMIT as AUTOCOMPLETE_LIMIT, autocomplete
+from auth_service.permission_engine import has_permission
+from shared.pagination import OptionalCursorPagination
+from shared.permissions import HasPermission
+from shared.tenancy import TenantScopeMixin, current_scope, scope_for_user
+from shared.streaming import (
+    EXPORT_RENDERER_CLASSES, STREAM_FORMATS, empty_if_none, iso_or_none,
+    iter_records, streaming_export
+)
+
+
+# Fields searched with icontains when the full-text index is not installed
+BUYER_SEARCH_FIELDS = ('buyer_name', 'code', 'retailer', 'contact_person')
+VENDOR_SEARCH_FIELDS = ('vendor_name', 'code', 'gst', 'contact_person', 'email', 'job_work_category')
+
+# Master sheet columns: (output key, model field[, converter])
+BUYER_MASTER_SHEET_COLUMNS = [
+    ('code', 'code'),
+    ('buyerName', 'buyer_name'),
+    ('buyerAddress', 'buyer_address'),
+    ('contactPerson', 'contact_person'),
+    ('retailer', 'retailer'),
+    ('createdAt', 'created_at', iso_or_none),
+]
+
+VENDOR_MASTER_SHEET_COLUMNS = [
+    ('code', 'code'),
+    ('vendorName', 'vendor_name'),
+    ('address', 'address'),
+    ('gst', 'gst'),
+    ('bankName', 'bank_name'),
+    ('accNo', 'account_number'),
+    ('ifscCode', 'ifsc_code'),
+    ('jobWorkCategory', 'job_work_category'),
+    ('jobWorkSubCategory', 'job_work_sub_category'),
+    ('contactPerson', 'contact_person'),
+    ('whatsappNo', 'whatsapp_number'),
+    ('altWhatsappNo', 'alt_whatsapp_number', empty_if_none),
+    ('email', 'email'),
+    ('paymentTerms', 'payment_terms'),
+    ('createdAt', 'created_at', iso_or_none),
+]
+
+
+def bulk_row_errors(errors):
+    """
+    Convert many=True serializer errors into a list of invalid rows
+    e.g. [{'row': 3, 'errors': {'gst': [...]}}]; list-level errors pass through
+    """
+    if isinstance(errors, dict):
+        return [{'row': None, 'errors': errors}]
+    return [
+        {'row': index, 'errors': row_errors}
+        for index, row_errors in enumerate(errors)
+        if row_errors
+    ]
 
 
-class DepartmentViewSet(ModelViewSet):
+def bulk_rows(data):
+    """Accept either a JSON list or {"items": [...]} as a bulk request body"""
+    if isinstance(data, dict) and 'items' in data:
+        return data['items']
+    return data
+
+
+class DepartmentViewSet(TenantScopeMixin, ModelViewSet):
     """
     ViewSet for Department CRUD operations
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission('ims', resource='departments')]
+    permission_actions = {
+        'segments': ('ims', 'view', 'segments'),
+        'add_segment': ('ims', 'create', 'segments'),
+    }
     queryset = Department.objects.all()
     
     def get_serializer_class(self):
@@ -32,15 +107,8 @@ class DepartmentViewSet(ModelViewSet):
         return DepartmentSerializer
     
     def get_queryset(self):
-        """Filter departments based on tenant if user is not master admin"""
-        queryset = Department.objects.all()
-        
-        # Filter by tenant if user is not master admin
-        user = self.request.user
-        if not user.is_master_admin and user.tenant:
-            queryset = queryset.filter(
-                Q(tenant=user.tenant) | Q(tenant__isnull=True)
-            )
+        """Departments of the user's tenant plus shared ones"""
+        queryset = Department.objects.scoped()
         
         # Filter by active status if requested
         is_active = self.request.query_params.get('is_active')
@@ -56,7 +124,16 @@ class DepartmentViewSet(ModelViewSet):
                 Q(description__icontains=search)
             )
         
-        return queryset.select_related('tenant', 'created_by').prefetch_related('segments')
+        # Segment counts come from the same query; only the detail views
+        # render the segments themselves. Meta.ordering is not applied to
+        # GROUP BY queries, so order explicitly.
+        queryset = queryset.annotate(
+            annotated_segments_count=Count('segments'),
+            annotated_active_segments_count=Count('segments', filter=Q(segments__is_active=True))
+        ).order_by('display_order', 'name')
+        if self.action == 'list':
+            return queryset
+        return queryset.prefetch_related('segments')
     
     def perform_create(self, serializer):
         """Set created_by to current user"""
@@ -94,11 +171,11 @@ class DepartmentViewSet(ModelViewSet):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SegmentViewSet(ModelViewSet):
+class SegmentViewSet(TenantScopeMixin, ModelViewSet):
     """
     ViewSet for Segment CRUD operations
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission('ims', resource='segments')]
     queryset = Segment.objects.all()
     serializer_class = SegmentSerializer
     
@@ -110,7 +187,7 @@ class SegmentViewSet(ModelViewSet):
     
     def get_queryset(self):
         """Filter segments based on department and tenant"""
-        queryset = Segment.objects.all()
+        queryset = Segment.objects.scoped()
         
         # Filter by department if provided
         department_id = self.request.query_params.get('department')
@@ -122,13 +199,6 @@ class SegmentViewSet(ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
-        # Filter by tenant if user is not master admin
-        user = self.request.user
-        if not user.is_master_admin and user.tenant:
-            queryset = queryset.filter(
-                Q(department__tenant=user.tenant) | Q(department__tenant__isnull=True)
-            )
-        
         # Search functionality
         search = self.request.query_params.get('search')
         if search:
@@ -199,42 +269,75 @@ def department_menu_structure(request):
     """
     Get complete department menu structure with segments
     Useful for frontend menu rendering
+
+    Served from the menu cache with a strong ETag; send it back in
+    If-None-Match to get 304 Not Modified while the menu is unchanged
     """
-    departments = Department.objects.filter(is_active=True).prefetch_related(
-        'segments'
-    ).order_by('display_order', 'name')
-    
-    menu_data = []
-    for dept in departments:
-        segments = dept.segments.filter(is_active=True).order_by('display_order', 'name')
-        menu_data.append({
-            'id': str(dept.id),
-            'code': dept.code,
-            'label': dept.name,
-            'hasSubMenu': segments.exists(),
-            'segments': [
-                {
-                    'id': str(seg.id),
-                    'code': seg.code,
-                    'label': seg.name
-                }
-                for seg in segments
-            ]
+    menu_data, etag = get_menu(scope_for_user(request.user))
+
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response({
+            'status': 'success',
+            'data': menu_data
         })
+    response['ETag'] = etag
+    # Let browsers keep the menu but revalidate it on every use
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def code_autocomplete(request):
+    """
+    Typeahead for buyer and vendor pickers
+    GET /api/ims/autocomplete/?kind=vendor&q=abc&limit=10
+    Matches the start of the name, any word of the name, the code and (for
+    vendors) the GST number, served from an in-memory index per tenant
+    """
+    kind = request.query_params.get('kind')
+    if kind not in AUTOCOMPLETE_KINDS:
+        return Response({
+            'status': 'error',
+            'message': f'kind must be one of: {", ".join(AUTOCOMPLETE_KINDS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    
+    user = request.user
+    if not has_permission(user, 'ims', 'view', f'{kind}_codes'):
+        return Response({
+            'status': 'error',
+            'message': 'You do not have permission to view these codes'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    results = autocomplete(kind, request.query_params.get('q', ''), scope_for_user(user), limit=limit)
     
     return Response({
         'status': 'success',
-        'data': menu_data
+        'data': results,
+        'count': len(results)
     })
 
-
-class BuyerCodeViewSet(ModelViewSet):
+class BuyerCodeViewSet(TenantScopeMixin, ModelViewSet):
     """
     ViewSet for BuyerCode CRUD operations
     Handles buyer code generation with auto-incrementing codes (101A, 102A, etc.)
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission('ims', resource='buyer_codes')]
+    permission_actions = {
+        'generate': 'create',
+        'master_sheet': ('master_sheets', 'view', 'buyer_master'),
+    }
     queryset = BuyerCode.objects.all()
+    pagination_class = OptionalCursorPagination
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -245,22 +348,21 @@ class BuyerCodeViewSet(ModelViewSet):
         return BuyerCodeSerializer
     
     def get_queryset(self):
-        """Filter buyer codes based on tenant if user is not master admin"""
-        queryset = BuyerCode.objects.all()
-        
-        # Filter by tenant if user is not master admin
-        user = self.request.user
-        if not user.is_master_admin and user.tenant:
-            queryset = queryset.filter(tenant=user.tenant)
+        """Buyer codes of the user's tenant (all tenants for master admins)"""
+        queryset = BuyerCode.objects.scoped()
         
-        # Search functionality
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(buyer_name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(retailer__icontains=search) |
-                Q(contact_person__icontains=search)
+            # Search functionality (full-text index, ranked by relevance);
+            # apply_search limits matches to the tenant itself, so give it
+            # the unfiltered queryset
+            scope = current_scope()
+            if scope.tenant_id:
+                queryset = BuyerCode.objects.all()
+            queryset = apply_search(
+                queryset, search,
+                tenant_id=scope.tenant_id,
+                fallback_fields=BUYER_SEARCH_FIELDS
             )
         
         return queryset.select_related('tenant', 'created_by')
@@ -310,6 +412,40 @@ class BuyerCodeViewSet(ModelViewSet):
             'message': f'Buyer code {code} deleted successfully'
         }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create many buyer codes in one request
+        Rows are validated together; if any row is invalid nothing is created and
+        the per-row errors are returned. Otherwise codes are reserved as one block
+        and all rows are inserted with bulk_create in a single transaction.
+        """
+        serializer = BuyerCodeCreateSerializer(
+            data=bulk_rows(request.data),
+            many=True,
+            allow_empty=False,
+            max_length=settings.CODE_BULK_CREATE_MAX_ROWS,
+            context=self.get_serializer_context()
+        )
+        
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'message': 'Failed to create buyer codes',
+                'data': {
+                    'errors': bulk_row_errors(serializer.errors)
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        buyer_codes = serializer.save()
+        
+        return Response({
+            'status': 'success',
+            'message': f'{len(buyer_codes)} buyer codes generated successfully',
+            'data': BuyerCodeSerializer(buyer_codes, many=True).data,
+            'count': len(buyer_codes)
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def generate(self, request):
         """
@@ -328,25 +464,22 @@ class BuyerCodeViewSet(ModelViewSet):
             }
         })
     
-    @action(detail=False, methods=['get'], url_path='master-sheet')
+    @action(detail=False, methods=['get'], url_path='master-sheet',
+            renderer_classes=EXPORT_RENDERER_CLASSES)
     def master_sheet(self, request):
         """
         Get all buyer codes in master sheet format
-        Returns all buyer codes formatted for frontend master sheet display
+        Returns all buyer codes formatted for frontend master sheet display.
+        Use ?format=ndjson|csv|json-stream to stream large sheets row by row.
         """
         queryset = self.get_queryset()
         
+        export_format = request.accepted_renderer.format
+        if export_format in STREAM_FORMATS:
+            return streaming_export(queryset, BUYER_MASTER_SHEET_COLUMNS, export_format, 'buyer-codes')
+        
         # Format data for frontend
-        buyer_codes = []
-        for buyer in queryset:
-            buyer_codes.append({
-                'code': buyer.code,
-                'buyerName': buyer.buyer_name,
-                'buyerAddress': buyer.buyer_address,
-                'contactPerson': buyer.contact_person,
-                'retailer': buyer.retailer,
-                'createdAt': buyer.created_at.isoformat() if buyer.created_at else None
-            })
+        buyer_codes = list(iter_records(queryset, BUYER_MASTER_SHEET_COLUMNS))
         
         return Response({
             'status': 'success',
@@ -355,13 +488,19 @@ class BuyerCodeViewSet(ModelViewSet):
         })
 
 
-class VendorCodeViewSet(ModelViewSet):
+class VendorCodeViewSet(TenantScopeMixin, ModelViewSet):
     """
     ViewSet for VendorCode CRUD operations
     Handles vendor code generation with auto-incrementing numeric codes (101, 102, etc.)
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasPermission('ims', resource='vendor_codes')]
+    permission_actions = {
+        'generate': 'create',
+        'import_status': 'create',
+        'master_sheet': ('master_sheets', 'view', 'vendor_master'),
+    }
     queryset = VendorCode.objects.all()
+    pagination_class = OptionalCursorPagination
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -372,24 +511,21 @@ class VendorCodeViewSet(ModelViewSet):
         return VendorCodeSerializer
     
     def get_queryset(self):
-        """Filter vendor codes based on tenant if user is not master admin"""
-        queryset = VendorCode.objects.all()
-        
-        # Filter by tenant if user is not master admin
-        user = self.request.user
-        if not user.is_master_admin and user.tenant:
-            queryset = queryset.filter(tenant=user.tenant)
+        """Vendor codes of the user's tenant (all tenants for master admins)"""
+        queryset = VendorCode.objects.scoped()
         
-        # Search functionality
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(vendor_name__icontains=search) |
-                Q(code__icontains=search) |
-                Q(gst__icontains=search) |
-                Q(contact_person__icontains=search) |
-                Q(email__icontains=search) |
-                Q(job_work_category__icontains=search)
+            # Search functionality (full-text index, ranked by relevance);
+            # apply_search limits matches to the tenant itself, so give it
+            # the unfiltered queryset
+            scope = current_scope()
+            if scope.tenant_id:
+                queryset = VendorCode.objects.all()
+            queryset = apply_search(
+                queryset, search,
+                tenant_id=scope.tenant_id,
+                fallback_fields=VENDOR_SEARCH_FIELDS
             )
         
         return queryset.select_related('tenant', 'created_by')
@@ -439,6 +575,94 @@ class VendorCodeViewSet(ModelViewSet):
             'message': f'Vendor code {code} deleted successfully'
         }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create many vendor codes in one request
+        Rows are validated together; if any row is invalid nothing is created and
+        the per-row errors are returned. Otherwise codes are reserved as one block
+        and all rows are inserted with bulk_create in a single transaction.
+        """
+        serializer = VendorCodeCreateSerializer(
+            data=bulk_rows(request.data),
+            many=True,
+            allow_empty=False,
+            max_length=settings.CODE_BULK_CREATE_MAX_ROWS,
+            context=self.get_serializer_context()
+        )
+        
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'message': 'Failed to create vendor codes',
+                'data': {
+                    'errors': bulk_row_errors(serializer.errors)
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        vendor_codes = serializer.save()
+        
+        return Response({
+            'status': 'success',
+            'message': f'{len(vendor_codes)} vendor codes generated successfully',
+            'data': VendorCodeSerializer(vendor_codes, many=True).data,
+            'count': len(vendor_codes)
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """
+        Import vendors from an uploaded CSV/XLSX spreadsheet
+        The file is processed on a background thread; poll the returned job id
+        at /api/ims/vendor-codes/import/{job_id}/ for progress
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({
+                'status': 'error',
+                'message': 'A CSV or XLSX file is required in the "file" field'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        extension = os.path.splitext(upload.name)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            return Response({
+                'status': 'error',
+                'message': f'Unsupported file type "{extension}". Upload a .csv or .xlsx file.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Spool the upload to disk in chunks so large files never sit in memory
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+        
+        user = request.user
+        job = VendorImportJob.objects.create(
+            file_name=upload.name,
+            tenant=user.tenant,
+            created_by=user
+        )
+        start_import_in_background(job, destination.name)
+        
+        return Response({
+            'status': 'success',
+            'message': 'Vendor import started',
+            'data': VendorImportJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>[0-9a-f-]+)')
+    def import_status(self, request, job_id=None):
+        """Get progress of a vendor import job"""
+        jobs = VendorImportJob.objects.all()
+        user = request.user
+        if not user.is_master_admin:
+            jobs = jobs.filter(tenant_id=user.tenant_id)
+        job = get_object_or_404(jobs, pk=job_id)
+        
+        return Response({
+            'status': 'success',
+            'data': VendorImportJobSerializer(job).data
+        })
+    
     @action(detail=False, methods=['get'])
     def generate(self, request):
         """
@@ -457,34 +681,22 @@ class VendorCodeViewSet(ModelViewSet):
             }
         })
     
-    @action(detail=False, methods=['get'], url_path='master-sheet')
+    @action(detail=False, methods=['get'], url_path='master-sheet',
+            renderer_classes=EXPORT_RENDERER_CLASSES)
     def master_sheet(self, request):
         """
         Get all vendor codes in master sheet format
-        Returns all vendor codes formatted for frontend master sheet display
+        Returns all vendor codes formatted for frontend master sheet display.
+        Use ?format=ndjson|csv|json-stream to stream large sheets row by row.
         """
         queryset = self.get_queryset()
         
+        export_format = request.accepted_renderer.format
+        if export_format in STREAM_FORMATS:
+            return streaming_export(queryset, VENDOR_MASTER_SHEET_COLUMNS, export_format, 'vendor-codes')
+        
         # Format data for frontend
-        vendor_codes = []
-        for vendor in queryset:
-            vendor_codes.append({
-                'code': vendor.code,
-                'vendorName': vendor.vendor_name,
-                'address': vendor.address,
-                'gst': vendor.gst,
-                'bankName': vendor.bank_name,
-                'accNo': vendor.account_number,
-                'ifscCode': vendor.ifsc_code,
-                'jobWorkCategory': vendor.job_work_category,
-                'jobWorkSubCategory': vendor.job_work_sub_category,
-                'contactPerson': vendor.contact_person,
-                'whatsappNo': vendor.whatsapp_number,
-                'altWhatsappNo': vendor.alt_whatsapp_number or '',
-                'email': vendor.email,
-                'paymentTerms': vendor.payment_terms,
-                'createdAt': vendor.created_at.isoformat() if vendor.created_at else None
-            })
+        vendor_codes = list(iter_records(queryset, VENDOR_MASTER_SHEET_COLUMNS))
         
         return Response({
             'status': 'success',
@@ -2,8 +2,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db import connection
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import cache, caches
+import logging
 import time
+import uuid
+
+logger = logging.getLogger(__name__)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -29,17 +34,30 @@ def detailed_health(request):
         with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
         health_status['checks']['database'] = 'healthy'
-    except Exception as e:
-        health_status['checks']['database'] = f'unhealthy: {str(e)}'
+    except Exception:
+        logger.exception('Health check: database unavailable')
+        health_status['checks']['database'] = 'unhealthy'
         health_status['status'] = 'degraded'
     
-    # Cache check
+    # Cache check, against the shared cache (L2) so the local L1 cannot answer
     try:
-        cache.set('health_check', 'ok', 10)
-        cache_value = cache.get('health_check')
-        health_status['checks']['cache'] = 'healthy' if cache_value == 'ok' else 'unhealthy'
-    except Exception as e:
-        health_status['checks']['cache'] = f'unhealthy: {str(e)}'
+        shared_cache = caches['shared']
+        token = uuid.uuid4().hex
+        shared_cache.set('health_check', token, 10)
+        cache_value = shared_cache.get('health_check')
+        health_status['checks']['cache'] = 'healthy' if cache_value == token else 'unhealthy'
+    except Exception:
+        logger.exception('Health check: cache unavailable')
+        health_status['checks']['cache'] = 'unhealthy'
         health_status['status'] = 'degraded'
     
+    # Cache backend and hit/miss counters are for master admins only; the
+    # public response is up/down
+    user = request.user
+    if user.is_authenticated and user.is_master_admin:
+        health_status['cache'] = {
+            'backend': settings.CACHE_BACKEND,
+            'stats': cache.stats() if hasattr(cache, 'stats') else None
+        }
+    
     return Response(health_status)
@@ -0,0 +1,143 @@
+"""
+In-process batching queue
+Requests put() items on a bounded queue and return; a background thread
+hands them to a flush function in batches of up to batch_size, at least
+every interval seconds. Used to take write-only side effects (audit rows)
+off the request path.
+
+Items are only held in memory, so the queue drains itself at interpreter
+exit (gunicorn's graceful shutdown exits the worker normally) and when
+close() is called. A full queue flushes on the caller's thread rather than
+dropping items. A failing flush is retried with backoff (a transient error
+such as SQLite's "database is locked"); a batch that still fails is written
+item by item, so only the items that fail on their own are dropped and one
+bad row cannot wedge the queue.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections, connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingQueue:
+    """Bounded queue flushed in batches from a background thread"""
+
+    def __init__(self, flush, name, max_size=10000, batch_size=500, interval=1.0, max_attempts=4, backoff=0.25):
+        self.flush_batch = flush
+        self.name = name
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.flush_lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.queue = None
+        self.stopping = None
+        self.wake = None
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Started lazily, and again in a forked worker: threads do not survive fork
+        if self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.max_size)
+            self.stopping = threading.Event()
+            self.wake = threading.Event()
+            self.thread = threading.Thread(target=self._run, name=f'{self.name}-flusher', daemon=True)
+            self.pid = os.getpid()
+            self.thread.start()
+
+    def put(self, item):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(item)
+            if self.queue.qsize() >= self.batch_size:
+                self.wake.set()
+        except queue.Full:
+            logger.warning('%s queue full, flushing on the request thread', self.name)
+            self.flush()
+            self.flush_batch([item])
+
+    def _drain(self, limit):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def flush(self):
+        """Write everything queued so far; returns the number of items"""
+        if self.pid != os.getpid():
+            return 0
+        flushed = 0
+        with self.flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return flushed
+                self._write(batch)
+                flushed += len(batch)
+
+    def _write(self, batch):
+        for attempt in range(self.max_attempts):
+            try:
+                self.flush_batch(batch)
+                return
+            except Exception:
+                if attempt + 1 == self.max_attempts:
+                    break
+                logger.warning('%s: flush of %s failed, retrying', self.name, len(batch), exc_info=True)
+                time.sleep(self.backoff * 2 ** attempt)
+
+        if len(batch) == 1:
+            logger.exception('%s: dropped an item after %s failed flushes', self.name, self.max_attempts)
+            return
+        # Find the items that cannot be written; write the rest
+        dropped = 0
+        for item in batch:
+            try:
+                self.flush_batch([item])
+            except Exception:
+                dropped += 1
+                logger.exception('%s: dropped an item that failed on its own', self.name)
+        if dropped:
+            logger.error('%s: dropped %s of a batch of %s', self.name, dropped, len(batch))
+
+    def _run(self):
+        try:
+            while not self.stopping.is_set():
+                self.wake.wait(self.interval)
+                self.wake.clear()
+                close_old_connections()
+                self.flush()
+        finally:
+            connection.close()
+
+    def pending(self):
+        return self.queue.qsize() if self.pid == os.getpid() else 0
+
+    def close(self, timeout=10):
+        """Stop the background thread and write what is left"""
+        if self.pid != os.getpid():
+            return
+        self.stopping.set()
+        self.wake.set()
+        self.thread.join(timeout)
+        self.flush()
+        # A later put() starts a new thread
+        self.pid = None
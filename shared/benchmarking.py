@@ -0,0 +1,85 @@
+"""
+Helpers for the benchmark management commands
+Runs benchmarks against a throwaway copy of the configured database
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import (
+    setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment
+)
+
+
+@contextmanager
+def isolated_database(verbosity=0):
+    """
+    Create a temporary test database (with migrations applied) for a benchmark
+
+    SQLite test databases default to shared in-memory databases, which use
+    table-level locking and fail under concurrent writers. Point them at a
+    temporary file instead so threads behave like real workers.
+    """
+    temp_dir = tempfile.mkdtemp(prefix='binder-bench-')
+    for alias in connections:
+        settings_dict = connections[alias].settings_dict
+        if settings_dict['ENGINE'].endswith('sqlite3'):
+            settings_dict.setdefault('TEST', {})
+            settings_dict['TEST']['NAME'] = os.path.join(temp_dir, f'{alias}.sqlite3')
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+class LatencyRecorder:
+    """Collects request latencies (in seconds) in completion order"""
+
+    def __init__(self):
+        self.samples = []
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - started)
+
+    def windows(self, count):
+        """Split samples into `count` consecutive windows"""
+        size = max(1, len(self.samples) // count)
+        return [self.samples[i:i + size] for i in range(0, size * count, size) if self.samples[i:i + size]]
+
+
+def summarize(samples):
+    """Return p50/p95/p99/max latency in milliseconds"""
+    if not samples:
+        return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    p99_index = min(len(ordered) - 1, int(len(ordered) * 0.99))
+    return {
+        'count': len(ordered),
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[p95_index] * 1000,
+        'p99_ms': ordered[p99_index] * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def format_summary(label, samples):
+    """One-line latency summary for command output"""
+    stats = summarize(samples)
+    return (
+        f"{label}: n={stats['count']} p50={stats['p50_ms']:.2f}ms "
+        f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms max={stats['max_ms']:.2f}ms"
+    )
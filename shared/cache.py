@@ -0,0 +1,51 @@
+"""
+Cache helpers
+Versioned keys: readers put a version number in their cache keys and writers
+bump the version instead of hunting down every key to delete. Entries for old
+versions are never read again and simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def _fresh_version():
+    # Time-based, so a version evicted from the cache never restarts at a
+    # number that old entries were stored under
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    """Current version of a namespace"""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*names):
+    """Current versions of several namespaces, in one cache round trip"""
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    return [
+        found[key] if key in found else get_version(name)
+        for name, key in zip(names, keys)
+    ]
+
+
+def bump_version(name):
+    """Invalidate everything cached under a namespace"""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Not set yet (or evicted): any fresh value differs from the old one
+        version = _fresh_version()
+        cache.set(key, version, timeout=None)
+        return version
@@ -0,0 +1,353 @@
+"""
+Cache backends
+- SQLiteCache:  a cache shared by every worker on the host, kept in its own
+                SQLite file (WAL mode), so no outside service is needed
+- TieredCache:  a small in-process LRU (L1) in front of another configured
+                cache (L2), with hit/miss counters
+
+L1 entries live for at most L1_TIMEOUT seconds, which bounds how long another
+worker's write can go unseen. Keys starting with one of L1_BYPASS_PREFIXES
+(the version counters of shared/cache.py by default) are always read from L2,
+so anything cached under versioned keys is invalidated across workers as soon
+as the version is bumped.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Cache stored in a SQLite file; LOCATION is the file path"""
+
+    # Expired and excess rows are culled on every CULL_EVERY-th write
+    CULL_EVERY = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, statements):
+        """Run statements in one write transaction; returns the last cursor"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in statements:
+                cursor = connection.execute(sql, params)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        self._writes += 1
+        if self._writes % self.CULL_EVERY == 0:
+            self._cull()
+        return cursor
+
+    def _cull(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),))
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()
+        if count > self._max_entries:
+            # Drop the entries closest to expiring (forever entries last)
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                'SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency if self._cull_frequency else count,)
+            )
+
+    def _set_statement(self, key, value, timeout):
+        return (
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout))
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        _, params = self._set_statement(key, value, timeout)
+        cursor = self._write([
+            ('DELETE FROM cache_entries WHERE key = ? AND expires <= ?', (key, time.time())),
+            ('INSERT OR IGNORE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', params),
+        ])
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        made = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not made:
+            return {}
+        rows = self._connection().execute(
+            'SELECT key, value FROM cache_entries WHERE key IN (%s) AND (expires IS NULL OR expires > ?)'
+            % ', '.join('?' * len(made)),
+            (*made, time.time())
+        ).fetchall()
+        return {made[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write([self._set_statement(key, value, timeout)])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._write([
+                self._set_statement(self.make_and_validate_key(key, version=version), value, timeout)
+                for key, value in data.items()
+            ])
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._write([(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )])
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        # Read and write under one write lock, so concurrent increments add up
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write([('DELETE FROM cache_entries WHERE key = ?', (key,))]).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._write([
+                ('DELETE FROM cache_entries WHERE key IN (%s)' % ', '.join('?' * len(keys)), keys)
+            ])
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone() is not None
+
+    def clear(self):
+        self._write([('DELETE FROM cache_entries', ())])
+
+    def close(self, **kwargs):
+        # Connections are kept open per thread between requests
+        pass
+
+
+class TieredCache(BaseCache):
+    """
+    In-process LRU (L1) in front of another cache alias (L2)
+    OPTIONS: L2_CACHE (alias, required), L1_MAX_ENTRIES, L1_TIMEOUT,
+    L1_BYPASS_PREFIXES. Values are pickled in L1, as in LocMemCache, so
+    callers never share mutable objects.
+    """
+
+    _missing = object()
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options['L2_CACHE']
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 5))
+        self._bypass_prefixes = tuple(options.get('L1_BYPASS_PREFIXES', ('version:',)))
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(('l1_hits', 'l2_hits', 'misses', 'sets'), 0)
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        """Hit/miss counters of this process since it started"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['l1_entries'] = len(self._l1)
+        reads = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['l1_hits'] + stats['l2_hits']) / reads, 4) if reads else None
+        return stats
+
+    # L1
+
+    def _l1_key(self, key, version):
+        if key.startswith(self._bypass_prefixes):
+            return None
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_get(self, l1_key):
+        with self._lock:
+            entry = self._l1.get(l1_key)
+            if entry is None:
+                return None
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del self._l1[l1_key]
+                return None
+            self._l1.move_to_end(l1_key)
+        return entry
+
+    def _l1_set(self, l1_key, value, timeout):
+        if l1_key is None:
+            return
+        lifetime = self._l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            lifetime = min(lifetime, timeout)
+        if lifetime <= 0:
+            self._l1_delete(l1_key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[l1_key] = (time.monotonic() + lifetime, pickled)
+            self._l1.move_to_end(l1_key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, *l1_keys):
+        with self._lock:
+            for l1_key in l1_keys:
+                self._l1.pop(l1_key, None)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            entry = self._l1_get(l1_key)
+            if entry is not None:
+                self._count('l1_hits')
+                return pickle.loads(entry[1])
+        value = self.l2.get(key, self._missing, version=version)
+        if value is self._missing:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._l1_set(l1_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            l1_key = self._l1_key(key, version)
+            entry = self._l1_get(l1_key) if l1_key is not None else None
+            if entry is None:
+                remaining.append(key)
+            else:
+                found[key] = pickle.loads(entry[1])
+        self._count('l1_hits', len(found))
+        if remaining:
+            from_l2 = self.l2.get_many(remaining, version=version)
+            self._count('l2_hits', len(from_l2))
+            self._count('misses', len(remaining) - len(from_l2))
+            for key, value in from_l2.items():
+                self._l1_set(self._l1_key(key, version), value, DEFAULT_TIMEOUT)
+            found.update(from_l2)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._count('sets')
+        self._l1_set(self._l1_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version)
+        self._count('sets', len(data))
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(self._l1_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._count('sets')
+            self._l1_set(self._l1_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            self._l1_delete(l1_key)
+        return self.l2.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            self._l1_delete(l1_key)
+        return self.l2.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self._l1_delete(*filter(None, (self._l1_key(key, version) for key in keys)))
+        self.l2.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None and self._l1_get(l1_key) is not None:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
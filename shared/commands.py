@@ -0,0 +1,21 @@
+"""
+Helpers shared by management commands
+"""
+from django.core.management.base import CommandError
+
+
+def get_tenant(value):
+    """Resolve a --tenant option by company name or id (None when not given)"""
+    from auth_service.models import Tenant
+
+    if not value:
+        return None
+    tenant = Tenant.objects.filter(company_name=value).first()
+    if tenant is None:
+        try:
+            tenant = Tenant.objects.filter(pk=value).first()
+        except Exception:
+            tenant = None
+    if tenant is None:
+        raise CommandError(f'Tenant "{value}" not found')
+    return tenant
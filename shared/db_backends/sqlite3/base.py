@@ -0,0 +1,74 @@
+"""
+SQLite backend with connection PRAGMAs and a configurable transaction mode
+Django's backend passes every OPTIONS entry to sqlite3.connect(), so the
+settings this backend understands are taken out first and applied as
+PRAGMAs on each new connection:
+    'OPTIONS': {
+        'journal_mode': 'WAL',      # readers run while a writer commits
+        'synchronous': 'NORMAL',    # with WAL: fsync at checkpoints, not every commit
+        'busy_timeout': 5000,       # ms to wait for the write lock before "database is locked"
+        'cache_size': -65536,       # page cache per connection (negative: KiB)
+        'mmap_size': 268435456,     # bytes of the file read through mmap
+        'transaction_mode': 'DEFERRED',
+    }
+
+transaction_mode is the BEGIN used by transaction.atomic(). With DEFERRED a
+transaction that reads before it writes has to upgrade its lock, and when
+another connection is already writing the upgrade fails at once with
+"database is locked" instead of waiting busy_timeout. IMMEDIATE takes the
+write lock at BEGIN. shared.transactions.immediate_atomic() asks for it on
+one write path without changing every transaction.
+"""
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+
+PRAGMA_OPTIONS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    transaction_mode = 'DEFERRED'
+    # Set by immediate_atomic() for the transaction it is about to begin
+    begin_immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {}
+        for name in PRAGMA_OPTIONS:
+            value = params.pop(name, None)
+            if value is not None:
+                self.pragmas[name] = value
+        self.transaction_mode = str(params.pop('transaction_mode', 'DEFERRED')).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}, not '{self.transaction_mode}'"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if name == 'journal_mode':
+                self._set_journal_mode(conn, value)
+            else:
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    @staticmethod
+    def _set_journal_mode(conn, mode):
+        # The journal mode is stored in the file. Switching it needs the
+        # database to itself, so only switch when it differs, and leave it to
+        # a later connection if other workers are busy right now.
+        current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if current.lower() == str(mode).lower():
+            return
+        try:
+            conn.execute(f'PRAGMA journal_mode = {mode}')
+        except Database.OperationalError:
+            pass
+
+    def _start_transaction_under_autocommit(self):
+        mode = 'IMMEDIATE' if self.begin_immediate else self.transaction_mode
+        self.cursor().execute(f'BEGIN {mode}')
@@ -0,0 +1,245 @@
+"""
+Read-replica routing
+With a replica configured (DATABASE_REPLICA_URL, or DB_REPLICA_NAME for the
+SQLite profile; see binder_config/database.py), reads of auth_service and
+inventory_management models go to it when:
+- the request is a safe method (GET/HEAD/OPTIONS), or
+- the queryset was tagged with on_replica(), or the code runs in
+  use_replica()
+Everything else (writes, unsafe requests, management commands, reads inside
+a transaction) uses the primary.
+
+Read-your-writes: a request that writes pins its client to the primary for
+REPLICA_PIN_SECONDS, through a cookie (browsers) and a per-user flag in the
+shared cache (API clients), and the rest of the writing request reads from
+the primary too. The replica is skipped while its lag exceeds
+REPLICA_MAX_LAG seconds or it cannot be reached; both are checked at most
+every REPLICA_CHECK_INTERVAL seconds per process.
+
+Code that refills a cache after an invalidation should read in
+use_primary(), so a lagging replica cannot put stale rows in the cache
+under the new version.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+
+ROUTED_APPS = ('auth_service', 'inventory_management')
+
+PIN_COOKIE = 'db_pin'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadState:
+    """How the current request (or block) reads"""
+
+    __slots__ = ('use_replica', 'pinned', 'wrote', 'request')
+
+    def __init__(self, use_replica, pinned=None, request=None):
+        self.use_replica = use_replica
+        # None: not known yet (the user is authenticated inside the view)
+        self.pinned = pinned
+        self.wrote = False
+        self.request = request
+
+
+_read_state = ContextVar('read_state', default=None)
+
+
+def _pin_key(user_id):
+    return f'db_pin:{user_id}'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in connections.settings
+
+
+class ReplicaHealth:
+    """Per-process, rate-limited check of replica lag and reachability"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = 0.0
+        self.healthy = False
+
+    def is_healthy(self):
+        now = time.monotonic()
+        if now - self.checked_at < _setting('REPLICA_CHECK_INTERVAL', 5):
+            return self.healthy
+        with self.lock:
+            if now - self.checked_at >= _setting('REPLICA_CHECK_INTERVAL', 5):
+                self.healthy = self.check()
+                self.checked_at = time.monotonic()
+        return self.healthy
+
+    def check(self):
+        try:
+            lag = measure_lag(connections[REPLICA_ALIAS])
+        except Exception:
+            logger.warning('Read replica unreachable, reading from the primary', exc_info=True)
+            return False
+        if lag is not None and lag > _setting('REPLICA_MAX_LAG', 5):
+            logger.warning('Read replica %.1fs behind, reading from the primary', lag)
+            return False
+        return True
+
+    def reset(self):
+        self.checked_at = 0.0
+
+
+replica_health = ReplicaHealth()
+
+
+def measure_lag(replica):
+    """Seconds the replica is behind (None: not a streaming replica)"""
+    with replica.cursor() as cursor:
+        if replica.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT CASE WHEN pg_is_in_recovery() '
+                'THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+            )
+            return cursor.fetchone()[0]
+        cursor.execute('SELECT 1')
+        return None
+
+
+def _user_pinned(request):
+    # DRF replaces request.user once it authenticates; before that it is
+    # the session middleware's lazy user, which would cost a query
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    if not user.is_authenticated:
+        return False
+    return bool(cache.get(_pin_key(user.pk)))
+
+
+def _pinned(state):
+    if state.pinned is None and state.request is not None:
+        pinned = _user_pinned(state.request)
+        if pinned is not None:
+            state.pinned = pinned
+    return bool(state.pinned)
+
+
+class ReplicaRouter:
+    """Database router sending eligible reads to the replica"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS or not replica_configured():
+            return None
+        state = _read_state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or _pinned(state):
+            return DEFAULT_DB_ALIAS
+        if not replica_health.is_healthy():
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _read_state.get()
+        if state is not None:
+            # Reads after a write in the same request must see it
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+@contextmanager
+def _reading(state):
+    token = _read_state.set(state)
+    try:
+        yield state
+    finally:
+        _read_state.reset(token)
+
+
+def _streamed_in(state, content):
+    """Iterate a streaming response's content with the request's read state"""
+    iterator = iter(content)
+    while True:
+        # Set per chunk: the server iterates outside the middleware's block
+        with _reading(state):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def use_replica():
+    """Read from the replica (when healthy) inside this block"""
+    return _reading(ReadState(use_replica=True, pinned=False))
+
+
+def use_primary():
+    """Read from the primary inside this block"""
+    return _reading(ReadState(use_replica=False))
+
+
+def on_replica(queryset):
+    """Tag a read-only queryset to run on the replica (when healthy)"""
+    if queryset.model._meta.app_label not in ROUTED_APPS or not replica_configured():
+        return queryset
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block or not replica_health.is_healthy():
+        return queryset.using(DEFAULT_DB_ALIAS)
+    return queryset.using(REPLICA_ALIAS)
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests' reads to the replica and pin writers to the primary"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        pinned = True if request.COOKIES.get(PIN_COOKIE) else None
+        with _reading(ReadState(use_replica=safe, pinned=pinned, request=request)) as state:
+            response = self.get_response(request)
+
+        if response.streaming and not getattr(response, 'is_async', False):
+            # Streamed exports run their queries after get_response returns
+            response.streaming_content = _streamed_in(state, response.streaming_content)
+        if not safe or state.wrote:
+            self.pin(request, response)
+        return response
+
+    def pin(self, request, response):
+        seconds = _setting('REPLICA_PIN_SECONDS', 5)
+        response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        user = request.__dict__.get('user')
+        if user is not None and not isinstance(user, SimpleLazyObject) and user.is_authenticated:
+            cache.set(_pin_key(user.pk), True, seconds)
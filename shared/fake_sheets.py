@@ -0,0 +1,168 @@
+"""
+In-memory stand-in for a gspread client
+Lets tests and benchmarks exercise GoogleSheetsService without
+credentials or network access:
+    client = FakeSheetsClient({'sheet-id': {'Buyers': [['code', 'buyer_name'], ['B1', 'Acme']]}})
+    service = GoogleSheetsService(client=client)
+Every call that would be a Sheets API request is counted in client.calls
+(and per request, see shared.google_sheets.track_api_calls) and sleeps for
+`latency` seconds, so caching and batching can be measured.
+client.fail_next(2, status_code=429) makes the next two calls fail the way
+gspread reports quota errors; with applied=True a write is made before its
+error is raised, as when Google applies a request and then fails to answer.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from .google_sheets import SpreadsheetNotFound, WorksheetNotFound
+
+
+class _FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeAPIError(Exception):
+    """Carries response.status_code like gspread.exceptions.APIError"""
+
+    def __init__(self, status_code):
+        super().__init__(f'Fake Sheets API error {status_code}')
+        self.response = _FakeResponse(status_code)
+
+
+class FakeSheetsClient:
+    """Fake of gspread.Client holding spreadsheets as lists of rows"""
+
+    def __init__(self, spreadsheets=None, latency=0.0):
+        # {spreadsheet_id: {sheet_name: [header, row, ...]}}
+        self.spreadsheets = spreadsheets or {}
+        self.latency = latency
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.failures = []
+        # Set by GoogleSheetsService.instrument()
+        self.on_api_call = None
+        # Drive modifiedTime per spreadsheet, advanced by every write
+        self.modified = {}
+        self.clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def touch(self, key):
+        """Record a change to spreadsheet key (call after editing rows directly)"""
+        with self.lock:
+            self.clock += timedelta(seconds=1)
+            self.modified[key] = self.clock.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def fail_next(self, count, status_code=429, applied=False):
+        with self.lock:
+            self.failures.extend([(status_code, applied)] * count)
+
+    def api_call(self, name, write=False):
+        """Count a call; returns the status code a write raises once applied"""
+        with self.lock:
+            self.calls[name] += 1
+            failure = self.failures.pop(0) if self.failures else None
+        if self.on_api_call:
+            self.on_api_call()
+        if failure and not (write and failure[1]):
+            raise FakeAPIError(failure[0])
+        if self.latency:
+            time.sleep(self.latency)
+        return failure[0] if failure else None
+
+    def written(self, key, failure):
+        """Finish a write to spreadsheet key"""
+        self.touch(key)
+        if failure:
+            raise FakeAPIError(failure)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def open_by_key(self, key):
+        self.api_call('open_by_key')
+        if key not in self.spreadsheets:
+            raise SpreadsheetNotFound(key)
+        return FakeSpreadsheet(self, key)
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, key):
+        self.client = client
+        self.id = key
+
+    def worksheet(self, title):
+        self.client.api_call('worksheet')
+        if title not in self.client.spreadsheets[self.id]:
+            raise WorksheetNotFound(title)
+        return FakeWorksheet(self.client, self.id, title)
+
+    def get_lastUpdateTime(self):
+        self.client.api_call('get_lastUpdateTime')
+        if self.id not in self.client.modified:
+            self.client.touch(self.id)
+        return self.client.modified[self.id]
+
+
+class FakeWorksheet:
+    def __init__(self, client, spreadsheet_id, title):
+        self.client = client
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+
+    @property
+    def rows(self):
+        try:
+            return self.client.spreadsheets[self.spreadsheet_id][self.title]
+        except KeyError:
+            raise WorksheetNotFound(self.title)
+
+    def get_all_values(self):
+        self.client.api_call('get_all_values')
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        self.client.api_call('get_all_records')
+        rows = self.rows
+        if not rows:
+            return []
+        header = rows[0]
+        return [
+            {column: (row[index] if index < len(row) else '') for index, column in enumerate(header)}
+            for row in rows[1:]
+        ]
+
+    def append_row(self, values, **kwargs):
+        failure = self.client.api_call('append_row', write=True)
+        self.rows.append(list(values))
+        self.client.written(self.spreadsheet_id, failure)
+
+    def append_rows(self, values, **kwargs):
+        failure = self.client.api_call('append_rows', write=True)
+        self.rows.extend(list(row) for row in values)
+        self.client.written(self.spreadsheet_id, failure)
+
+    def batch_update(self, data, **kwargs):
+        """Whole-row updates: [{'range': 'A5:F5', 'values': [[...]]}, ...]"""
+        failure = self.client.api_call('batch_update', write=True)
+        rows = self.rows
+        for update in data:
+            start = int(re.match(r'[A-Z]+(\d+)', update['range']).group(1))
+            for offset, values in enumerate(update['values']):
+                while len(rows) < start + offset:
+                    rows.append([])
+                rows[start + offset - 1] = list(values)
+        self.client.written(self.spreadsheet_id, failure)
+
+    def update_cell(self, row, col, value):
+        failure = self.client.api_call('update_cell', write=True)
+        rows = self.rows
+        while len(rows) < row:
+            rows.append([])
+        cells = rows[row - 1]
+        while len(cells) < col:
+            cells.append('')
+        cells[col - 1] = value
+        self.client.written(self.spreadsheet_id, failure)
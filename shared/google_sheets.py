@@ -1,23 +1,494 @@
-# import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from django.conf import settings
+"""
+Google Sheets integration
+Reads go through SheetRecordsCache: records are kept per
+(spreadsheet_id, sheet_name) for GOOGLE_SHEETS_CACHE_TTL seconds, then
+served stale for up to GOOGLE_SHEETS_CACHE_STALE more seconds while one
+background thread refetches them. Concurrent misses for the same sheet share
+one fetch, and the least recently used sheets are evicted beyond
+GOOGLE_SHEETS_CACHE_MAX_ENTRIES. Writes through this service invalidate the
+sheet they change. The cache is per process, like the autocomplete index.
+
+Rows added through add_buyer/add_vendor/add_factory are written behind
+(SheetsWriteBuffer): queued with a receipt id and appended per worksheet with
+one append_rows call, at least every GOOGLE_SHEETS_WRITE_INTERVAL seconds.
+Quota and server errors are retried with exponential backoff; a full queue
+makes the caller flush (backpressure), and the queue drains at process exit.
+Receipt states (pending, written, failed) are kept in the shared cache so any
+worker can report them.
+
+Opened spreadsheets and worksheets are kept in WorksheetHandles for
+GOOGLE_SHEETS_HANDLE_TTL seconds and shared by all threads, so an operation
+costs one API call instead of three (open_by_key and worksheet() each fetch
+the spreadsheet metadata). A handle is dropped and reopened once when the API
+reports the worksheet gone. The single client keeps one HTTP session with
+keep-alive connections (GOOGLE_SHEETS_HTTP_POOL_SIZE per host), and expired
+credentials are refreshed by one thread at a time.
+
+Sheets API calls are counted per request: SheetsApiCallsMiddleware adds them
+to the response as X-Sheets-API-Calls.
+
+gspread and oauth2client are optional: without them (or without
+credentials) the service has no client and reads return no records.
+Pass client= (e.g. shared.fake_sheets.FakeSheetsClient) to use another client.
+"""
+import logging
 import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .batching import BatchingQueue
+
+try:
+    import gspread
+    from gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+    from oauth2client.service_account import ServiceAccountCredentials
+    from requests.adapters import HTTPAdapter
+except ImportError:  # Google Sheets support is optional
+    gspread = None
+    ServiceAccountCredentials = None
+    HTTPAdapter = None
+
+    class SpreadsheetNotFound(Exception):
+        pass
+
+    class WorksheetNotFound(Exception):
+        pass
+
+
+logger = logging.getLogger(__name__)
+
+SHEETS_API_CALLS_HEADER = 'X-Sheets-API-Calls'
+
+_request_api_calls = ContextVar('sheets_api_calls', default=None)
+
+
+class ApiCallCounter:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+
+def count_api_call(*args, **kwargs):
+    """Count one Sheets API call for the current request (also a requests hook)"""
+    counter = _request_api_calls.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def track_api_calls():
+    """Count the Sheets API calls made in this block"""
+    counter = ApiCallCounter()
+    token = _request_api_calls.set(counter)
+    try:
+        yield counter
+    finally:
+        _request_api_calls.reset(token)
+
+
+class SheetsApiCallsMiddleware:
+    """Report the Sheets API calls a request made in X-Sheets-API-Calls"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_api_calls() as counter:
+            response = self.get_response(request)
+        if counter.count or request.path.startswith('/api/sheets/'):
+            response[SHEETS_API_CALLS_HEADER] = str(counter.count)
+        return response
+
+
+class SheetUnavailable(Exception):
+    """The worksheet could not be opened; nothing is cached"""
+
+
+def _is_stale_handle(error):
+    # Deleted or renamed worksheets: gspread raises WorksheetNotFound when
+    # opening them, and the API answers 400 (unparsable range) or 404 when a
+    # kept handle is used
+    if isinstance(error, (SpreadsheetNotFound, WorksheetNotFound)):
+        return True
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) in (400, 404)
+
+
+def _column_letter(number):
+    """Column letter(s) for a 1-based column number (1 -> A, 27 -> AA)"""
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters or 'A'
+
+
+class WorksheetHandles:
+    """Thread-safe cache of opened spreadsheet and worksheet objects"""
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.spreadsheets = {}
+        self.worksheets = {}
+
+    def _get(self, handles, key):
+        with self.lock:
+            entry = handles.get(key)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            return None
+
+    def _put(self, handles, key, handle):
+        if self.ttl > 0:
+            with self.lock:
+                handles[key] = (handle, time.monotonic())
+
+    def spreadsheet(self, client, spreadsheet_id):
+        handle = self._get(self.spreadsheets, spreadsheet_id)
+        if handle is None:
+            handle = client.open_by_key(spreadsheet_id)
+            self._put(self.spreadsheets, spreadsheet_id, handle)
+        return handle
+
+    def worksheet(self, client, spreadsheet_id, sheet_name):
+        key = (spreadsheet_id, sheet_name)
+        handle = self._get(self.worksheets, key)
+        if handle is None:
+            kept = self._get(self.spreadsheets, spreadsheet_id) is not None
+            try:
+                handle = self.spreadsheet(client, spreadsheet_id).worksheet(sheet_name)
+            except WorksheetNotFound:
+                # A kept spreadsheet may predate the worksheet
+                if not kept:
+                    raise
+                self.invalidate(spreadsheet_id)
+                handle = self.spreadsheet(client, spreadsheet_id).worksheet(sheet_name)
+            self._put(self.worksheets, key, handle)
+        return handle
+
+    def invalidate(self, spreadsheet_id, sheet_name=None):
+        with self.lock:
+            if sheet_name is None:
+                self.spreadsheets.pop(spreadsheet_id, None)
+            for key in list(self.worksheets):
+                if key[0] == spreadsheet_id and sheet_name in (None, key[1]):
+                    del self.worksheets[key]
+
+
+class _CacheEntry:
+    __slots__ = ('records', 'fetched_at')
+
+    def __init__(self, records, fetched_at):
+        self.records = records
+        self.fetched_at = fetched_at
+
+
+class SheetRecordsCache:
+    """Per-process read-through cache of worksheet records"""
+
+    def __init__(self, ttl=60, stale_ttl=300, max_entries=32):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # key -> Event set when the fetch in progress for that key finishes
+        self.loading = {}
+        self.refreshing = set()
+        self.hits = self.stale_hits = self.misses = self.refreshes = 0
+        # Bumped by invalidate(); a fetch that started before the last
+        # invalidation of its key (or spreadsheet) must not be stored
+        self.generation = 0
+        self.invalidated = {}
+
+    def get(self, key, loader):
+        """Records for key, loading them with loader() when missing or expired"""
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                age = time.monotonic() - entry.fetched_at if entry else None
+                if entry and age < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.records
+                if entry and age < self.ttl + self.stale_ttl:
+                    self.entries.move_to_end(key)
+                    self.stale_hits += 1
+                    self._refresh_in_background(key, loader)
+                    return entry.records
+                waiting = self.loading.get(key)
+                if waiting is None:
+                    # This thread fetches; others for the same key wait for it
+                    done = self.loading[key] = threading.Event()
+                    generation = self.generation
+                    self.misses += 1
+                    break
+            waiting.wait()
+            # Loop: the fetch stored the records, or failed and the next
+            # waiter tries again
+
+        try:
+            records = loader()
+            self.store(key, records, generation)
+            return records
+        finally:
+            with self.lock:
+                del self.loading[key]
+            done.set()
+
+    def _refresh_in_background(self, key, loader):
+        # Called with self.lock held
+        if key in self.refreshing or key in self.loading:
+            return
+        self.refreshing.add(key)
+        self.refreshes += 1
+        threading.Thread(target=self._refresh, args=(key, loader, self.generation), daemon=True).start()
+
+    def _refresh(self, key, loader, generation):
+        try:
+            self.store(key, loader(), generation)
+        except Exception:
+            logger.warning('Background refresh of sheet %s failed; serving stale records', key, exc_info=True)
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def store(self, key, records, generation=None):
+        """Cache records for key; generation is self.generation when their fetch began"""
+        with self.lock:
+            if generation is not None and generation < max(
+                self.invalidated.get(key, 0), self.invalidated.get(key[0], 0)
+            ):
+                # Fetched before a write to the sheet: the next read fetches again
+                return
+            self.entries[key] = _CacheEntry(records, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, spreadsheet_id, sheet_name=None):
+        with self.lock:
+            self.generation += 1
+            self.invalidated[spreadsheet_id if sheet_name is None else (spreadsheet_id, sheet_name)] = self.generation
+            for key in list(self.entries):
+                if key[0] == spreadsheet_id and sheet_name in (None, key[1]):
+                    del self.entries[key]
+
+    def age(self, key):
+        """Seconds since key was fetched (None when not cached)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return time.monotonic() - entry.fetched_at if entry else None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'background_refreshes': self.refreshes,
+            }
+
+
+# Responses worth retrying: quota exceeded and transient server errors.
+# A 429 is refused before anything is written; after a server error the
+# append may have been applied, so the sheet is checked before retrying.
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+REJECTED_STATUS_CODES = (429,)
+
+RECEIPT_TIMEOUT = 60 * 60 * 24
+
+
+def _receipts():
+    # The shared tier directly: receipts are set by the flushing thread and
+    # read by request threads, which must not see a per-thread L1 copy
+    return caches['shared']
+
+
+def _receipt_key(receipt_id):
+    return f'sheets_write:{receipt_id}'
+
+
+def get_write_status(receipt_id):
+    """pending, written or failed (None: unknown or expired receipt)"""
+    return _receipts().get(_receipt_key(receipt_id))
+
+
+def _status_code(error):
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def _is_retryable(error):
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def _row_text(values):
+    cells = ['' if value is None else str(value) for value in values]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
+
+
+class PendingRow(NamedTuple):
+    receipt_id: str
+    spreadsheet_id: str
+    sheet_name: str
+    values: list
+
+
+class SheetsWriteBuffer:
+    """Write-behind buffer appending queued rows per worksheet"""
+
+    def __init__(self, service, max_size=5000, batch_size=200, interval=2.0, max_attempts=5, backoff=1.0):
+        self.service = service
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.queue = BatchingQueue(
+            self.write_rows, name='sheets-writes',
+            max_size=max_size, batch_size=batch_size, interval=interval
+        )
+
+    def append(self, spreadsheet_id, values, sheet_name):
+        """Queue a row; returns its receipt id"""
+        receipt_id = uuid.uuid4().hex
+        _receipts().set(_receipt_key(receipt_id), 'pending', RECEIPT_TIMEOUT)
+        self.queue.put(PendingRow(receipt_id, spreadsheet_id, sheet_name, list(values)))
+        return receipt_id
+
+    def write_rows(self, rows):
+        # Never raises: the queue retries a flush that raises, which would
+        # append rows that are already in the sheet again
+        worksheets = OrderedDict()
+        for row in rows:
+            worksheets.setdefault((row.spreadsheet_id, row.sheet_name), []).append(row)
+        for (spreadsheet_id, sheet_name), pending in worksheets.items():
+            try:
+                self.append_with_retry(spreadsheet_id, sheet_name, [row.values for row in pending])
+                status = 'written'
+            except Exception:
+                logger.exception('Dropped %s rows for sheet %s after failed appends', len(pending), sheet_name)
+                status = 'failed'
+            self.store_receipts(pending, status)
+
+    @staticmethod
+    def store_receipts(rows, status):
+        try:
+            _receipts().set_many({_receipt_key(row.receipt_id): status for row in rows}, RECEIPT_TIMEOUT)
+        except Exception:
+            # The rows are settled either way; their receipts stay 'pending' until they expire
+            logger.exception('Could not store %s write receipts as %s', len(rows), status)
+
+    def append_with_retry(self, spreadsheet_id, sheet_name, values):
+        # Set once an attempt may have been applied despite its error
+        unconfirmed = False
+        for attempt in range(self.max_attempts):
+            try:
+                if unconfirmed and self.already_appended(spreadsheet_id, sheet_name, values):
+                    return None
+                return self.service.append_rows(spreadsheet_id, values, sheet_name)
+            except Exception as error:
+                if not _is_retryable(error) or attempt == self.max_attempts - 1:
+                    raise
+                unconfirmed = unconfirmed or _status_code(error) not in REJECTED_STATUS_CODES
+                delay = self.delay(attempt)
+                logger.warning('Sheets append to %s failed (%s), retrying in %.1fs', sheet_name, error, delay)
+                time.sleep(delay)
+
+    def call_with_retry(self, operation, description):
+        """
+        operation() retried on quota and server errors like appends; only for
+        idempotent calls (reads, overwriting rows), which are safe to repeat
+        even when a failed attempt was applied
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return operation()
+            except Exception as error:
+                if not _is_retryable(error) or attempt == self.max_attempts - 1:
+                    raise
+                delay = self.delay(attempt)
+                logger.warning('Sheets %s failed (%s), retrying in %.1fs', description, error, delay)
+                time.sleep(delay)
+
+    def delay(self, attempt):
+        # Exponential backoff with jitter, so workers do not retry in step
+        return self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+
+    def already_appended(self, spreadsheet_id, sheet_name, values):
+        """
+        Whether a failed append was applied anyway (append_rows is not
+        idempotent): after a server error, look for the rows in the sheet
+        """
+        wanted = [_row_text(row) for row in values]
+        rows = [_row_text(row) for row in self.service.get_all_values(spreadsheet_id, sheet_name)]
+        found = any(
+            rows[start:start + len(wanted)] == wanted
+            for start in range(len(rows) - len(wanted), -1, -1)
+        )
+        if found:
+            logger.warning('Sheets append to %s was applied despite the error; not retrying', sheet_name)
+        return found
+
+    def flush(self):
+        """Write every queued row now; returns the number of rows"""
+        return self.queue.flush()
+
+    def pending(self):
+        return self.queue.pending()
+
 
 class GoogleSheetsService:
     """Service for Google Sheets integration"""
     
-    def __init__(self):
+    def __init__(self, client=None, records_cache=None):
         self.scope = [
             'https://spreadsheets.google.com/feeds',
             'https://www.googleapis.com/auth/drive'
         ]
         self.credentials = None
-        self.client = None
-        self.initialize()
+        self.client = client
+        self.handles = WorksheetHandles(ttl=getattr(settings, 'GOOGLE_SHEETS_HANDLE_TTL', 600))
+        self.refresh_lock = threading.Lock()
+        self.cache = records_cache or SheetRecordsCache(
+            ttl=getattr(settings, 'GOOGLE_SHEETS_CACHE_TTL', 60),
+            stale_ttl=getattr(settings, 'GOOGLE_SHEETS_CACHE_STALE', 300),
+            max_entries=getattr(settings, 'GOOGLE_SHEETS_CACHE_MAX_ENTRIES', 32),
+        )
+        self.writes = SheetsWriteBuffer(
+            self,
+            max_size=getattr(settings, 'GOOGLE_SHEETS_WRITE_QUEUE_SIZE', 5000),
+            batch_size=getattr(settings, 'GOOGLE_SHEETS_WRITE_BATCH_SIZE', 200),
+            interval=getattr(settings, 'GOOGLE_SHEETS_WRITE_INTERVAL', 2.0),
+            max_attempts=getattr(settings, 'GOOGLE_SHEETS_WRITE_ATTEMPTS', 5),
+        )
+        if client is None:
+            self.initialize()
+        else:
+            self.instrument(client)
     
     def initialize(self):
         """Initialize Google Sheets client"""
         try:
+            if gspread is None:
+                print("Google Sheets: gspread not installed, skipping")
+                return
+            
             # Skip if credentials file doesn't exist
             if not os.path.exists(settings.GOOGLE_SHEETS_CREDENTIALS_FILE):
                 print("Google Sheets: credentials.json not found, skipping")
@@ -28,42 +499,141 @@ class GoogleSheetsService:
                 self.scope
             )
             self.client = gspread.authorize(self.credentials)
+            # One keep-alive session for all threads; size its pool to match
+            pool_size = getattr(settings, 'GOOGLE_SHEETS_HTTP_POOL_SIZE', 10)
+            self.client.session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+            self.instrument(self.client)
         except Exception as e:
             print(f"Error initializing Google Sheets: {e}")
     
+    @staticmethod
+    def instrument(client):
+        """Count client API calls per request (see track_api_calls)"""
+        session = getattr(client, 'session', None)
+        if session is not None:
+            session.hooks['response'].append(count_api_call)
+        else:
+            # shared.fake_sheets.FakeSheetsClient
+            client.on_api_call = count_api_call
+    
+    def refresh_credentials(self):
+        """Refresh expired credentials once, rather than in every thread"""
+        auth = getattr(self.client, 'auth', None)
+        if auth is None or getattr(auth, 'valid', True):
+            return
+        with self.refresh_lock:
+            if not auth.valid:
+                self.client.login()
+    
+    def open_worksheet(self, spreadsheet_id, sheet_name='Sheet1'):
+        """Get worksheet (a kept handle when there is one), raising on errors"""
+        if not self.client:
+            raise Exception("Google Sheets client not initialized")
+        self.refresh_credentials()
+        return self.handles.worksheet(self.client, spreadsheet_id, sheet_name)
+    
+    def run(self, spreadsheet_id, sheet_name, worksheet, operation):
+        """Call operation(worksheet), reopening the worksheet once if its handle is stale"""
+        try:
+            return operation(worksheet)
+        except Exception as error:
+            if not _is_stale_handle(error):
+                raise
+            self.handles.invalidate(spreadsheet_id, sheet_name)
+            return operation(self.open_worksheet(spreadsheet_id, sheet_name))
+    
     def get_sheet(self, spreadsheet_id, sheet_name='Sheet1'):
         """Get worksheet"""
         try:
-            if not self.client:
-                raise Exception("Google Sheets client not initialized")
-                
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            worksheet = spreadsheet.worksheet(sheet_name)
-            return worksheet
+            return self.open_worksheet(spreadsheet_id, sheet_name)
         except Exception as e:
             print(f"Error getting sheet: {e}")
             return None
     
-    def get_all_records(self, spreadsheet_id, sheet_name='Sheet1'):
-        """Get all records from sheet"""
+    def fetch_records(self, spreadsheet_id, sheet_name='Sheet1'):
+        """Download all records from sheet, bypassing the cache"""
         worksheet = self.get_sheet(spreadsheet_id, sheet_name)
-        if worksheet:
-            return worksheet.get_all_records()
-        return []
+        if not worksheet:
+            raise SheetUnavailable(sheet_name)
+        try:
+            return self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.get_all_records())
+        except (SpreadsheetNotFound, WorksheetNotFound):
+            raise SheetUnavailable(sheet_name)
+    
+    def get_all_records(self, spreadsheet_id, sheet_name='Sheet1'):
+        """Get all records from sheet (cached)"""
+        try:
+            return self.cache.get(
+                (spreadsheet_id, sheet_name),
+                lambda: self.fetch_records(spreadsheet_id, sheet_name)
+            )
+        except SheetUnavailable:
+            return []
+    
+    def records_age(self, spreadsheet_id, sheet_name='Sheet1'):
+        """Seconds since the cached records for sheet were fetched"""
+        return self.cache.age((spreadsheet_id, sheet_name))
     
     def append_row(self, spreadsheet_id, values, sheet_name='Sheet1'):
         """Append row to sheet"""
         worksheet = self.get_sheet(spreadsheet_id, sheet_name)
         if worksheet:
-            worksheet.append_row(values)
+            self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.append_row(values))
+            self.cache.invalidate(spreadsheet_id, sheet_name)
             return True
         return False
     
+    def append_rows(self, spreadsheet_id, rows, sheet_name='Sheet1'):
+        """Append rows to sheet in one request, raising on errors"""
+        worksheet = self.open_worksheet(spreadsheet_id, sheet_name)
+        self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.append_rows(rows))
+        self.cache.invalidate(spreadsheet_id, sheet_name)
+    
+    def get_all_values(self, spreadsheet_id, sheet_name='Sheet1'):
+        """All cells of sheet as lists of strings, uncached, raising on errors"""
+        worksheet = self.open_worksheet(spreadsheet_id, sheet_name)
+        return self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.get_all_values())
+    
+    def update_rows(self, spreadsheet_id, rows, sheet_name='Sheet1'):
+        """Overwrite whole rows in one request: rows maps row number to values"""
+        if not rows:
+            return
+        data = [
+            {'range': f'A{number}:{_column_letter(len(values))}{number}', 'values': [list(values)]}
+            for number, values in sorted(rows.items())
+        ]
+        worksheet = self.open_worksheet(spreadsheet_id, sheet_name)
+        self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.batch_update(data))
+        self.cache.invalidate(spreadsheet_id, sheet_name)
+    
+    def spreadsheet_modified_at(self, spreadsheet_id):
+        """Drive modifiedTime of the spreadsheet (ISO 8601, UTC), raising on errors"""
+        if not self.client:
+            raise Exception("Google Sheets client not initialized")
+        self.refresh_credentials()
+        return self.handles.spreadsheet(self.client, spreadsheet_id).get_lastUpdateTime()
+    
+    def write_row(self, spreadsheet_id, values, sheet_name='Sheet1'):
+        """
+        Add a row, returning a write receipt id (None when it failed)
+        Written behind by self.writes unless GOOGLE_SHEETS_WRITE_BEHIND is off
+        """
+        if not self.client:
+            return None
+        if getattr(settings, 'GOOGLE_SHEETS_WRITE_BEHIND', True):
+            return self.writes.append(spreadsheet_id, values, sheet_name)
+        if not self.append_row(spreadsheet_id, values, sheet_name):
+            return None
+        receipt_id = uuid.uuid4().hex
+        _receipts().set(_receipt_key(receipt_id), 'written', RECEIPT_TIMEOUT)
+        return receipt_id
+    
     def update_cell(self, spreadsheet_id, row, col, value, sheet_name='Sheet1'):
         """Update specific cell"""
         worksheet = self.get_sheet(spreadsheet_id, sheet_name)
         if worksheet:
-            worksheet.update_cell(row, col, value)
+            self.run(spreadsheet_id, sheet_name, worksheet, lambda ws: ws.update_cell(row, col, value))
+            self.cache.invalidate(spreadsheet_id, sheet_name)
             return True
         return False
     
@@ -72,7 +642,7 @@ class GoogleSheetsService:
         return self.get_all_records(spreadsheet_id, 'Buyers')
     
     def add_buyer(self, spreadsheet_id, buyer_data):
-        """Add buyer to Buyers sheet"""
+        """Add buyer to Buyers sheet (returns a write receipt id)"""
         values = [
             buyer_data.get('code', ''),
             buyer_data.get('buyer_name', ''),
@@ -81,14 +651,14 @@ class GoogleSheetsService:
             buyer_data.get('retailer', ''),
             buyer_data.get('created_at', '')
         ]
-        return self.append_row(spreadsheet_id, values, 'Buyers')
+        return self.write_row(spreadsheet_id, values, 'Buyers')
     
     def get_vendors(self, spreadsheet_id):
         """Get all vendors from Vendors sheet"""
         return self.get_all_records(spreadsheet_id, 'Vendors')
     
     def add_vendor(self, spreadsheet_id, vendor_data):
-        """Add vendor to Vendors sheet"""
+        """Add vendor to Vendors sheet (returns a write receipt id)"""
         values = [
             vendor_data.get('code', ''),
             vendor_data.get('vendor_name', ''),
@@ -105,14 +675,14 @@ class GoogleSheetsService:
             vendor_data.get('payment_terms', ''),
             vendor_data.get('created_at', '')
         ]
-        return self.append_row(spreadsheet_id, values, 'Vendors')
+        return self.write_row(spreadsheet_id, values, 'Vendors')
     
     def get_factories(self, spreadsheet_id):
         """Get all factories from Factories sheet"""
         return self.get_all_records(spreadsheet_id, 'Factories')
     
     def add_factory(self, spreadsheet_id, factory_data):
-        """Add factory to Factories sheet"""
+        """Add factory to Factories sheet (returns a write receipt id)"""
         values = [
             factory_data.get('code', ''),
             factory_data.get('factory_name', ''),
@@ -124,11 +694,11 @@ class GoogleSheetsService:
             factory_data.get('specialization', ''),
             factory_data.get('created_at', '')
         ]
-        return self.append_row(spreadsheet_id, values, 'Factories')
+        return self.write_row(spreadsheet_id, values, 'Factories')
     
     def get_master_sheet(self, spreadsheet_id):
         """Get all data from Master Sheet (tenant-only)"""
         return self.get_all_records(spreadsheet_id, 'MasterSheet')
 
 # Singleton instance
-sheets_service = GoogleSheetsService()
\ No newline at end of file
+sheets_service = GoogleSheetsService()
@@ -17,3 +17,63 @@ class CanManageMembers(permissions.BasePermission):
     
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.can_create_members
+
+
+class HasPermission(permissions.BasePermission):
+    """
+    Requires an enabled RolePermission (master admins and tenant owners always pass)
+    Checks come from the compiled permission cache, so they cost no queries
+    once a user's permissions are cached.
+
+    Fixed permission:
+        permission_classes = [IsAuthenticated, HasPermission('ims', 'edit', 'vendor_codes')]
+
+    Per-action on a viewset, leaving out the action:
+        permission_classes = [IsAuthenticated, HasPermission('ims', resource='vendor_codes')]
+    The action is looked up in the view's permission_actions (an action name
+    or a full (category, action, resource) tuple per viewset action), then in
+    VIEWSET_ACTIONS, then derived from the HTTP method.
+    """
+    message = 'You do not have permission to perform this action'
+
+    VIEWSET_ACTIONS = {
+        'list': 'view',
+        'retrieve': 'view',
+        'create': 'create',
+        'update': 'edit',
+        'partial_update': 'edit',
+        'destroy': 'delete',
+    }
+    METHOD_ACTIONS = {
+        'GET': 'view',
+        'HEAD': 'view',
+        'OPTIONS': 'view',
+        'POST': 'create',
+        'PUT': 'edit',
+        'PATCH': 'edit',
+        'DELETE': 'delete',
+    }
+
+    def __init__(self, category, action=None, resource=None):
+        self.category = category
+        self.action = action
+        self.resource = resource
+
+    def __call__(self):
+        # DRF instantiates permission_classes; an instance stands in for its class
+        return self
+
+    def required_permission(self, request, view):
+        required = getattr(view, 'permission_actions', {}).get(getattr(view, 'action', None))
+        if isinstance(required, tuple):
+            return required
+        action = (
+            self.action or required
+            or self.VIEWSET_ACTIONS.get(getattr(view, 'action', None))
+            or self.METHOD_ACTIONS.get(request.method)
+        )
+        return self.category, action, self.resource
+
+    def has_permission(self, request, view):
+        from auth_service.permission_engine import has_permission
+        return has_permission(request.user, *self.required_permission(request, view))
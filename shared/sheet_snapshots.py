@@ -0,0 +1,269 @@
+"""
+Local columnar snapshots of Google Sheets worksheets
+A worksheet too large to ship to the browser on every request (the
+MasterSheet) is pulled periodically into a snapshot on local disk and
+queried there, with filtering, sorting and pagination done server side.
+
+A snapshot is a directory of NumPy arrays, loaded memory-mapped so every
+worker shares the page cache instead of holding its own copy:
+    meta.json       columns, row count, when it was taken
+    col_<i>.npy     cell text of column i (UTF-8, fixed width)
+    search.npy      lowercased text of each row, for ?q= substring matches
+    order_<i>.npy   row order sorted on column i (numeric when the column is)
+Snapshots are written to a new directory and published by atomically
+replacing the CURRENT file next to them, so readers never see a partial one.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Snapshot directories kept per sheet; older ones are deleted (mapped arrays
+# stay readable until the workers using them move on)
+KEEP_SNAPSHOTS = 2
+
+# Joins cells in the search column so a query cannot match across two cells
+CELL_SEPARATOR = '\x1f'
+
+
+def _encode(values):
+    array = np.array([value.encode('utf-8') for value in values], dtype=bytes)
+    # np.array gives S0 for all-empty columns, which np.save cannot reload
+    return array.astype('S1') if array.dtype.itemsize == 0 else array
+
+
+def _numericise(value):
+    """Cell text as get_all_records returns it (numbers for numeric cells)"""
+    if not value:
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _sort_order(values):
+    """Row indices sorted on a column: numerically if every filled cell is a number"""
+    try:
+        numbers = np.array([float(value.replace(',', '')) if value else np.nan for value in values])
+    except ValueError:
+        numbers = None
+    if numbers is not None and not np.isnan(numbers).all():
+        # Blank cells (nan) sort last
+        return np.argsort(numbers, kind='stable').astype(np.int32)
+    return np.argsort(_encode([value.lower() for value in values]), kind='stable').astype(np.int32)
+
+
+class SheetSnapshot:
+    """A loaded, read-only snapshot of one worksheet"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as handle:
+            meta = json.load(handle)
+        self.columns = meta['columns']
+        self.rows = meta['rows']
+        self.taken_at = datetime.fromisoformat(meta['taken_at'])
+        self.spreadsheet_id = meta['spreadsheet_id']
+        self.sheet_name = meta['sheet_name']
+        self.cells = [self._load(f'col_{index}.npy') for index in range(len(self.columns))]
+        self.search = self._load('search.npy') if self.columns else None
+        self.orders = {}
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode='r')
+
+    def age(self):
+        """Seconds since the snapshot was taken"""
+        return (datetime.now(timezone.utc) - self.taken_at).total_seconds()
+
+    def order(self, column):
+        if column not in self.orders:
+            self.orders[column] = self._load(f'order_{self.columns.index(column)}.npy')
+        return self.orders[column]
+
+    def query(self, q=None, sort=None, page=1, page_size=50):
+        """
+        One page of rows as records (dicts keyed by column), and the number of
+        rows matching q. sort is a column name, prefixed with '-' for
+        descending; unknown columns raise ValueError.
+        """
+        descending = bool(sort) and sort.startswith('-')
+        column = sort.lstrip('-') if sort else None
+        if column and column not in self.columns:
+            raise ValueError(f'Unknown sort column: {column}')
+        if not self.rows:
+            return [], 0
+
+        indices = self.order(column) if column else np.arange(self.rows, dtype=np.int32)
+        if descending:
+            indices = indices[::-1]
+        if q:
+            matches = np.char.find(self.search, q.lower().encode('utf-8')) >= 0
+            indices = indices[matches[indices]]
+
+        total = len(indices)
+        start = (page - 1) * page_size
+        page_indices = indices[start:start + page_size]
+        records = [
+            {
+                name: _numericise(cells[index].decode('utf-8'))
+                for name, cells in zip(self.columns, self.cells)
+            }
+            for index in page_indices
+        ]
+        return records, total
+
+
+class SheetSnapshotStore:
+    """
+    Snapshots of worksheets under GOOGLE_SHEETS_SNAPSHOT_DIR
+
+    get() serves the current snapshot, pulling one during the call only when
+    none exists yet; a snapshot older than max_age is still served while one
+    background thread pulls a new one. The snapshot_sheets command refreshes
+    them on a schedule so requests rarely find them old.
+    """
+
+    def __init__(self, directory=None, max_age=None):
+        self._directory = directory
+        self._max_age = max_age
+        self.lock = threading.Lock()
+        # key -> loaded SheetSnapshot (this process's mapping of CURRENT)
+        self.loaded = {}
+        # key -> Lock held while this process pulls the snapshot
+        self.pulling = {}
+        self.refreshing = set()
+
+    @property
+    def directory(self):
+        return str(self._directory or settings.GOOGLE_SHEETS_SNAPSHOT_DIR)
+
+    @property
+    def max_age(self):
+        return self._max_age if self._max_age is not None else settings.GOOGLE_SHEETS_SNAPSHOT_MAX_AGE
+
+    def sheet_dir(self, spreadsheet_id, sheet_name):
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_-]', '_', f'{spreadsheet_id}-{sheet_name}'))
+
+    def current(self, spreadsheet_id, sheet_name):
+        """The published snapshot of the sheet, or None when there is none yet"""
+        sheet_dir = self.sheet_dir(spreadsheet_id, sheet_name)
+        try:
+            with open(os.path.join(sheet_dir, 'CURRENT')) as handle:
+                name = handle.read().strip()
+        except FileNotFoundError:
+            return None
+        key = (spreadsheet_id, sheet_name)
+        with self.lock:
+            snapshot = self.loaded.get(key)
+            if snapshot is not None and os.path.basename(snapshot.path) == name:
+                return snapshot
+        snapshot = SheetSnapshot(os.path.join(sheet_dir, name))
+        with self.lock:
+            self.loaded[key] = snapshot
+        return snapshot
+
+    def get(self, spreadsheet_id, sheet_name, loader):
+        """Current snapshot of the sheet; loader() returns its get_all_values()"""
+        snapshot = self.current(spreadsheet_id, sheet_name)
+        if snapshot is None:
+            return self.pull(spreadsheet_id, sheet_name, loader)
+        if snapshot.age() >= self.max_age:
+            self._refresh_in_background(spreadsheet_id, sheet_name, loader)
+        return snapshot
+
+    def pull(self, spreadsheet_id, sheet_name, loader, force=False):
+        """Take a new snapshot; concurrent cold pulls in this process share one"""
+        key = (spreadsheet_id, sheet_name)
+        with self.lock:
+            pulling = self.pulling.setdefault(key, threading.Lock())
+        with pulling:
+            if not force:
+                # Another thread (or worker) may have published one meanwhile
+                snapshot = self.current(spreadsheet_id, sheet_name)
+                if snapshot is not None:
+                    return snapshot
+            self.write(spreadsheet_id, sheet_name, loader())
+            return self.current(spreadsheet_id, sheet_name)
+
+    def _refresh_in_background(self, spreadsheet_id, sheet_name, loader):
+        key = (spreadsheet_id, sheet_name)
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+
+    def _refresh(self, key, loader):
+        try:
+            self.pull(*key, loader, force=True)
+        except Exception:
+            logger.warning('Refreshing the snapshot of sheet %s failed; serving the old one', key, exc_info=True)
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def write(self, spreadsheet_id, sheet_name, values):
+        """Write values (header row first, as from get_all_values) as the new snapshot"""
+        header = [str(column) for column in values[0]] if values else []
+        rows = [
+            [str(row[index]) if index < len(row) else '' for index in range(len(header))]
+            for row in values[1:]
+            if any(str(cell) for cell in row)
+        ]
+
+        sheet_dir = self.sheet_dir(spreadsheet_id, sheet_name)
+        os.makedirs(sheet_dir, exist_ok=True)
+        path = tempfile.mkdtemp(prefix='.pull-', dir=sheet_dir)
+        for index in range(len(header)):
+            column = [row[index] for row in rows]
+            np.save(os.path.join(path, f'col_{index}.npy'), _encode(column))
+            np.save(os.path.join(path, f'order_{index}.npy'), _sort_order(column))
+        if header:
+            np.save(os.path.join(path, 'search.npy'),
+                    _encode([CELL_SEPARATOR.join(row).lower() for row in rows]))
+        with open(os.path.join(path, 'meta.json'), 'w') as handle:
+            json.dump({
+                'spreadsheet_id': spreadsheet_id,
+                'sheet_name': sheet_name,
+                'columns': header,
+                'rows': len(rows),
+                'taken_at': datetime.now(timezone.utc).isoformat(),
+            }, handle)
+
+        name = f'{time.time_ns()}-{os.getpid()}'
+        os.rename(path, os.path.join(sheet_dir, name))
+        pointer = os.path.join(sheet_dir, f'.CURRENT-{name}')
+        with open(pointer, 'w') as handle:
+            handle.write(name)
+        os.replace(pointer, os.path.join(sheet_dir, 'CURRENT'))
+        self.prune(sheet_dir, keep=name)
+        return name
+
+    def prune(self, sheet_dir, keep):
+        published = sorted(
+            (entry for entry in os.listdir(sheet_dir) if entry[0].isdigit()),
+            key=lambda entry: int(entry.split('-')[0])
+        )
+        for entry in published[:-KEEP_SNAPSHOTS]:
+            if entry != keep:
+                shutil.rmtree(os.path.join(sheet_dir, entry), ignore_errors=True)
+
+
+sheet_snapshots = SheetSnapshotStore()
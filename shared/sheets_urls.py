@@ -14,6 +14,9 @@ urlpatterns = [
     path('factories/', sheets_views.list_factories, name='list-factories'),
     path('factories/add/', sheets_views.add_factory, name='add-factory'),
     
+    # Write receipts for queued rows
+    path('writes/<str:receipt_id>/', sheets_views.write_status, name='sheets-write-status'),
+    
     # Master Sheet (Tenant-only)
     path('master/', sheets_views.get_master_sheet, name='get-master-sheet'),
     
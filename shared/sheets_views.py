@@ -3,9 +3,45 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
-from .google_sheets import sheets_service
+from rest_framework.settings import api_settings
+from .google_sheets import sheets_service, get_write_status
+from .sheet_snapshots import sheet_snapshots
 from datetime import datetime
 
+# Largest ?page_size= the master sheet endpoint serves
+MASTER_SHEET_MAX_PAGE_SIZE = 200
+
+def _write_accepted(label, data, receipt_id):
+    """Response for a row queued for (or written to) Google Sheets"""
+    if get_write_status(receipt_id) == 'written':
+        return Response({
+            'status': 'success',
+            'message': f'{label} added successfully',
+            'data': {**data, 'receipt_id': receipt_id}
+        })
+    return Response({
+        'status': 'success',
+        'message': f'{label} queued for Google Sheets',
+        'data': {**data, 'receipt_id': receipt_id}
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def write_status(request, receipt_id):
+    """Get the state of a queued Google Sheets write (pending, written or failed)"""
+    write_state = get_write_status(receipt_id)
+    if write_state is None:
+        return Response({
+            'status': 'error',
+            'message': 'Unknown or expired write receipt'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'status': 'success',
+        'data': {'receipt_id': receipt_id, 'state': write_state}
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_buyers(request):
@@ -31,17 +67,13 @@ def add_buyer(request):
         data = request.data
         data['created_at'] = datetime.now().isoformat()
         
-        success = sheets_service.add_buyer(
+        receipt_id = sheets_service.add_buyer(
             settings.GOOGLE_SHEETS_SPREADSHEET_ID,
             data
         )
         
-        if success:
-            return Response({
-                'status': 'success',
-                'message': 'Buyer added successfully',
-                'data': data
-            })
+        if receipt_id:
+            return _write_accepted('Buyer', data, receipt_id)
         else:
             return Response({
                 'status': 'error',
@@ -80,17 +112,13 @@ def add_vendor(request):
         data = request.data
         data['created_at'] = datetime.now().isoformat()
         
-        success = sheets_service.add_vendor(
+        receipt_id = sheets_service.add_vendor(
             settings.GOOGLE_SHEETS_SPREADSHEET_ID,
             data
         )
         
-        if success:
-            return Response({
-                'status': 'success',
-                'message': 'Vendor added successfully',
-                'data': data
-            })
+        if receipt_id:
+            return _write_accepted('Vendor', data, receipt_id)
         else:
             return Response({
                 'status': 'error',
@@ -129,17 +157,13 @@ def add_factory(request):
         data = request.data
         data['created_at'] = datetime.now().isoformat()
         
-        success = sheets_service.add_factory(
+        receipt_id = sheets_service.add_factory(
             settings.GOOGLE_SHEETS_SPREADSHEET_ID,
             data
         )
         
-        if success:
-            return Response({
-                'status': 'success',
-                'message': 'Factory added successfully',
-                'data': data
-            })
+        if receipt_id:
+            return _write_accepted('Factory', data, receipt_id)
         else:
             return Response({
                 'status': 'error',
@@ -156,7 +180,12 @@ def add_factory(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_master_sheet(request):
-    """Get master sheet data (tenant-only access)"""
+    """
+    Get master sheet data (tenant-only access)
+    Served from the local snapshot (see sheet_snapshots.py), one page at a time:
+    ?q= matches any cell (case-insensitive), ?sort=column or ?sort=-column,
+    ?page= and ?page_size= (at most MASTER_SHEET_MAX_PAGE_SIZE)
+    """
     user = request.user
     
     # Check if user is tenant owner
@@ -167,15 +196,47 @@ def get_master_sheet(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        records = sheets_service.get_master_sheet(
-            settings.GOOGLE_SHEETS_SPREADSHEET_ID
+        page = max(1, int(request.query_params.get('page', 1)))
+        page_size = int(request.query_params.get('page_size', api_settings.PAGE_SIZE))
+        page_size = max(1, min(page_size, MASTER_SHEET_MAX_PAGE_SIZE))
+    except ValueError:
+        return Response({
+            'status': 'error',
+            'message': 'page and page_size must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        spreadsheet_id = settings.GOOGLE_SHEETS_SPREADSHEET_ID
+        snapshot = sheet_snapshots.get(
+            spreadsheet_id, 'MasterSheet',
+            lambda: sheets_service.get_all_values(spreadsheet_id, 'MasterSheet')
+        )
+        records, count = snapshot.query(
+            q=request.query_params.get('q', '').strip(),
+            sort=request.query_params.get('sort', '').strip(),
+            page=page,
+            page_size=page_size
         )
+    except ValueError as e:
         return Response({
-            'status': 'success',
-            'data': records
-        })
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'status': 'error',
             'message': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'status': 'success',
+        'data': records,
+        'count': count,
+        'page': page,
+        'page_size': page_size,
+        'columns': snapshot.columns,
+        'snapshot': {
+            'taken_at': snapshot.taken_at.isoformat(),
+            'age_seconds': round(snapshot.age(), 1)
+        }
+    })
@@ -0,0 +1,31 @@
+"""
+Transaction helpers
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic() that takes the write lock when it begins on SQLite
+    For write paths that read first (read existing rows, then update them):
+    under SQLite's default DEFERRED mode two such transactions can both read
+    and then fail to upgrade to a write lock. With BEGIN IMMEDIATE the second
+    one waits for busy_timeout instead. Nested calls join the outer
+    transaction as atomic() does; on other databases this is plain atomic().
+    Works as a decorator or a context manager.
+    """
+    connection = transaction.get_connection(using)
+    immediate = connection.vendor == 'sqlite' and not connection.in_atomic_block
+    if immediate:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            if immediate:
+                connection.begin_immediate = False
+            yield
+    finally:
+        if immediate:
+            connection.begin_immediate = False
@@ -0,0 +1,44 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.test.utils import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache():
+    """
+    Tests get an in-memory shared cache (L2): the default sqlite L2 is a file
+    that outlives test runs, so its entries and version counters would carry
+    over between runs and from dev data
+    """
+    with override_settings(CACHES={
+        **settings.CACHES,
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    }):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(isolated_cache):
+    yield
+    caches['default'].clear()
+    caches['shared'].clear()
+
+
+@pytest.fixture
+def tenant(db):
+    from auth_service.models import Tenant
+
+    return Tenant.objects.create(company_name='Test Textiles', company_email='test@example.com')
+
+
+@pytest.fixture
+def owner(tenant):
+    from auth_service.models import User
+
+    return User.objects.create_user(
+        email='owner@test.example.com',
+        password='test-password-123',
+        role='tenant_owner',
+        tenant=tenant
+    )
@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.test import APIClient
+
+from auth_service.models import Tenant, User
+from inventory_management.autocomplete import registry
+from inventory_management.models import BuyerCode
+
+
+@pytest.fixture(autouse=True)
+def buyers(tenant):
+    registry.clear()
+    other = Tenant.objects.create(company_name='Other Textiles', company_email='other@example.com')
+    BuyerCode.objects.bulk_create_with_codes([
+        BuyerCode(tenant=owner_tenant, buyer_name=name, buyer_address='1 Road',
+                  contact_person='Person', retailer='Retail')
+        for owner_tenant, name in [(tenant, 'Acme Own'), (other, 'Acme Other'), (None, 'Acme Shared')]
+    ])
+    yield
+    registry.clear()
+
+
+def names(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    response = client.get('/api/ims/autocomplete/', {'kind': 'buyer', 'q': 'acme'})
+    assert response.status_code == 200
+    return sorted(record['name'] for record in response.json()['data'])
+
+
+def test_tenant_users_see_their_tenant_codes(owner):
+    assert names(owner) == ['Acme Own']
+
+
+def test_users_without_a_tenant_see_shared_codes_only(db):
+    user = User.objects.create_user(email='loose@test.example.com', role='tenant_owner')
+    assert names(user) == ['Acme Shared']
+
+
+def test_master_admins_see_every_code(db):
+    admin = User.objects.create_user(email='admin@test.example.com', role='master_admin')
+    assert names(admin) == ['Acme Other', 'Acme Own', 'Acme Shared']
+
+
+def test_new_codes_reach_a_built_index(owner, tenant, django_capture_on_commit_callbacks):
+    assert names(owner) == ['Acme Own']
+    with django_capture_on_commit_callbacks(execute=True):
+        BuyerCode.objects.bulk_create_with_codes([
+            BuyerCode(tenant=tenant, buyer_name='Acme Bulk', buyer_address='1 Road',
+                      contact_person='Person', retailer='Retail')
+        ])
+        BuyerCode.objects.create(tenant=tenant, code='999A', buyer_name='Acme Saved', buyer_address='1 Road',
+                                 contact_person='Person', retailer='Retail')
+    assert names(owner) == ['Acme Bulk', 'Acme Own', 'Acme Saved']
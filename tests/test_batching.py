@@ -0,0 +1,36 @@
+from shared.batching import BatchingQueue
+
+
+def make_queue(flush):
+    return BatchingQueue(flush, name='test', batch_size=10, interval=60, max_attempts=3, backoff=0)
+
+
+def test_failed_flushes_are_retried():
+    written = []
+    failures = [RuntimeError('database is locked')] * 2
+
+    def flush(batch):
+        if failures:
+            raise failures.pop()
+        written.extend(batch)
+
+    batching = make_queue(flush)
+    for number in range(5):
+        batching.put(number)
+    batching.close()
+    assert written == [0, 1, 2, 3, 4]
+
+
+def test_only_items_that_fail_on_their_own_are_dropped():
+    written = []
+
+    def flush(batch):
+        if 'bad' in batch:
+            raise ValueError('bad row')
+        written.extend(batch)
+
+    batching = make_queue(flush)
+    for item in ['a', 'bad', 'b']:
+        batching.put(item)
+    batching.close()
+    assert written == ['a', 'b']
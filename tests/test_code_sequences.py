@@ -0,0 +1,33 @@
+import pytest
+from django.db import IntegrityError, transaction
+
+from inventory_management.models import BuyerCode, CodeSequence
+from inventory_management.sequences import reserve_numbers
+
+
+@pytest.mark.django_db
+def test_one_shared_counter_per_kind():
+    CodeSequence.objects.create(kind='buyer', tenant=None)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        CodeSequence.objects.create(kind='buyer', tenant=None)
+
+
+@pytest.mark.django_db
+def test_shared_codes_are_unique():
+    BuyerCode.objects.create(code='101A', buyer_name='A', buyer_address='1 Road', contact_person='P', retailer='R')
+    with pytest.raises(IntegrityError), transaction.atomic():
+        BuyerCode.objects.create(code='101A', buyer_name='B', buyer_address='2 Road', contact_person='P', retailer='R')
+
+
+@pytest.mark.django_db
+def test_shared_sequence_keeps_counting():
+    first = reserve_numbers(BuyerCode, None, 2)
+    second = reserve_numbers(BuyerCode, None, 1)
+    assert first + second == [101, 102, 103]
+    assert CodeSequence.objects.filter(kind='buyer', tenant=None).count() == 1
+
+
+@pytest.mark.django_db
+def test_tenants_have_their_own_sequences(tenant):
+    assert reserve_numbers(BuyerCode, tenant, 1) == [101]
+    assert reserve_numbers(BuyerCode, None, 1) == [101]
@@ -0,0 +1,36 @@
+from django.http import StreamingHttpResponse
+
+from shared import db_routing
+from shared.db_routing import ReplicaRoutingMiddleware
+
+
+def test_streamed_content_is_read_with_the_request_state(rf, monkeypatch):
+    monkeypatch.setattr(db_routing, 'replica_configured', lambda: True)
+    seen = []
+
+    def stream():
+        for _ in range(3):
+            seen.append(db_routing._read_state.get())
+            yield b'row\n'
+
+    middleware = ReplicaRoutingMiddleware(lambda request: StreamingHttpResponse(stream()))
+    response = middleware(rf.get('/api/ims/buyer-codes/master-sheet/'))
+    assert db_routing._read_state.get() is None
+
+    assert b''.join(response.streaming_content) == b'row\n' * 3
+    assert len(seen) == 3 and all(state is not None and state.use_replica for state in seen)
+    assert db_routing._read_state.get() is None
+
+
+def test_streamed_content_of_unsafe_requests_stays_on_the_primary(rf, monkeypatch):
+    monkeypatch.setattr(db_routing, 'replica_configured', lambda: True)
+    monkeypatch.setattr(ReplicaRoutingMiddleware, 'pin', lambda self, request, response: None)
+    seen = []
+
+    def stream():
+        seen.append(db_routing._read_state.get())
+        yield b'row\n'
+
+    middleware = ReplicaRoutingMiddleware(lambda request: StreamingHttpResponse(stream()))
+    b''.join(middleware(rf.post('/')).streaming_content)
+    assert not seen[0].use_replica
@@ -0,0 +1,36 @@
+import pytest
+from rest_framework.test import APIClient
+
+from auth_service.models import Tenant, User
+from inventory_management.models import Department
+
+
+@pytest.fixture(autouse=True)
+def departments(tenant):
+    other = Tenant.objects.create(company_name='Other Textiles', company_email='other@example.com')
+    for code, department_tenant in [('own', tenant), ('other', other), ('shared', None)]:
+        Department.objects.create(code=code, name=code.title(), tenant=department_tenant)
+
+
+def menu_codes(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    menu = client.get('/api/ims/menu-structure/').json()['data']
+    listed = client.get('/api/ims/departments/').json()['results']
+    # The menu lists what the department endpoints list
+    assert sorted(item['code'] for item in listed) == sorted(item['code'] for item in menu)
+    return sorted(item['code'] for item in menu)
+
+
+def test_tenant_users_see_their_own_and_shared_departments(owner):
+    assert menu_codes(owner) == ['own', 'shared']
+
+
+def test_users_without_a_tenant_see_shared_departments_only(db):
+    user = User.objects.create_user(email='loose@test.example.com', role='tenant_owner')
+    assert menu_codes(user) == ['shared']
+
+
+def test_master_admins_see_every_department(db):
+    admin = User.objects.create_user(email='admin@test.example.com', role='master_admin')
+    assert menu_codes(admin) == ['other', 'own', 'shared']
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from auth_service.models import Tenant, User
+from inventory_management.models import Department, Segment
+
+
+SEGMENTS_PER_DEPARTMENT = 5
+
+
+class DepartmentQueryTests(TestCase):
+    """
+    The department endpoints run a fixed number of queries, however many
+    departments there are (authentication is bypassed with force_authenticate)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(company_name='Query Check Textiles', company_email='check@example.com')
+        cls.owner = User.objects.create_user(
+            email='owner@check.example.com',
+            password='check-password-123',
+            role='tenant_owner',
+            tenant=cls.tenant
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        self.created = 0
+
+    def add_departments(self, count):
+        while self.created < count:
+            # Alternate tenant-owned and shared departments
+            department = Department.objects.create(
+                code=f'dept-{self.created}',
+                name=f'Department {self.created}',
+                tenant=self.tenant if self.created % 2 else None
+            )
+            Segment.objects.bulk_create([
+                Segment(
+                    department=department,
+                    code=f'seg-{number}',
+                    name=f'Segment {number}',
+                    is_active=number % 2 == 0
+                )
+                for number in range(SEGMENTS_PER_DEPARTMENT)
+            ])
+            self.created += 1
+        return department
+
+    def test_list(self):
+        # page count + departments with annotated segment counts
+        for size in (5, 40):
+            self.add_departments(size)
+            with self.subTest(departments=size), self.assertNumQueries(2):
+                response = self.client.get('/api/ims/departments/')
+            self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        # department with counts + prefetched segments
+        for size in (5, 40):
+            department = self.add_departments(size)
+            with self.subTest(departments=size), self.assertNumQueries(2):
+                response = self.client.get(f'/api/ims/departments/{department.id}/')
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,19 @@
+from rest_framework.test import APIClient
+
+from auth_service.models import User
+
+
+def test_the_public_health_check_only_reports_up_or_down(db):
+    body = APIClient().get('/api/health/detailed/').json()
+    assert body['checks'] == {'database': 'healthy', 'cache': 'healthy'}
+    assert 'cache' not in body
+
+
+def test_master_admins_get_the_cache_stats(owner):
+    admin = User.objects.create_user(email='admin@test.example.com', role='master_admin')
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    assert 'stats' in client.get('/api/health/detailed/').json()['cache']
+
+    client.force_authenticate(user=owner)
+    assert 'cache' not in client.get('/api/health/detailed/').json()
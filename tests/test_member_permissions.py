@@ -0,0 +1,51 @@
+import pytest
+from rest_framework.test import APIClient
+
+from auth_service.models import Permission, RoleTemplate, User
+from auth_service.permission_engine import has_permission
+
+
+@pytest.fixture
+def permission(db):
+    return Permission.objects.create(category='ims', action='view', resource='departments')
+
+
+@pytest.fixture
+def member(tenant, permission):
+    template = RoleTemplate.objects.create(name='Viewer', role='supervisor')
+    template.permissions.set([permission])
+    return User.objects.create_user(
+        email='member@test.example.com', role='supervisor', tenant=tenant, role_template=template
+    )
+
+
+def toggle(owner, member, permission):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client.post(f'/api/auth/members/{member.id}/permissions/{permission.id}/toggle/')
+
+
+def can_view(member):
+    return has_permission(User.objects.get(pk=member.pk), 'ims', 'view', 'departments')
+
+
+def test_toggling_a_template_permission_revokes_it(owner, member, permission):
+    assert can_view(member)
+
+    response = toggle(owner, member, permission)
+    assert response.status_code == 200
+    assert response.json()['message'] == 'Permission disabled successfully'
+    assert not can_view(member)
+
+    response = toggle(owner, member, permission)
+    assert response.json()['message'] == 'Permission enabled successfully'
+    assert can_view(member)
+
+
+def test_toggling_a_missing_permission_grants_it(owner, tenant, permission):
+    member = User.objects.create_user(email='plain@test.example.com', role='supervisor', tenant=tenant)
+    assert not can_view(member)
+
+    response = toggle(owner, member, permission)
+    assert response.json()['message'] == 'Permission enabled successfully'
+    assert can_view(member)
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from auth_service.models import Permission, RolePermission, RoleTemplate, Tenant, User
+
+
+OVERRIDES_PER_MEMBER = 3
+
+
+class MemberQueryTests(TestCase):
+    """
+    The member endpoints run a fixed number of queries, however many members
+    there are (authentication is bypassed with force_authenticate). Permission
+    caches are cleared before each request, so the counts cover the cold path.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.permissions = [
+            Permission.objects.create(category='ims', action=action, resource=resource)
+            for resource in ('departments', 'segments', 'buyer_codes', 'vendor_codes')
+            for action in ('view', 'create', 'edit', 'delete')
+        ]
+        cls.template = RoleTemplate.objects.create(name='Checker', role='supervisor')
+        cls.template.permissions.set(cls.permissions[::2])
+        cls.tenant = Tenant.objects.create(
+            company_name='Query Check Textiles', company_email='check@example.com', user_limit=1000
+        )
+        cls.owner = User.objects.create_user(
+            email='owner@check.example.com',
+            password='check-password-123',
+            role='tenant_owner',
+            tenant=cls.tenant
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        self.created = 1  # the owner is listed too
+
+    def add_members(self, count):
+        while self.created < count:
+            # Alternate template members and members with their own rows
+            member = User.objects.create_user(
+                email=f'member{self.created}@check.example.com',
+                role='supervisor',
+                tenant=self.tenant,
+                role_template=self.template if self.created % 2 else None
+            )
+            RolePermission.objects.bulk_create([
+                RolePermission(user=member, permission=permission, is_enabled=number % 2 == 0)
+                for number, permission in enumerate(self.permissions[:OVERRIDES_PER_MEMBER])
+            ])
+            self.created += 1
+
+    def assertQueriesAtEachSize(self, queries, path):
+        for size in (5, 40):
+            self.add_members(size)
+            url = path() if callable(path) else path
+            cache.clear()
+            with self.subTest(members=size), self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        # page count + members joined to tenants
+        self.assertQueriesAtEachSize(2, '/api/auth/members/')
+
+    def test_list_with_permissions(self):
+        # list + every member's permission rows + the role template
+        self.assertQueriesAtEachSize(4, '/api/auth/members/?include=permissions')
+
+    def test_detail(self):
+        # member joined to tenant + permission rows + role template; always
+        # the same member, on the template
+        def path():
+            member = User.objects.filter(role_template=self.template).order_by('created_at').first()
+            return f'/api/auth/members/{member.id}/'
+        self.assertQueriesAtEachSize(3, path)
@@ -0,0 +1,36 @@
+import pytest
+from rest_framework.test import APIClient
+
+from auth_service.models import RoleTemplate, User
+
+
+@pytest.fixture
+def master_admin(tenant):
+    # A master admin may still belong to a tenant; system templates never do
+    return User.objects.create_user(email='admin@test.example.com', role='master_admin', tenant=tenant)
+
+
+def create_template(user, name):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.post('/api/auth/role-templates/', {'name': name, 'role': 'supervisor'}, format='json')
+
+
+def test_system_template_names_are_checked_among_system_templates(master_admin, tenant):
+    RoleTemplate.objects.create(name='Viewer', role='supervisor', tenant=tenant)
+
+    response = create_template(master_admin, 'Viewer')
+    assert response.status_code == 201
+    assert RoleTemplate.objects.get(pk=response.json()['data']['id']).tenant is None
+
+    assert create_template(master_admin, 'Viewer').status_code == 400
+
+
+def test_tenant_template_names_are_checked_within_the_tenant(owner, tenant):
+    RoleTemplate.objects.create(name='Viewer', role='supervisor', tenant=None)
+
+    response = create_template(owner, 'Viewer')
+    assert response.status_code == 201
+    assert RoleTemplate.objects.get(pk=response.json()['data']['id']).tenant == tenant
+
+    assert create_template(owner, 'Viewer').status_code == 400
@@ -0,0 +1,57 @@
+import pytest
+from rest_framework.test import APIClient
+
+from inventory_management import search
+from inventory_management.models import BuyerCode
+from inventory_management.search import apply_search, search_available
+
+
+@pytest.fixture
+def buyers(tenant):
+    BuyerCode.objects.bulk_create_with_codes([
+        BuyerCode(tenant=tenant, buyer_name=f'Acme Textiles {number}', buyer_address='1 Road',
+                  contact_person='Person', retailer='Retail')
+        for number in range(250)
+    ] + [
+        BuyerCode(tenant=tenant, buyer_name='Zenith Garments', buyer_address='2 Road',
+                  contact_person='Person', retailer='Retail')
+    ])
+
+
+@pytest.fixture(autouse=True)
+def index_installed(db):
+    if not search_available(BuyerCode):
+        pytest.skip('search index not installed on this database')
+
+
+def test_broad_searches_return_every_match(buyers, tenant, monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_RANK_CANDIDATES', 20)
+    matches = apply_search(BuyerCode.objects.all(), 'textiles', tenant_id=tenant.pk)
+    assert matches.count() == 250
+
+
+def test_selective_searches_are_ranked(buyers, tenant):
+    matches = apply_search(BuyerCode.objects.all(), 'textiles', tenant_id=tenant.pk)
+    assert matches.count() == 250
+    assert list(apply_search(BuyerCode.objects.all(), 'zenith', tenant_id=tenant.pk)
+                .values_list('buyer_name', flat=True)) == ['Zenith Garments']
+
+
+def test_short_terms_match_without_ranking(buyers, tenant):
+    assert apply_search(BuyerCode.objects.all(), 'ac', tenant_id=tenant.pk).count() == 250
+
+
+def test_matches_are_limited_to_the_tenant(buyers):
+    from auth_service.models import Tenant
+
+    other = Tenant.objects.create(company_name='Other Textiles', company_email='other@example.com')
+    assert not apply_search(BuyerCode.objects.all(), 'textiles', tenant_id=other.pk).exists()
+
+
+def test_search_pages_count_every_match(buyers, owner):
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    response = client.get('/api/ims/buyer-codes/', {'search': 'textiles', 'page': 5})
+    assert response.status_code == 200
+    assert response.json()['count'] == 250
+    assert len(response.json()['results']) == 50
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from shared import sheets_views
+from shared.fake_sheets import FakeSheetsClient
+from shared.google_sheets import GoogleSheetsService
+from shared.sheet_snapshots import SheetSnapshotStore
+
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+
+HEADER = ['style_code', 'style_name', 'buyer', 'quantity', 'status']
+
+ROWS = 2000
+
+
+@pytest.fixture
+def client():
+    return FakeSheetsClient({SPREADSHEET_ID: {'MasterSheet': [HEADER] + [
+        [f'ST{number:06d}', f'Style {number}', f'Buyer {number % 7}', str(ROWS - number),
+         'Shipped' if number % 3 else 'Open']
+        for number in range(ROWS)
+    ]}})
+
+
+@pytest.fixture
+def service(client):
+    return GoogleSheetsService(client=client)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SheetSnapshotStore(directory=tmp_path, max_age=3600)
+
+
+@pytest.fixture
+def get(service, store, owner, monkeypatch, settings):
+    monkeypatch.setattr(sheets_views, 'sheets_service', service)
+    monkeypatch.setattr(sheets_views, 'sheet_snapshots', store)
+    settings.GOOGLE_SHEETS_SPREADSHEET_ID = SPREADSHEET_ID
+    api = APIClient()
+    api.force_authenticate(user=owner)
+
+    def get(**params):
+        response = api.get('/api/sheets/master/', params)
+        return response.status_code, response.json()
+    return get
+
+
+def test_the_first_request_pulls_the_snapshot_and_later_ones_make_no_calls(get, client):
+    code, body = get()
+    assert code == 200
+    assert body['count'] == ROWS
+    assert len(body['data']) == 50
+    assert client.calls['get_all_values'] == 1
+
+    before = client.total_calls()
+    for page in range(1, 11):
+        get(page=page, sort='-quantity', q='buyer 3')
+    assert client.total_calls() == before
+
+
+def test_queries_match_any_cell_case_insensitively(get):
+    _, body = get(q='BUYER 3', page_size=10)
+    assert body['count'] == len(range(3, ROWS, 7))
+    assert all(row['buyer'] == 'Buyer 3' for row in body['data'])
+
+
+def test_number_columns_sort_numerically(get):
+    _, body = get(sort='quantity', page_size=3)
+    assert [row['quantity'] for row in body['data']] == [1, 2, 3]
+
+
+def test_descending_sorts_and_pages(get):
+    _, body = get(sort='-style_code', page=2, page_size=2)
+    assert [row['style_code'] for row in body['data']] == [f'ST{ROWS - 3:06d}', f'ST{ROWS - 4:06d}']
+
+
+def test_unknown_sort_columns_are_rejected(get):
+    code, _ = get(sort='nope')
+    assert code == 400
+
+
+def test_pages_past_the_end_are_empty(get):
+    _, body = get(page=ROWS)
+    assert body['data'] == []
+    assert body['count'] == ROWS
+    assert body['snapshot']['age_seconds'] < 60
+
+
+def test_an_old_snapshot_is_served_while_it_refreshes(get, client, store):
+    get()
+    client.spreadsheets[SPREADSHEET_ID]['MasterSheet'].append(['ST-NEW', 'New Style', '', '1', 'Open'])
+    store._max_age = 0
+    code, body = get(q='st-new')
+    assert code == 200
+    assert body['count'] == 0
+
+    deadline = time.monotonic() + 5
+    while store.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    store._max_age = 3600
+    _, body = get(q='st-new')
+    assert body['count'] == 1
+
+
+def test_concurrent_cold_pulls_share_one_download(client, service, store):
+    threads = [
+        threading.Thread(target=store.get, args=(
+            SPREADSHEET_ID, 'MasterSheet', lambda: service.get_all_values(SPREADSHEET_ID, 'MasterSheet')
+        ))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.calls['get_all_values'] == 1
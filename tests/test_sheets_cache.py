@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from shared.fake_sheets import FakeSheetsClient
+from shared.google_sheets import GoogleSheetsService, SheetRecordsCache
+
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+
+HEADER = ['code', 'buyer_name', 'buyer_address', 'contact_person', 'retailer', 'created_at']
+
+TTL = 0.2
+
+LATENCY = 0.02
+
+
+@pytest.fixture
+def client():
+    return FakeSheetsClient({SPREADSHEET_ID: {
+        'Buyers': [HEADER] + [[f'B{number:05d}', f'Buyer {number}', '1 Road', 'Person', 'Retail', '']
+                              for number in range(100)],
+        'Vendors': [['code', 'vendor_name']],
+        'Factories': [['code', 'factory_name']],
+    }}, latency=LATENCY)
+
+
+@pytest.fixture
+def service(client, settings):
+    settings.GOOGLE_SHEETS_WRITE_BEHIND = False
+    return GoogleSheetsService(client=client, records_cache=SheetRecordsCache(ttl=TTL, stale_ttl=1.0, max_entries=2))
+
+
+def downloads(client):
+    return client.calls['get_all_records']
+
+
+def test_concurrent_misses_share_one_download(client, service):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(len(service.get_buyers(SPREADSHEET_ID))))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [100] * 10
+    assert downloads(client) == 1
+
+
+def test_fresh_reads_make_no_api_calls(client, service):
+    service.get_buyers(SPREADSHEET_ID)
+    before = client.total_calls()
+    for _ in range(20):
+        service.get_buyers(SPREADSHEET_ID)
+    assert client.total_calls() == before
+
+
+def test_expired_reads_are_served_stale_while_one_refresh_runs(client, service):
+    service.get_buyers(SPREADSHEET_ID)
+    time.sleep(TTL)
+    started = time.monotonic()
+    for _ in range(5):
+        service.get_buyers(SPREADSHEET_ID)
+    assert time.monotonic() - started < LATENCY
+    time.sleep(LATENCY * 4 + 0.1)
+    assert downloads(client) == 2
+
+
+def test_writes_invalidate_the_sheet(client, service):
+    service.get_buyers(SPREADSHEET_ID)
+    service.add_buyer(SPREADSHEET_ID, {'code': 'B-NEW', 'buyer_name': 'New Buyer'})
+    assert 'B-NEW' in {record['code'] for record in service.get_buyers(SPREADSHEET_ID)}
+    assert downloads(client) == 2
+
+
+def test_least_recently_used_sheets_are_evicted(service):
+    service.get_buyers(SPREADSHEET_ID)
+    service.get_vendors(SPREADSHEET_ID)
+    service.get_factories(SPREADSHEET_ID)
+    assert service.cache.stats()['entries'] == 2
+    assert service.records_age(SPREADSHEET_ID, 'Buyers') is None
+
+
+def test_missing_worksheets_are_not_cached(client, service):
+    assert service.get_master_sheet(SPREADSHEET_ID) == []
+    before = client.total_calls()
+    assert service.get_master_sheet(SPREADSHEET_ID) == []
+    assert client.total_calls() > before
+
+
+def test_a_fetch_started_before_an_invalidation_is_not_stored():
+    cache = SheetRecordsCache(ttl=60, stale_ttl=60)
+    key = (SPREADSHEET_ID, 'Buyers')
+    fetching, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        fetching.set()
+        release.wait(5)
+        return ['before the write']
+
+    reader = threading.Thread(target=cache.get, args=(key, slow_loader))
+    reader.start()
+    fetching.wait(5)
+    cache.invalidate(*key)
+    release.set()
+    reader.join()
+
+    assert cache.age(key) is None
+    assert cache.get(key, lambda: ['after the write']) == ['after the write']
+
+
+def test_a_stale_refresh_started_before_an_invalidation_is_not_stored():
+    cache = SheetRecordsCache(ttl=0, stale_ttl=60)
+    key = (SPREADSHEET_ID, 'Buyers')
+    cache.store(key, ['old'])
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(5)
+        return ['before the write']
+
+    assert cache.get(key, slow_loader) == ['old']
+    cache.invalidate(*key)
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.age(key) is None
@@ -0,0 +1,102 @@
+import threading
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from shared import sheets_views
+from shared.fake_sheets import FakeSheetsClient
+from shared.google_sheets import SHEETS_API_CALLS_HEADER, GoogleSheetsService, track_api_calls
+
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+
+HEADER = ['code', 'buyer_name', 'buyer_address', 'contact_person', 'retailer', 'created_at']
+
+
+def make_service():
+    client = FakeSheetsClient({SPREADSHEET_ID: {
+        'Buyers': [HEADER, ['B00001', 'Buyer 1', '1 Road', 'Person', 'Retail', '']],
+    }})
+    return client, GoogleSheetsService(client=client)
+
+
+@pytest.fixture
+def api(settings):
+    from auth_service.models import User
+
+    settings.GOOGLE_SHEETS_SPREADSHEET_ID = SPREADSHEET_ID
+    settings.GOOGLE_SHEETS_WRITE_BEHIND = False
+    client = APIClient()
+    # Never saved: force_authenticate needs no database
+    client.force_authenticate(user=User(email='owner@sheets.example.com', role='tenant_owner'))
+    return client
+
+
+def request_calls(api):
+    """Sheets API calls made by each request, from the response header"""
+    _, service = make_service()
+    calls = {}
+
+    def call(label, method, path, data=None):
+        response = getattr(api, method)(path, data, format='json')
+        assert response.status_code in (200, 202), label
+        calls[label] = int(response[SHEETS_API_CALLS_HEADER])
+
+    buyer = {'code': 'B-NEW', 'buyer_name': 'New Buyer'}
+    with mock.patch.object(sheets_views, 'sheets_service', service):
+        call('list', 'get', '/api/sheets/buyers/')
+        call('list (cached)', 'get', '/api/sheets/buyers/')
+        call('add', 'post', '/api/sheets/buyers/add/', dict(buyer))
+        call('add (2nd)', 'post', '/api/sheets/buyers/add/', dict(buyer))
+    return calls
+
+
+def test_kept_handles_save_the_metadata_calls(api, settings):
+    kept = request_calls(api)
+    settings.GOOGLE_SHEETS_HANDLE_TTL = 0
+    reopened = request_calls(api)
+    assert kept['add (2nd)'] == 1
+    assert reopened['add (2nd)'] == 3
+
+
+def test_cached_reads_make_no_api_calls(api):
+    assert request_calls(api)['list (cached)'] == 0
+
+
+def test_calls_outside_a_request_are_counted_by_track_api_calls():
+    _, service = make_service()
+    with track_api_calls() as counter:
+        service.fetch_records(SPREADSHEET_ID, 'Buyers')
+    assert counter.count == 3
+
+
+def test_a_recreated_worksheet_is_reopened():
+    client, service = make_service()
+    service.fetch_records(SPREADSHEET_ID, 'Buyers')
+    del client.spreadsheets[SPREADSHEET_ID]['Buyers']
+    assert service.get_all_records(SPREADSHEET_ID, 'Buyers') == []
+
+    client.spreadsheets[SPREADSHEET_ID]['Buyers'] = [HEADER, ['B-RECREATED']]
+    records = service.fetch_records(SPREADSHEET_ID, 'Buyers')
+    assert [record['code'] for record in records] == ['B-RECREATED']
+
+
+def test_threads_share_the_handles():
+    client, service = make_service()
+    errors = []
+
+    def reader():
+        try:
+            for _ in range(20):
+                service.fetch_records(SPREADSHEET_ID, 'Buyers')
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert client.calls['open_by_key'] <= len(threads)
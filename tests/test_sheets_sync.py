@@ -0,0 +1,196 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from inventory_management.models import BuyerCode, SheetSyncState
+from inventory_management.sheets_sync import BUYER_SHEET, SheetSync
+from shared.fake_sheets import FakeAPIError, FakeSheetsClient
+from shared.google_sheets import GoogleSheetsService, SheetsWriteBuffer
+
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+
+ROWS = 50
+
+
+def add_buyers(tenant, count, prefix='Buyer'):
+    return BuyerCode.objects.bulk_create_with_codes([
+        BuyerCode(tenant=tenant, buyer_name=f'{prefix} {number}', buyer_address=f'{number} Road',
+                  contact_person='Person', retailer='Retail')
+        for number in range(count)
+    ])
+
+
+class Sheets:
+    """A fake Buyers sheet and the service syncing with it"""
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.client = FakeSheetsClient({SPREADSHEET_ID: {'Buyers': []}, 'other-spreadsheet': {'Buyers': []}})
+        # Sheet edits are timed by the fake Drive modifiedTime
+        self.client.clock = timezone.now()
+        self.service = GoogleSheetsService(client=self.client)
+        self.service.writes = SheetsWriteBuffer(self.service, interval=60, max_attempts=3, backoff=0.01)
+        self.rows = self.client.spreadsheets[SPREADSHEET_ID]['Buyers']
+
+    def sync(self, tenant=None, spreadsheet_id=SPREADSHEET_ID):
+        before = self.client.calls.copy()
+        report = SheetSync(tenant or self.tenant, BUYER_SHEET, service=self.service,
+                           spreadsheet_id=spreadsheet_id).run()
+        calls = {name: count - before[name] for name, count in self.client.calls.items() if count != before[name]}
+        return report, calls
+
+    def row(self, code):
+        return next(row for row in self.rows if row and row[0] == code)
+
+    def edit(self, code, buyer_name):
+        self.row(code)[1] = buyer_name
+        self.client.touch(SPREADSHEET_ID)
+
+    def add(self, values):
+        self.rows.append(values)
+        self.client.touch(SPREADSHEET_ID)
+
+
+@pytest.fixture
+def sheets(tenant):
+    add_buyers(tenant, ROWS)
+    sheets = Sheets(tenant)
+    yield sheets
+    sheets.service.writes.queue.close()
+
+
+@pytest.fixture
+def synced(sheets):
+    sheets.sync()
+    # Our own append moved modifiedTime: one more download that finds nothing
+    sheets.sync()
+    return sheets
+
+
+def test_the_first_sync_appends_every_code_in_one_call(sheets):
+    report, calls = sheets.sync()
+    assert report.pushed_new == ROWS
+    assert len(sheets.rows) == ROWS + 1
+    assert calls['append_rows'] == 1
+
+
+def test_the_sync_after_a_push_changes_nothing(sheets):
+    sheets.sync()
+    report, _ = sheets.sync()
+    assert report.downloaded
+    assert not report.pushed_updates + report.pushed_new + report.pulled_updates + report.pulled_new
+
+
+def test_a_sync_with_nothing_changed_only_reads_modified_time(synced):
+    report, calls = synced.sync()
+    assert not report.downloaded
+    assert set(calls) <= {'get_lastUpdateTime', 'open_by_key'}
+
+
+def test_a_database_edit_is_rewritten_with_one_batch_update(synced, tenant):
+    buyer = BuyerCode.objects.filter(tenant=tenant).order_by('created_at').first()
+    buyer.buyer_name = 'Edited In The App'
+    buyer.save()
+    report, calls = synced.sync()
+    assert report.pushed_updates == 1
+    assert calls['batch_update'] == 1
+    assert 'get_all_values' not in calls
+    assert synced.row(buyer.code)[1] == 'Edited In The App'
+
+
+def test_a_sheet_edit_is_saved_to_the_database(synced, tenant):
+    buyer = BuyerCode.objects.filter(tenant=tenant).order_by('created_at').first()
+    synced.edit(buyer.code, 'Edited In The Sheet')
+    report, _ = synced.sync()
+    buyer.refresh_from_db()
+    assert report.pulled_updates == 1
+    assert buyer.buyer_name == 'Edited In The Sheet'
+
+
+def test_a_newer_sheet_edit_wins_a_conflict(synced, tenant):
+    buyer = BuyerCode.objects.filter(tenant=tenant).order_by('created_at').first()
+    buyer.buyer_name = 'Older App Edit'
+    buyer.save()
+    synced.client.clock = timezone.now() + timedelta(minutes=1)
+    synced.edit(buyer.code, 'Newer Sheet Edit')
+    report, _ = synced.sync()
+    buyer.refresh_from_db()
+    assert report.conflicts_kept_sheet == 1
+    assert buyer.buyer_name == 'Newer Sheet Edit'
+
+
+def test_a_newer_database_edit_wins_a_conflict(synced, tenant):
+    buyer = BuyerCode.objects.filter(tenant=tenant).order_by('created_at').first()
+    synced.client.clock = timezone.now() - timedelta(minutes=1)
+    synced.edit(buyer.code, 'Older Sheet Edit')
+    buyer.buyer_name = 'Newer App Edit'
+    buyer.save()
+    report, _ = synced.sync()
+    buyer.refresh_from_db()
+    assert report.conflicts_kept_db == 1
+    assert buyer.buyer_name == 'Newer App Edit'
+    assert synced.row(buyer.code)[1] == 'Newer App Edit'
+
+
+def test_sheet_rows_without_a_code_are_created_and_get_their_code(synced, tenant):
+    synced.add(['', 'Added In The Sheet', '9 Road', 'Person', 'Retail', '', ''])
+    synced.add(['NOPE', 'Unknown Code', '9 Road', 'Person', 'Retail', '', ''])
+    report, _ = synced.sync()
+    created = BuyerCode.objects.get(tenant=tenant, buyer_name='Added In The Sheet')
+    assert report.pulled_new == 1
+    assert synced.rows[-2][0] == created.code
+    assert report.unknown_codes == 1
+    assert not BuyerCode.objects.filter(tenant=tenant, code='NOPE').exists()
+    assert report.pushed_updates + report.pushed_new == 0
+
+    report, _ = synced.sync()
+    assert report.pushed_updates + report.pushed_new == 0
+
+
+def test_rows_created_by_a_failed_run_are_not_created_again(synced, tenant):
+    synced.add(['', 'Added In The Sheet', '9 Road', 'Person', 'Retail', '', ''])
+    with mock.patch.object(synced.service, 'update_rows', side_effect=FakeAPIError(400)):
+        with pytest.raises(FakeAPIError):
+            synced.sync()
+    created = BuyerCode.objects.get(tenant=tenant, buyer_name='Added In The Sheet')
+    assert synced.rows[-1][0] == ''
+
+    report, _ = synced.sync()
+    assert BuyerCode.objects.filter(tenant=tenant, buyer_name='Added In The Sheet').count() == 1
+    assert report.pulled_new == 0
+    assert report.pushed_new == 0
+    assert synced.rows[-1][0] == created.code
+    assert len(synced.rows) == ROWS + 2
+    assert SheetSyncState.objects.get(tenant=tenant).pending_codes == {}
+
+
+def test_quota_errors_are_retried(synced, tenant):
+    buyer = BuyerCode.objects.filter(tenant=tenant).order_by('created_at').first()
+    buyer.buyer_name = 'Edited In The App'
+    buyer.save()
+    synced.client.fail_next(2, status_code=429)
+    report, _ = synced.sync()
+    assert report.pushed_updates == 1
+    assert synced.row(buyer.code)[1] == 'Edited In The App'
+
+
+def test_a_sheet_synced_with_another_tenant_is_refused(synced, tenant):
+    from auth_service.models import Tenant
+
+    other = Tenant.objects.create(company_name='Other Textiles', company_email='other@example.com')
+    add_buyers(other, 5, prefix='Other')
+    rows = [list(row) for row in synced.rows]
+    with pytest.raises(ValueError, match='another tenant'):
+        synced.sync(tenant=other)
+    assert synced.rows == rows
+
+    report, _ = synced.sync(tenant=other, spreadsheet_id='other-spreadsheet')
+    assert report.pushed_new == 5
+
+
+def test_the_spreadsheet_defaults_to_the_one_last_synced(synced, tenant, settings):
+    settings.GOOGLE_SHEETS_SPREADSHEET_ID = 'other-spreadsheet'
+    assert SheetSync(tenant, BUYER_SHEET, service=synced.service).spreadsheet_id == SPREADSHEET_ID
@@ -0,0 +1,127 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from shared import google_sheets
+from shared.fake_sheets import FakeSheetsClient
+from shared.google_sheets import GoogleSheetsService, SheetsWriteBuffer, get_write_status
+
+
+SPREADSHEET_ID = 'fake-spreadsheet'
+
+HEADER = ['code', 'buyer_name', 'buyer_address', 'contact_person', 'retailer', 'created_at']
+
+
+def make_service(max_size=5000, interval=60):
+    client = FakeSheetsClient({SPREADSHEET_ID: {'Buyers': [HEADER]}})
+    service = GoogleSheetsService(client=client)
+    service.writes = SheetsWriteBuffer(
+        service, max_size=max_size, batch_size=500, interval=interval, max_attempts=3, backoff=0.01
+    )
+    return client, service
+
+
+@pytest.fixture
+def client_service():
+    client, service = make_service()
+    yield client, service
+    service.writes.queue.close()
+
+
+def buyers(client):
+    return client.spreadsheets[SPREADSHEET_ID]['Buyers'][1:]
+
+
+def test_rows_are_queued_and_appended_in_batches(client_service):
+    client, service = client_service
+    receipts = []
+
+    def worker(thread_number):
+        for number in range(20):
+            receipts.append(service.add_buyer(SPREADSHEET_ID, {'code': f'B{thread_number:02d}{number:04d}'}))
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(get_write_status(receipt) == 'pending' for receipt in receipts)
+
+    service.writes.flush()
+    assert len(buyers(client)) == 100
+    assert client.calls['append_rows'] == 1
+    assert all(get_write_status(receipt) == 'written' for receipt in receipts)
+
+
+def test_quota_errors_are_retried(client_service):
+    client, service = client_service
+    client.fail_next(2, status_code=429)
+    receipt = service.add_buyer(SPREADSHEET_ID, {'code': 'B-RETRY'})
+    service.writes.flush()
+    assert get_write_status(receipt) == 'written'
+    assert [row[0] for row in buyers(client)] == ['B-RETRY']
+
+
+def test_other_errors_fail_the_receipt(client_service):
+    client, service = client_service
+    client.fail_next(1, status_code=403)
+    receipt = service.add_buyer(SPREADSHEET_ID, {'code': 'B-BAD'})
+    service.writes.flush()
+    assert get_write_status(receipt) == 'failed'
+
+
+def test_writes_fail_after_the_last_attempt(client_service):
+    client, service = client_service
+    client.fail_next(10, status_code=503)
+    receipt = service.add_buyer(SPREADSHEET_ID, {'code': 'B-DOWN'})
+    service.writes.flush()
+    assert get_write_status(receipt) == 'failed'
+
+
+def test_server_errors_before_the_append_are_retried(client_service):
+    client, service = client_service
+    service.open_worksheet(SPREADSHEET_ID, 'Buyers')
+    client.fail_next(1, status_code=503)
+    receipt = service.add_buyer(SPREADSHEET_ID, {'code': 'B-UNAPPLIED'})
+    service.writes.flush()
+    assert get_write_status(receipt) == 'written'
+    assert [row[0] for row in buyers(client)] == ['B-UNAPPLIED']
+
+
+def test_appends_applied_despite_a_server_error_are_not_repeated(client_service):
+    client, service = client_service
+    # Open the worksheet first, so the failure hits the append itself
+    service.open_worksheet(SPREADSHEET_ID, 'Buyers')
+    client.fail_next(1, status_code=503, applied=True)
+    receipt = service.add_buyer(SPREADSHEET_ID, {'code': 'B-APPLIED'})
+    service.writes.flush()
+    assert get_write_status(receipt) == 'written'
+    assert [row[0] for row in buyers(client)] == ['B-APPLIED']
+    assert client.calls['append_rows'] == 1
+
+
+def test_receipt_store_errors_do_not_repeat_the_append(client_service, monkeypatch):
+    client, service = client_service
+    service.add_buyer(SPREADSHEET_ID, {'code': 'B-NO-RECEIPT'})
+    shared = google_sheets._receipts()
+    monkeypatch.setattr(shared, 'set_many', mock.Mock(side_effect=ConnectionError('cache down')))
+    service.writes.flush()
+    assert [row[0] for row in buyers(client)] == ['B-NO-RECEIPT']
+    assert client.calls['append_rows'] == 1
+
+
+def test_a_full_queue_flushes_instead_of_dropping_rows():
+    client, service = make_service(max_size=5)
+    receipts = [service.add_buyer(SPREADSHEET_ID, {'code': f'B-FULL-{number}'}) for number in range(20)]
+    service.writes.queue.close()
+    assert len(buyers(client)) == 20
+    assert all(get_write_status(receipt) == 'written' for receipt in receipts)
+
+
+def test_closing_the_buffer_writes_queued_rows():
+    client, service = make_service()
+    receipts = [service.add_buyer(SPREADSHEET_ID, {'code': f'B-EXIT-{number}'}) for number in range(10)]
+    service.writes.queue.close()
+    assert len(buyers(client)) == 10
+    assert all(get_write_status(receipt) == 'written' for receipt in receipts)